@@ -3,7 +3,7 @@ from discord.ext import commands
 import os
 import sys
 from bot_state import OWNER_ID
-from database import connect_db
+from database import connect_db, get_pool, get_pool_stats
 
 
 class AdminCog(commands.Cog):
@@ -17,48 +17,47 @@ class AdminCog(commands.Cog):
     # 🔥 INTERNAL: WIPE FUNCTION
     # ==========================
     def wipe_bot_data(self):
-        db = connect_db()
-        cursor = db.cursor()
-
-        tables_to_clear = [
-            "user_cash",
-            "gamble_log",
-            "user_daily",
-            "user_rob_protect",
-            "user_protection",
-            "duel_pending",
-            "rob_stats",
-
-            "streak_pairs",
-            "streak_logs",
-
-            "discord_logs",
-            "user_last_active",
-
-            "werewolf_votes",
-            "werewolf_players",
-            "werewolf_logs",
-            "werewolf_games",
-            "werewolf_leaderboards"
-        ]
-
-        # DELETE agar aman dari FK
-        for table in tables_to_clear:
-            try:
-                cursor.execute(f"DELETE FROM {table};")
-            except Exception as e:
-                print(f"[WARN] DELETE gagal pada {table}: {e}")
-
-        # Reset auto increment
-        for table in tables_to_clear:
-            try:
-                cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = 1;")
-            except Exception as e:
-                print(f"[WARN] Reset AUTO_INCREMENT gagal pada {table}: {e}")
-
-        db.commit()
-        cursor.close()
-        db.close()
+        with connect_db() as db:
+            cursor = db.cursor()
+
+            tables_to_clear = [
+                "user_cash",
+                "gamble_log",
+                "user_daily",
+                "user_rob_protect",
+                "user_protection",
+                "duel_pending",
+                "rob_stats",
+
+                "streak_pairs",
+                "streak_logs",
+
+                "discord_logs",
+                "user_last_active",
+
+                "werewolf_votes",
+                "werewolf_players",
+                "werewolf_logs",
+                "werewolf_games",
+                "werewolf_leaderboards"
+            ]
+
+            # DELETE agar aman dari FK
+            for table in tables_to_clear:
+                try:
+                    cursor.execute(f"DELETE FROM {table};")
+                except Exception as e:
+                    print(f"[WARN] DELETE gagal pada {table}: {e}")
+
+            # Reset auto increment
+            for table in tables_to_clear:
+                try:
+                    cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = 1;")
+                except Exception as e:
+                    print(f"[WARN] Reset AUTO_INCREMENT gagal pada {table}: {e}")
+
+            db.commit()
+            cursor.close()
 
         print("✅ Semua data bot berhasil dihapus (struktur aman).")
 
@@ -76,6 +75,42 @@ class AdminCog(commands.Cog):
             await ctx.reply(f"❌ Gagal menghapus data:\n```\n{e}\n```")
             return
 
+    # ==========================
+    # 📊 DB POOL STATS
+    # ==========================
+    @commands.command(name="dbstats")
+    async def db_stats(self, ctx):
+        stats = get_pool_stats()
+        pool = get_pool()
+
+        embed = discord.Embed(title="📊 Database Pool", color=discord.Color.blurple())
+        embed.add_field(
+            name="Pool",
+            value=(
+                f"Size: **{pool.size}** (+{pool.max_overflow} overflow)\n"
+                f"Dibuat: **{stats['created']}** • Dibuang: **{stats['discarded']}**\n"
+                f"Overflow: **{stats['overflow']}** • Timeout: **{stats['timeouts']}**"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="Acquire",
+            value=(
+                f"Total: **{stats['acquires']}**\n"
+                f"Wait avg: **{stats['wait_avg_ms']:.2f} ms** • max: **{stats['wait_max_ms']:.2f} ms**"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="Query",
+            value=(
+                f"Total: **{stats['queries']}**\n"
+                f"Latency avg: **{stats['query_avg_ms']:.2f} ms** • max: **{stats['query_max_ms']:.2f} ms**"
+            ),
+            inline=False
+        )
+        await ctx.reply(embed=embed)
+
     # ==========================
     # 🔁 RESTART SAJA
     # ==========================
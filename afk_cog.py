@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
-from database import connect_db, set_afk, get_afk, clear_afk
+from database import set_afk, get_afk, clear_afk, run_db
+from mysql.connector import Error
+import asyncio
 
 class AFK(commands.Cog):
     def __init__(self, bot):
@@ -13,9 +15,7 @@ class AFK(commands.Cog):
         usage="afk <reason>"
     )
     async def afk(self, ctx, *, reason="Tidak ada alasan"):
-        db = connect_db()
-        set_afk(db, ctx.author.id, ctx.guild.id, reason)
-        db.close()
+        await run_db(set_afk, ctx.author.id, ctx.guild.id, reason)
 
         try:
             # Gunakan nick jika ada, jika tidak fallback ke name
@@ -35,12 +35,16 @@ class AFK(commands.Cog):
         if message.content.startswith(tuple(await self.bot.get_prefix(message))):
             return
 
-        db = connect_db()
+        try:
+            # ➤ Hapus status AFK dari pengirim
+            afk_status = await run_db(get_afk, message.author.id, message.guild.id)
+            if afk_status:
+                await run_db(clear_afk, message.author.id, message.guild.id)
+        except (asyncio.TimeoutError, Error) as e:
+            print(f"[AFK] Gagal cek status AFK: {e!r}")
+            return
 
-        # ➤ Hapus status AFK dari pengirim
-        afk_status = get_afk(db, message.author.id, message.guild.id)
         if afk_status:
-            clear_afk(db, message.author.id, message.guild.id)
             try:
                 if message.author.nick and message.author.nick.startswith("[AFK] "):
                     new_nick = message.author.nick.replace("[AFK] ", "", 1)
@@ -59,7 +63,10 @@ class AFK(commands.Cog):
         for user in message.mentions:
             if user.id in notified:
                 continue
-            reason = get_afk(db, user.id, message.guild.id)
+            try:
+                reason = await run_db(get_afk, user.id, message.guild.id)
+            except (asyncio.TimeoutError, Error):
+                continue
             if reason:
                 afk_mentions.append(f"🔕 {user.display_name} sedang AFK: `{reason}`")
                 notified.add(user.id)
@@ -67,7 +74,5 @@ class AFK(commands.Cog):
         if afk_mentions:
             await message.channel.send("\n".join(afk_mentions))
 
-        db.close()
-
 async def setup(bot):
     await bot.add_cog(AFK(bot))
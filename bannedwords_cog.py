@@ -1,6 +1,12 @@
 import discord
 from discord.ext import commands
-from database import connect_db, add_banned_word, get_all_banned_words, remove_banned_word, get_feature_status, set_feature_status
+from database import (
+    connect_db, add_banned_word, get_all_banned_words, get_all_banned_words_grouped,
+    remove_banned_word, run_db
+)
+from mysql.connector import Error
+import asyncio
+import re
 from discord import ui, Interaction
 from streak_cog import BLOCKED_MESSAGES
 
@@ -33,15 +39,71 @@ class PaginationView(ui.View):
             await interaction.response.edit_message(embed=self.embeds[self.current], view=self)
 
 
+class WordMatcher:
+    """
+    Semua kata satu guild digabung jadi satu regex (kata terpanjang dulu),
+    jadi satu kali scan per pesan, bukan `word in content` per kata.
+    """
+
+    def __init__(self, rows):
+        self.entries = {}   # word -> (response, type)
+        for word, response, word_type in rows:
+            word = word.lower()
+            if word:
+                self.entries.setdefault(word, (response, word_type))
+
+        words = sorted(self.entries, key=len, reverse=True)
+        self.pattern = re.compile("|".join(map(re.escape, words))) if words else None
+
+    def find(self, text):
+        """Return (word, response, type) match paling awal (dan terpanjang), atau None."""
+        if self.pattern is None:
+            return None
+        m = self.pattern.search(text)
+        if not m:
+            return None
+        word = m.group(0)
+        return (word, *self.entries[word])
+
+
 class BannedWordsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.matchers = {}        # guild_id -> WordMatcher
+        self.warmed = False       # True → cache lengkap, guild yang tidak ada = kosong
+
+    async def cog_load(self):
+        """Isi cache semua guild sekali di startup supaya on_message tanpa I/O DB."""
+        try:
+            grouped = await run_db(get_all_banned_words_grouped, timeout=None)
+        except Error as e:
+            print(f"[REPLYWORDS] Warmup cache gagal, fallback lazy load: {e!r}")
+            return
+
+        self.matchers = {guild_id: WordMatcher(rows) for guild_id, rows in grouped.items()}
+        self.warmed = True
+
+    async def reload_guild_words(self, guild_id):
+        rows = await run_db(get_all_banned_words, guild_id)
+        self.matchers[guild_id] = WordMatcher(rows)
+
+    async def get_matcher(self, guild_id):
+        matcher = self.matchers.get(guild_id)
+        if matcher is None:
+            if self.warmed:
+                matcher = self.matchers[guild_id] = WordMatcher([])
+            else:
+                await self.reload_guild_words(guild_id)
+                matcher = self.matchers[guild_id]
+        return matcher
+
+    def is_reply_words_on(self, guild_id):
+        return self.bot.guild_settings.get_feature(guild_id, "reply_words")
 
     @commands.command(name="listreplywords", help="Menampilkan daftar kata yang disetel." , extras={"category": "ReplyWords"})
     async def list_banned_words(self, ctx):
-        db = connect_db()
-        banned_words = get_all_banned_words(db, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            banned_words = get_all_banned_words(db, ctx.guild.id)
 
         if not banned_words:
             return await ctx.send("🚫 Belum ada kata yang disetel.")
@@ -84,9 +146,9 @@ class BannedWordsCog(commands.Cog):
         if word_type and word_type not in VALID_TYPES:
             return await ctx.send("❌ Jenis/type tidak valid. Gunakan: `female`, `partnership`, atau `pelanggaran`.")
 
-        db = connect_db()
-        add_banned_word(db, ctx.guild.id, word.lower(), response, word_type)
-        db.close()
+        with connect_db() as db:
+            add_banned_word(db, ctx.guild.id, word.lower(), response, word_type)
+        await self.reload_guild_words(ctx.guild.id)
 
         embed = discord.Embed(
             title="✅ KATA DITAMBAHKAN",
@@ -106,9 +168,9 @@ class BannedWordsCog(commands.Cog):
         if not (ctx.author.guild_permissions.administrator or ctx.author.id == ALLOWED_USER_ID):
             return await ctx.send("❌ Hanya admin atau user tertentu yang boleh menghapus kata.")
 
-        db = connect_db()
-        remove_banned_word(db, ctx.guild.id, word)
-        db.close()
+        with connect_db() as db:
+            remove_banned_word(db, ctx.guild.id, word)
+        await self.reload_guild_words(ctx.guild.id)
 
         await ctx.send(f"✅ Kata '**{word}**' telah dihapus dari database.")
 
@@ -123,13 +185,14 @@ class BannedWordsCog(commands.Cog):
             return
 
         # ⛔ Cek jika fitur reply_words sedang dimatikan
-        db = connect_db()
-        if not get_feature_status(db, message.guild.id, 'reply_words'):
-            db.close()
-            return
+        try:
+            if not self.is_reply_words_on(message.guild.id):
+                return
 
-        banned_words = get_all_banned_words(db, message.guild.id)
-        db.close()
+            matcher = await self.get_matcher(message.guild.id)
+        except (asyncio.TimeoutError, Error) as e:
+            print(f"[REPLYWORDS] Gagal ambil data: {e!r}")
+            return
 
         prefixes = await self.bot.get_prefix(message)
         content = message.content
@@ -150,40 +213,38 @@ class BannedWordsCog(commands.Cog):
             return
 
 
-        content_lower = message.content.lower()
-
-        for word, response, word_type in banned_words:
-            if word in content_lower:
-                # ⬇️ Send embed seperti biasa
-                word_upper = word.upper()
-
-                if word_type == "female":
-                    title = f"🔍 `{word_upper}`"
-                    color = discord.Color.purple()
-                    footer = "Pengguna ini mungkin perlu verifikasi cewek."
-                elif word_type == "partnership":
-                    title = f"🤝 `{word_upper}`"
-                    color = discord.Color.blue()
-                    footer = "Dilarang promosi server tanpa izin staff."
-                elif word_type == "pelanggaran":
-                    title = f"❗ `{word_upper}`"
-                    color = discord.Color.red()
-                    footer = "Pelanggaran terhadap peraturan server."
-                else:
-                    title = f"⚠️ `{word_upper}`"
-                    color = discord.Color(int("C9DFEC", 16))
-                    footer = "We hope you enjoy your time in this server!"
-
-                embed = discord.Embed(
-                    title=title,
-                    description=response,
-                    color=color
-                )
-                embed.set_footer(text=footer)
-
-                await message.channel.send(embed=embed)
-                break
-            
+        match = matcher.find(message.content.lower())
+        if match:
+            word, response, word_type = match
+            # ⬇️ Send embed seperti biasa
+            word_upper = word.upper()
+
+            if word_type == "female":
+                title = f"🔍 `{word_upper}`"
+                color = discord.Color.purple()
+                footer = "Pengguna ini mungkin perlu verifikasi cewek."
+            elif word_type == "partnership":
+                title = f"🤝 `{word_upper}`"
+                color = discord.Color.blue()
+                footer = "Dilarang promosi server tanpa izin staff."
+            elif word_type == "pelanggaran":
+                title = f"❗ `{word_upper}`"
+                color = discord.Color.red()
+                footer = "Pelanggaran terhadap peraturan server."
+            else:
+                title = f"⚠️ `{word_upper}`"
+                color = discord.Color(int("C9DFEC", 16))
+                footer = "We hope you enjoy your time in this server!"
+
+            embed = discord.Embed(
+                title=title,
+                description=response,
+                color=color
+            )
+            embed.set_footer(text=footer)
+
+            await message.channel.send(embed=embed)
+
         BLOCKED_MESSAGES.add(message.id)
 
         await self.bot.process_commands(message)
@@ -195,16 +256,12 @@ class BannedWordsCog(commands.Cog):
         if status not in ["on", "off"]:
             return await ctx.send("❗ Gunakan `on` atau `off`. Contoh: `mtogglereplywords on`")
 
-        db = connect_db()
-        set_feature_status(db, ctx.guild.id, "reply_words", status == "on")
-        db.close()
+        await self.bot.guild_settings.set_feature(ctx.guild.id, "reply_words", status == "on")
 
         await ctx.send(f"✅ Fitur reply_words telah {'diaktifkan' if status == 'on' else 'dinonaktifkan'}.")
 
         
     @commands.command(name="replywordstatus", help="Cek status fitur reply_words.", extras={"category": "ReplyWords"})
     async def reply_words_status(self, ctx):
-        db = connect_db()
-        status = get_feature_status(db, ctx.guild.id, "reply_words")
-        db.close()
+        status = self.is_reply_words_on(ctx.guild.id)
         await ctx.send(f"💬 Fitur reply_words saat ini: {'Aktif ✅' if status else 'Nonaktif ❌'}")
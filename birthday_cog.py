@@ -274,16 +274,16 @@ class Birthday(commands.Cog):
     async def birthday_loop(self):
         print("🔔 Running birthday check at 00:00 WIB...")
 
-        db = connect_db()
-        birthdays = get_today_birthdays(db)
-        db.close()
+        with connect_db() as db:
+            birthdays = get_today_birthdays(db)
 
         for user_id, guild_id, display_name, wish, template_url in birthdays:
             guild = self.bot.get_guild(guild_id)
             if not guild:
                 continue
 
-            ch_id = get_channel_settings(connect_db(), guild_id, "birthday")
+            with connect_db() as db:
+                ch_id = get_channel_settings(db, guild_id, "birthday")
             channel = guild.get_channel(int(ch_id)) if ch_id else guild.system_channel
 
             if not channel:
@@ -388,9 +388,8 @@ class Birthday(commands.Cog):
             return await ctx.send("❗ Format tanggal salah! (dd-mm atau dd-mm-yyyy)")
 
         # ----- save ke DB -----
-        db = connect_db()
-        set_birthday(db, user_id, ctx.guild.id, birthdate, display_name, wish, template_url)
-        db.close()
+        with connect_db() as db:
+            set_birthday(db, user_id, ctx.guild.id, birthdate, display_name, wish, template_url)
 
         msg = f"🎉 Birthday **{display_name}** disimpan!"
         if wish: msg += f"\n💬 _{wish}_"
@@ -403,9 +402,8 @@ class Birthday(commands.Cog):
     # =========================================================
     @commands.command(name="mybirthday", extras={"category": "Birthday"})
     async def my_birthday(self, ctx):
-        db = connect_db()
-        result = get_birthday(db, ctx.author.id, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            result = get_birthday(db, ctx.author.id, ctx.guild.id)
 
         if not result:
             return await ctx.send("❌ Kamu belum menyimpan tanggal ulang tahun.")
@@ -424,16 +422,13 @@ class Birthday(commands.Cog):
     # =========================================================
     @commands.command(name="deletebirthday", extras={"category": "Birthday"})
     async def delete_birthday_cmd(self, ctx, *, name: str = None):
-        db = connect_db()
-
         if not name:
-            delete_birthday(db, ctx.author.id, ctx.guild.id)
-            db.close()
+            with connect_db() as db:
+                delete_birthday(db, ctx.author.id, ctx.guild.id)
             return await ctx.send("🗑️ Ulang tahun kamu dihapus.")
 
         allowed = [ctx.guild.owner_id, 416234104317804544]
         if ctx.author.id not in allowed:
-            db.close()
             return await ctx.send("❌ Kamu tidak punya izin.")
 
         mention = re.match(r"<@!?(\d+)>", name)
@@ -444,15 +439,15 @@ class Birthday(commands.Cog):
             if member:
                 user_id = member.id
             else:
-                rows = get_all_birthdays(db, ctx.guild.id)
+                with connect_db() as db:
+                    rows = get_all_birthdays(db, ctx.guild.id)
                 match = next((r for r in rows if r[2].lower() == name.lower()), None)
                 if not match:
-                    db.close()
                     return await ctx.send("❌ Tidak ditemukan.")
                 user_id = match[0]
 
-        delete_birthday(db, user_id, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            delete_birthday(db, user_id, ctx.guild.id)
         await ctx.send(f"🗑️ Ulang tahun **{name}** dihapus.")
 
     # =========================================================
@@ -460,9 +455,8 @@ class Birthday(commands.Cog):
     # =========================================================
     @commands.command(name="birthdaylist", extras={"category": "Birthday"})
     async def birthdaylist(self, ctx):
-        db = connect_db()
-        rows = get_all_birthdays(db, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            rows = get_all_birthdays(db, ctx.guild.id)
 
         if not rows:
             return await ctx.send("📭 Belum ada data ulang tahun.")
@@ -493,9 +487,8 @@ class Birthday(commands.Cog):
     # =========================================================
     @commands.command(name="nearestbirthday", extras={"category": "Birthday"})
     async def nearest_birthday(self, ctx):
-        db = connect_db()
-        rows = get_all_birthdays(db, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            rows = get_all_birthdays(db, ctx.guild.id)
 
         if not rows:
             return await ctx.send("📭 Tidak ada data.")
@@ -533,9 +526,8 @@ class Birthday(commands.Cog):
             return await ctx.send("❌ Kamu tidak punya izin.")
 
         # ====== FETCH DATA ======
-        db = connect_db()
-        result = get_birthday(db, user.id, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            result = get_birthday(db, user.id, ctx.guild.id)
 
         if not result:
             return await ctx.send("❌ User ini belum menyimpan tanggal ulang tahun.")
@@ -588,9 +580,8 @@ class Birthday(commands.Cog):
     # =========================================================
     @commands.command(name="testbirthday", extras={"category": "Birthday"})
     async def test_birthday(self, ctx):
-        db = connect_db()
-        rows = get_all_birthdays(db, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            rows = get_all_birthdays(db, ctx.guild.id)
 
         if not rows:
             return await ctx.send("📭 Tidak ada data ulang tahun untuk dites.")
@@ -620,9 +611,8 @@ class Birthday(commands.Cog):
             display_name = member.display_name
 
         # ambil channel ulang tahun
-        db = connect_db()
-        ch_id = get_channel_settings(db, guild.id, "birthday")
-        db.close()
+        with connect_db() as db:
+            ch_id = get_channel_settings(db, guild.id, "birthday")
 
         channel = guild.get_channel(int(ch_id)) if ch_id else ctx.channel
 
@@ -675,9 +665,8 @@ class Birthday(commands.Cog):
         if ctx.author.id not in [ctx.guild.owner_id, 416234104317804544]:
             return await ctx.send("❌ Kamu tidak punya izin.")
 
-        db = connect_db()
-        set_channel_settings(db, ctx.guild.id, "birthday", channel.id)
-        db.close()
+        with connect_db() as db:
+            set_channel_settings(db, ctx.guild.id, "birthday", channel.id)
 
         await ctx.send(f"✅ Channel ulang tahun diset ke {channel.mention}")
 
@@ -5,9 +5,8 @@ import random
 import time
 
 from database import (
-    get_user_cash, set_user_cash,
-    log_gamble,
-    get_gamble_setting
+    get_user_cash, credit_user_cash, debit_user_cash,
+    log_gamble
 )
 
 from gamble_utils import gamble_only, comma
@@ -144,7 +143,7 @@ class BlackjackCog(commands.Cog):
 
         # parse bet (GLOBAL CASH)
         avail = self.get_available(user_id)
-        maxbet = get_gamble_setting(self.db, guild_id, "maxbet")
+        maxbet = self.bot.guild_settings.get_gamble(guild_id, "maxbet")
         maxbet = int(maxbet) if maxbet else None
 
         if bet.lower() == "all":
@@ -163,9 +162,6 @@ class BlackjackCog(commands.Cog):
         # HOLD BET
         self.hold_amount(user_id, bet)
 
-        # 🔥 refresh biar pake saldo terbaru (anti desync)
-        cash = get_user_cash(self.db, user_id)
-
         # init game
         deck = self.new_deck()
         player = [self.draw(deck), self.draw(deck)]
@@ -272,9 +268,7 @@ class BlackjackCog(commands.Cog):
 
                 if self.hand_value(player) > 21:
                     self.release_amount(user_id, bet)
-                    current = get_user_cash(self.db, user_id)
-                    new_cash = current - bet
-                    set_user_cash(self.db, user_id, new_cash)
+                    debit_user_cash(self.db, user_id, bet, partial=True)
                     log_gamble(self.db, ctx.guild.id, user_id, "blackjack", bet, "LOSE")
                     del self.active_games[key]
 
@@ -293,10 +287,7 @@ class BlackjackCog(commands.Cog):
                 loss = bet // 2
                 self.release_amount(user_id, bet)
                 
-                current = get_user_cash(self.db, user_id)
-                new_cash = current - loss
-
-                set_user_cash(self.db, user_id, new_cash)
+                debit_user_cash(self.db, user_id, loss, partial=True)
                 log_gamble(self.db, ctx.guild.id, user_id, "blackjack", loss, "LOSE")
                 del self.active_games[key]
 
@@ -345,10 +336,7 @@ class BlackjackCog(commands.Cog):
                 win = int(bet * 1)  # atau 1x bet biar lebih parah
 
             self.release_amount(user_id, bet)
-            current = get_user_cash(self.db, user_id)
-            new_cash = current + win
-
-            set_user_cash(self.db, user_id, new_cash)
+            credit_user_cash(self.db, user_id, win)
             log_gamble(self.db, ctx.guild.id, user_id, "blackjack", bet, "WIN")
 
             result = f"🟢 Menang **+{comma(win)}**"
@@ -356,10 +344,7 @@ class BlackjackCog(commands.Cog):
 
         elif d_val > p_val:
             self.release_amount(user_id, bet)
-            current = get_user_cash(self.db, user_id)
-            new_cash = current - bet
-
-            set_user_cash(self.db, user_id, new_cash)
+            debit_user_cash(self.db, user_id, bet, partial=True)
             log_gamble(self.db, ctx.guild.id, user_id, "blackjack", bet, "LOSE")
 
 
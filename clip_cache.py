@@ -0,0 +1,138 @@
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+
+CLIP_CACHE_DIR = "clip_cache"
+CLIP_CACHE_MAX_MB = int(os.getenv("CLIP_CACHE_MAX_MB", 500))
+CLIP_URL_INDEX_SIZE = 2000
+
+
+# ============================================================
+#  CLIP CACHE (disk, LRU by ukuran)
+# ============================================================
+class ClipCache:
+    """
+    File video siap upload, dikunci dengan id media dari yt-dlp
+    (extractor:id) + varian ("orig" atau batas upload hasil kompres).
+    Total ukuran dibatasi; yang paling lama tidak dipakai dibuang duluan.
+    """
+
+    def __init__(self, folder=CLIP_CACHE_DIR, max_bytes=CLIP_CACHE_MAX_MB * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+
+        self.entries = OrderedDict()   # key → (path, size), depan = paling lama dipakai
+        self.total = 0
+        self.urls = OrderedDict()      # url (tanpa query) → media id
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    def _load(self):
+        # mtime di-update tiap hit → urutan LRU tetap terjaga setelah restart
+        paths = [os.path.join(self.folder, f) for f in os.listdir(self.folder)]
+        paths = [p for p in paths if os.path.isfile(p)]
+        for path in sorted(paths, key=os.path.getmtime):
+            key = os.path.splitext(os.path.basename(path))[0]
+            size = os.path.getsize(path)
+            self.entries[key] = (path, size)
+            self.total += size
+        self._evict()
+
+    @staticmethod
+    def key(media_id, variant):
+        return hashlib.sha1(f"{media_id}|{variant}".encode()).hexdigest()
+
+    # ============================================================
+    #  URL → MEDIA ID
+    # ============================================================
+    def lookup_url(self, url):
+        media_id = self.urls.get(url)
+        if media_id:
+            self.urls.move_to_end(url)
+        return media_id
+
+    def remember_url(self, url, media_id):
+        self.urls[url] = media_id
+        self.urls.move_to_end(url)
+        while len(self.urls) > CLIP_URL_INDEX_SIZE:
+            self.urls.popitem(last=False)
+
+    # ============================================================
+    #  GET / PUT
+    # ============================================================
+    def get(self, media_id, limit_bytes, count=True):
+        """
+        Path file media ini yang muat di `limit_bytes`, None kalau tidak ada.
+        `count=False` → tidak ikut hitungan hit/miss (lookup kedua untuk pesan yang sama).
+        """
+        for variant in ("orig", str(limit_bytes)):
+            key = self.key(media_id, variant)
+            item = self.entries.get(key)
+            if item is None or item[1] > limit_bytes:
+                continue
+
+            path = item[0]
+            if not os.path.exists(path):
+                self._drop(key)
+                continue
+
+            self.entries.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            if count:
+                self.hits += 1
+            return path
+
+        if count:
+            self.misses += 1
+        return None
+
+    def put(self, media_id, variant, src_path):
+        """Pindahkan `src_path` ke cache; return path baru (dipakai untuk upload)."""
+        key = self.key(media_id, variant)
+        self._drop(key)
+
+        dest = os.path.join(self.folder, key + os.path.splitext(src_path)[1])
+        shutil.move(src_path, dest)
+
+        size = os.path.getsize(dest)
+        self.entries[key] = (dest, size)
+        self.total += size
+        self._evict(keep=key)
+        return dest
+
+    def _drop(self, key):
+        item = self.entries.pop(key, None)
+        if item is None:
+            return
+        self.total -= item[1]
+        try:
+            os.remove(item[0])
+        except OSError:
+            pass
+
+    def _evict(self, keep=None):
+        while self.total > self.max_bytes and self.entries:
+            key = next(iter(self.entries))
+            if key == keep:
+                break
+            self._drop(key)
+            self.evictions += 1
+
+    def snapshot(self):
+        return {
+            "files": len(self.entries),
+            "size_mb": self.total / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,6 +1,6 @@
 import discord
 from discord.ext import commands
-from database import CommandManager, set_feature_status, get_feature_status, connect_db
+from database import set_feature_status, get_feature_status, connect_db
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -9,7 +9,8 @@ logger = logging.getLogger(__name__)
 class CommandStatusCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.cmd_manager = CommandManager()
+        # pakai instance milik bot supaya cache disabled command cuma satu
+        self.cmd_manager = bot.command_manager
 
     async def cog_load(self):
         """Dipanggil otomatis ketika cog sudah siap"""
@@ -64,25 +65,31 @@ class CommandStatusCog(commands.Cog):
     @commands.command(name="toggle_welcome", extras={"category": "Admin"})
     @commands.has_permissions(administrator=True)
     async def toggle_welcome(self, ctx):
-        db = connect_db()
-        current_status = get_feature_status(db, ctx.guild.id, "welcome_message")
-        new_status = not current_status
-        set_feature_status(db, ctx.guild.id, "welcome_message", new_status)
-        db.close()
+        with connect_db() as db:
+            current_status = get_feature_status(db, ctx.guild.id, "welcome_message")
+            new_status = not current_status
+            set_feature_status(db, ctx.guild.id, "welcome_message", new_status)
 
         await ctx.send(f"✅ Fitur welcome message telah {'diaktifkan' if new_status else 'dinonaktifkan'}.")
 
     @commands.command(name="toggle_reply_words", extras={"category": "Admin"})
     @commands.has_permissions(administrator=True)
     async def toggle_reply_words(self, ctx):
-        db = connect_db()
-        current_status = get_feature_status(db, ctx.guild.id, "reply_words")
-        new_status = not current_status
-        set_feature_status(db, ctx.guild.id, "reply_words", new_status)
-        db.close()
+        settings = self.bot.guild_settings
+        new_status = not settings.get_feature(ctx.guild.id, "reply_words")
+        await settings.set_feature(ctx.guild.id, "reply_words", new_status)
 
         await ctx.send(f"✅ Fitur reply words telah {'diaktifkan' if new_status else 'dinonaktifkan'}.")
 
+    @commands.command(name="toggle_link_download", extras={"category": "Admin"})
+    @commands.has_permissions(administrator=True)
+    async def toggle_link_download(self, ctx):
+        settings = self.bot.guild_settings
+        new_status = not settings.get_feature(ctx.guild.id, "link_download")
+        await settings.set_feature(ctx.guild.id, "link_download", new_status)
+
+        await ctx.send(f"✅ Fitur auto download link telah {'diaktifkan' if new_status else 'dinonaktifkan'}.")
+
     @commands.command(name="cmdstatus", extras={"category": "Admin"})
     async def command_status(self, ctx, command_name: str = None):
         if command_name:
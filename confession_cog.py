@@ -22,9 +22,8 @@ IMAGE_SUBMIT_COOLDOWN = {}
 # ======================================================
 
 async def restore_reply_buttons(bot: commands.Bot):
-    db = connect_db()
-    rows = get_all_confession_messages(db)
-    db.close()
+    with connect_db() as db:
+        rows = get_all_confession_messages(db)
 
     for row in rows:
         msg_id = row["id"]
@@ -175,9 +174,8 @@ class SubmitImageConfessionButton(discord.ui.Button):
                     f.write(await resp.read())
 
         # GET TARGET CHANNEL
-        db = connect_db()
-        channel_id = get_channel_settings(db, interaction.guild_id, "confession")
-        db.close()
+        with connect_db() as db:
+            channel_id = get_channel_settings(db, interaction.guild_id, "confession")
 
         target_ch = interaction.guild.get_channel(int(channel_id))
 
@@ -202,18 +200,17 @@ class SubmitImageConfessionButton(discord.ui.Button):
             pass
 
         # SAVE DB
-        db2 = connect_db()
-        save_confession_db(
-            db2,
-            sent.id,
-            interaction.guild_id,
-            target_ch.id,
-            None,
-            None,
-            confession_id,
-            True
-        )
-        db2.close()
+        with connect_db() as db2:
+            save_confession_db(
+                db2,
+                sent.id,
+                interaction.guild_id,
+                target_ch.id,
+                None,
+                None,
+                confession_id,
+                True
+            )
 
         # BUTTONS
         view = ConfessionView(self.bot)
@@ -286,9 +283,8 @@ class ConfessionModal(discord.ui.Modal, title=f"Anonymous Confession"):
         if is_reply:
             parent_id = self.parent_message_id
 
-            db = connect_db()
-            parent_data = get_confession_by_message(db, parent_id)
-            db.close()
+            with connect_db() as db:
+                parent_data = get_confession_by_message(db, parent_id)
 
         # ===================================================
         # Base embed
@@ -356,18 +352,17 @@ class ConfessionModal(discord.ui.Modal, title=f"Anonymous Confession"):
                     name=f"Confession #{parent_confess_id}"
                 )
                 # update thread_id di DB
-                db2 = connect_db()
-                save_confession_db(
-                    db2,
-                    parent_id,                 # update parent record
-                    interaction.guild_id,
-                    parent_data["channel_id"],
-                    thread.id,                 # thread baru
-                    None,
-                    parent_data["confession_id"],
-                    True                       # tetap parent
-                )
-                db2.close()
+                with connect_db() as db2:
+                    save_confession_db(
+                        db2,
+                        parent_id,                 # update parent record
+                        interaction.guild_id,
+                        parent_data["channel_id"],
+                        thread.id,                 # thread baru
+                        None,
+                        parent_data["confession_id"],
+                        True                       # tetap parent
+                    )
 
                 # Reply pertama → TIDAK PAKAI reference
                 sent = await thread.send(
@@ -376,18 +371,17 @@ class ConfessionModal(discord.ui.Modal, title=f"Anonymous Confession"):
                 )
 
 
-            db2 = connect_db()
-            save_confession_db(
-                db2,
-                sent.id,
-                interaction.guild_id,
-                parent_data["channel_id"],
-                thread.id,
-                parent_id,
-                confession_id,
-                False   # reply, bukan parent
-            )
-            db2.close()
+            with connect_db() as db2:
+                save_confession_db(
+                    db2,
+                    sent.id,
+                    interaction.guild_id,
+                    parent_data["channel_id"],
+                    thread.id,
+                    parent_id,
+                    confession_id,
+                    False   # reply, bukan parent
+                )
 
             view = ThreadReplyView()
             view.add_item(ReplyToConfessionButton(self.bot, sent.id))
@@ -411,27 +405,25 @@ class ConfessionModal(discord.ui.Modal, title=f"Anonymous Confession"):
         # ===================================================
         # =============== NEW CONFESSION ====================
         # ===================================================
-        db = connect_db()
-        channel_id = get_channel_settings(db, interaction.guild_id, "confession")
-        db.close()
+        with connect_db() as db:
+            channel_id = get_channel_settings(db, interaction.guild_id, "confession")
 
         target_channel = interaction.guild.get_channel(int(channel_id)) if channel_id else interaction.channel
 
         sent = await target_channel.send(embed=embed)
 
       
-        db2 = connect_db()
-        save_confession_db(
-            db2,
-            sent.id,
-            interaction.guild_id,
-            target_channel.id,  # channel utama
-            None,               # no thread
-            None,               # no parent
-            confession_id,
-            True                # is_parent
-        )
-        db2.close()
+        with connect_db() as db2:
+            save_confession_db(
+                db2,
+                sent.id,
+                interaction.guild_id,
+                target_channel.id,  # channel utama
+                None,               # no thread
+                None,               # no parent
+                confession_id,
+                True                # is_parent
+            )
 
 
 
@@ -478,9 +470,8 @@ class ConfessionCog(commands.Cog):
            and ctx.author.id != 416234104317804544:
             return await ctx.send("❌ Hanya owner server yang bisa mengatur ini.")
 
-        db = connect_db()
-        set_channel_settings(db, ctx.guild.id, "confession", channel.id)
-        db.close()
+        with connect_db() as db:
+            set_channel_settings(db, ctx.guild.id, "confession", channel.id)
 
         await ctx.send(f"✅ Channel confession di-set ke {channel.mention}")
 
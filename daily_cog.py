@@ -4,10 +4,9 @@ from datetime import datetime, timedelta
 import pytz
 
 from database import (
-    get_user_cash, set_user_cash,
+    credit_user_cash,
     get_daily_data, set_daily_data,
-    log_gamble,
-    get_gamble_setting
+    log_gamble
 )
 
 from gamble_utils import comma
@@ -48,7 +47,7 @@ class DailyCog(commands.Cog):
         # =======================================================
         # CEK GAMBLE CHANNEL (per guild)
         # =======================================================
-        ch = get_gamble_setting(self.db, guild_id, "gamble_ch")
+        ch = self.bot.guild_settings.get_gamble(guild_id, "gamble_ch")
         if not ch:
             return await ctx.send(
                 "❌ Channel gamble belum diset.\n"
@@ -100,9 +99,7 @@ class DailyCog(commands.Cog):
         bonus = streak * 500
         reward = base + bonus
 
-        cash_now = get_user_cash(self.db, user_id)
-        new_cash = cash_now + reward
-        set_user_cash(self.db, user_id, new_cash)
+        new_cash = credit_user_cash(self.db, user_id, reward)
 
         # =======================================================
         # SIMPAN DAILY GLOBAL
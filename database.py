@@ -1,8 +1,15 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 import os
 import pytz
 import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, timedelta, date
 import json
 from dotenv import load_dotenv
@@ -22,6 +29,9 @@ def retry_database(retries=5, delay=3):
             for attempt in range(1, retries + 1):
                 try:
                     return func(*args, **kwargs)
+                except PoolError:
+                    # pool penuh bukan error koneksi → retry + sleep cuma bikin antrian makin panjang
+                    raise
                 except Error as e:
                     last_exception = e
                     logger.warning(f"[Attempt {attempt}] Database error: {e}. Retrying in {delay}s...")
@@ -47,9 +57,7 @@ def ensure_database_exists():
         logger.error(f"Failed to create database: {e}")
         raise
 
-@retry_database(retries=3, delay=3)
-def connect_db():
-    """Create and return a new database connection"""
+def _open_raw_connection():
     return mysql.connector.connect(
         host=os.getenv("MYSQL_HOST"),
         user=os.getenv("MYSQL_USER"),
@@ -57,6 +65,324 @@ def connect_db():
         database=os.getenv("MYSQL_DB")
     )
 
+# ============================================================
+#  CONNECTION POOL
+# ============================================================
+DB_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("MYSQL_MAX_OVERFLOW", "5"))
+DB_HEALTH_CHECK_INTERVAL = 30     # detik idle sebelum koneksi di-ping ulang
+DB_SLOW_QUERY_MS = 500
+
+
+class PoolStats:
+    """Metrik pool: waktu tunggu acquire & latency query (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquires = 0
+        self.overflow = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.queries = 0
+        self.query_total = 0.0
+        self.query_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.acquires += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_query(self, seconds):
+        with self._lock:
+            self.queries += 1
+            self.query_total += seconds
+            self.query_max = max(self.query_max, seconds)
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "acquires": self.acquires,
+                "overflow": self.overflow,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "wait_avg_ms": self.wait_total / self.acquires * 1000 if self.acquires else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+                "queries": self.queries,
+                "query_avg_ms": self.query_total / self.queries * 1000 if self.queries else 0.0,
+                "query_max_ms": self.query_max * 1000,
+            }
+
+
+class TimedCursor:
+    """Cursor wrapper yang mencatat latency setiap execute."""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def _timed(self, fn, operation, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(operation, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stats.record_query(elapsed)
+            if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+                logger.warning(f"[DB] Slow query ({elapsed * 1000:.0f} ms): {' '.join(str(operation).split())[:120]}")
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class PooledConnection:
+    """
+    Handle koneksi dari pool. API sama dengan koneksi mysql.connector,
+    tapi close() mengembalikan koneksi ke pool (bukan menutup socket).
+    Wajib di-close: pakai `with connect_db() as db:` / `with pool.connection()`.
+    """
+
+    def __init__(self, pool, raw, overflow=False):
+        self._pool = pool
+        self._raw = raw
+        self._overflow = overflow
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._get_raw().cursor(*args, **kwargs), self._pool.stats)
+
+    def is_connected(self):
+        return self._raw is not None and self._raw.is_connected()
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool._release(raw, self._overflow)
+
+    def _get_raw(self):
+        if self._raw is None:
+            raise PoolError("Connection sudah dikembalikan ke pool")
+        return self._raw
+
+    def __getattr__(self, name):
+        return getattr(self._get_raw(), name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool koneksi MySQL yang dibatasi (bounded).
+
+    - Koneksi idle dipakai ulang (LIFO) → tidak ada handshake TCP+auth per query.
+    - Koneksi yang idle > DB_HEALTH_CHECK_INTERVAL di-ping dulu sebelum dipakai.
+    - Thread worker menunggu slot kosong sampai `timeout`; event loop tidak
+      pernah menunggu (bisa deadlock), jadi kalau penuh dapat koneksi overflow.
+      Overflow juga dibatasi (`max_overflow`); kalau habis → PoolError.
+    - Total koneksi dari pool tidak pernah lewat `size + max_overflow`.
+    """
+
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, max_overflow=DB_MAX_OVERFLOW):
+        self.size = size
+        self.timeout = timeout
+        self.max_overflow = max_overflow
+        self.stats = PoolStats()
+        self._idle = deque()   # (raw_conn, last_used)
+        self._slots = threading.BoundedSemaphore(size)
+        self._overflow_slots = threading.BoundedSemaphore(max_overflow) if max_overflow > 0 else None
+        self._lock = threading.Lock()
+
+    def get(self, timeout=None):
+        start = time.perf_counter()
+        blocking = not _on_event_loop()
+        wait = self.timeout if timeout is None else timeout
+
+        if not self._slots.acquire(blocking, wait if blocking else None):
+            if blocking:
+                self.stats.incr("timeouts")
+                raise PoolError(f"Tidak ada koneksi DB kosong setelah {wait}s (pool={self.size})")
+            return self._get_overflow(start)
+
+        try:
+            raw = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self.stats.record_wait(time.perf_counter() - start)
+        return PooledConnection(self, raw)
+
+    def _get_overflow(self, start):
+        if self._overflow_slots is None or not self._overflow_slots.acquire(False):
+            self.stats.incr("timeouts")
+            raise PoolError(f"Pool DB penuh (pool={self.size}, overflow={self.max_overflow})")
+        try:
+            raw = self._create()
+        except Exception:
+            self._overflow_slots.release()
+            raise
+        self.stats.incr("overflow")
+        self.stats.record_wait(time.perf_counter() - start)
+        return PooledConnection(self, raw, overflow=True)
+
+    def _create(self):
+        raw = _open_raw_connection()
+        self.stats.incr("created")
+        return raw
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                item = self._idle.pop() if self._idle else None
+            if item is None:
+                return self._create()
+
+            raw, last_used = item
+            if time.monotonic() - last_used < DB_HEALTH_CHECK_INTERVAL:
+                return raw
+            try:
+                raw.ping(reconnect=True, attempts=1, delay=0)
+                return raw
+            except Error:
+                self._discard(raw)
+
+    def _discard(self, raw):
+        self.stats.incr("discarded")
+        try:
+            raw.close()
+        except Error:
+            pass
+
+    def _release(self, raw, overflow=False):
+        try:
+            if overflow or not raw.is_connected():
+                self._discard(raw)
+                return
+            # akhiri transaksi implisit supaya pemakai berikutnya tidak
+            # membaca snapshot lama (REPEATABLE READ)
+            if raw.in_transaction:
+                raw.rollback()
+            with self._lock:
+                self._idle.append((raw, time.monotonic()))
+        except Error:
+            self._discard(raw)
+        finally:
+            if overflow:
+                self._overflow_slots.release()
+            else:
+                self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """`with pool.connection() as conn:` — otomatis dikembalikan."""
+        conn = self.get(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for raw, _ in idle:
+            self._discard(raw)
+
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+def get_pool_stats():
+    return get_pool().stats.snapshot()
+
+@retry_database(retries=3, delay=3)
+def connect_db():
+    """Ambil koneksi dari pool. Panggil close() untuk mengembalikannya."""
+    return get_pool().get()
+
+@retry_database(retries=3, delay=3)
+def connect_db_dedicated():
+    """
+    Koneksi mysql.connector biasa di luar pool, untuk pemakai yang pegang
+    koneksi seumur proses (bot.db) supaya tidak memakan slot pool selamanya.
+    """
+    return _open_raw_connection()
+
+# ============================================================
+#  DB EXECUTOR (jalankan query di luar event loop)
+# ============================================================
+DB_CALL_TIMEOUT = float(os.getenv("MYSQL_CALL_TIMEOUT", "5"))
+
+# worker = ukuran pool supaya antrian menumpuk di executor, bukan di semaphore pool.
+# Slot tetap bisa rebutan (event loop / helper yang buka koneksi bersarang), jadi
+# get() di thread worker tetap pakai DB_POOL_TIMEOUT.
+_db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+
+def _call_with_connection(func, args, kwargs):
+    with get_pool().connection() as conn:
+        return func(conn, *args, **kwargs)
+
+async def _submit(call, timeout):
+    loop = asyncio.get_running_loop()
+    # kalau timeout, job yang belum mulai ikut dibatalkan dari antrian executor
+    return await asyncio.wait_for(loop.run_in_executor(_db_executor, call), timeout)
+
+async def run_db(func, *args, timeout=DB_CALL_TIMEOUT, **kwargs):
+    """
+    Jalankan helper bergaya `func(db, ...)` di executor DB dengan koneksi
+    pool sendiri. Raise asyncio.TimeoutError kalau lewat `timeout` detik.
+
+        xp = await run_db(get_user_xp, user_id, guild_id)
+    """
+    return await _submit(functools.partial(_call_with_connection, func, args, kwargs), timeout)
+
+async def run_db_func(func, *args, timeout=DB_CALL_TIMEOUT, **kwargs):
+    """
+    Sama seperti run_db, untuk helper yang buka koneksi sendiri
+    (get_streak_settings, get_streak_pair, ...).
+    """
+    return await _submit(functools.partial(func, *args, **kwargs), timeout)
+
+def shutdown_db_executor():
+    _db_executor.shutdown(wait=True)
+
 class ChannelBlockManager:
     def __init__(self, db):
         self.db = db
@@ -101,7 +427,25 @@ class ChannelBlockManager:
 
 class CommandManager:
     """Handles command disabling/enabling functionality"""
-    
+
+    def __init__(self):
+        self.cache = {}  # {guild_id: set(command_names)}
+
+    @retry_database()
+    def load_all(self):
+        """Load semua disabled command ke cache (sekali saat startup)"""
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT guild_id, command_name FROM disabled_commands")
+            cache = {}
+            for guild_id, command_name in cursor.fetchall():
+                cache.setdefault(guild_id, set()).add(command_name)
+            cursor.close()
+            self.cache = cache
+        finally:
+            close_connection(conn)
+
     @retry_database()
     def disable_command(self, guild_id: int, command_name: str, disabled_by: int = None) -> bool:
         """Disable a command for a specific guild"""
@@ -116,6 +460,7 @@ class CommandManager:
             """
             cursor.execute(query, (guild_id, command_name, disabled_by))
             conn.commit()
+            self.cache.setdefault(guild_id, set()).add(command_name)
             return True
         except Error as e:
             logger.error(f"Failed to disable command '{command_name}' for guild {guild_id}: {e}")
@@ -135,6 +480,8 @@ class CommandManager:
                 (guild_id, command_name)
             )
             conn.commit()
+            if guild_id in self.cache:
+                self.cache[guild_id].discard(command_name)
             return cursor.rowcount > 0
         except Error as e:
             logger.error(f"Failed to enable command '{command_name}' for guild {guild_id}: {e}")
@@ -142,23 +489,9 @@ class CommandManager:
         finally:
             close_connection(conn)
 
-    @retry_database()
     def is_command_disabled(self, guild_id: int, command_name: str) -> bool:
-        """Check if a command is disabled for a guild"""
-        try:
-            conn = connect_db()
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT 1 FROM disabled_commands WHERE guild_id = %s AND command_name = %s",
-                (guild_id, command_name)
-            )
-            return cursor.fetchone() is not None
-        except Error as e:
-            logger.error(f"Failed to check if command '{command_name}' is disabled for guild {guild_id}: {e}")
-            return False
-        finally:
-            close_connection(conn)
+        """Check if a command is disabled for a guild (dari cache, tanpa query)"""
+        return command_name in self.cache.get(guild_id, ())
 
     @retry_database()
     def get_disabled_commands(self, guild_id: int) -> list:
@@ -191,9 +524,19 @@ def get_feature_status(db, guild_id, feature_name):
     result = cursor.fetchone()
     return result[0] if result else True  # Default ke True jika tidak ada entri
 
+def get_all_feature_status(db):
+    """Semua feature_status → {(guild_id, feature_name): bool} (warmup GuildSettingsCache)."""
+    cursor = db.cursor()
+    cursor.execute("SELECT guild_id, feature_name, status FROM feature_status")
+    result = {(guild_id, name): bool(status) for guild_id, name, status in cursor.fetchall()}
+    cursor.close()
+    return result
+
 def close_connection(conn):
-    """Properly close database connection"""
-    if conn and conn.is_connected():
+    """Properly close database connection (pooled → dikembalikan ke pool)"""
+    if isinstance(conn, PooledConnection):
+        conn.close()
+    elif conn and conn.is_connected():
         conn.close()
 # Initialize database when module loads
 ensure_database_exists()
@@ -227,6 +570,23 @@ def set_user_xp(db, user_id, guild_id, xp):
     cursor.close()
 
 
+def add_user_xp_batch(db, rows):
+    """
+    Tambah XP banyak user sekaligus (write-behind dari LevelCog).
+    rows: list of (user_id, guild_id, gained) → satu INSERT multi-row.
+    """
+    if db is None or not rows:
+        return
+    cursor = db.cursor()
+    cursor.executemany(
+        "INSERT INTO user_levels (user_id, guild_id, xp) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE xp = xp + VALUES(xp)",
+        rows
+    )
+    db.commit()
+    cursor.close()
+
+
 def insert_level_role(db, guild_id, level, role_id):
     if db is None:
         return
@@ -460,6 +820,16 @@ def get_all_banned_words(db, guild_id):
     cursor.close()
     return results  # list of tuples: (word, response, type)
 
+def get_all_banned_words_grouped(db):
+    """Semua banned words semua guild → {guild_id: [(word, response, type), ...]}."""
+    cursor = db.cursor()
+    cursor.execute("SELECT guild_id, word, response, type FROM banned_words")
+    grouped = {}
+    for guild_id, word, response, word_type in cursor.fetchall():
+        grouped.setdefault(guild_id, []).append((word, response, word_type))
+    cursor.close()
+    return grouped
+
 def remove_banned_word(db, guild_id, word):
     cursor = db.cursor()
     cursor.execute("DELETE FROM banned_words WHERE guild_id = %s AND word = %s", (guild_id, word.lower()))
@@ -903,47 +1273,44 @@ def log_event_discord(db, guild_id, user_id, event_type, event_data):
     cursor.close()
 
 def delete_old_logs(older_than_days=5):
-    db = connect_db()
-    cursor = db.cursor()
-    threshold = datetime.now() - timedelta(days=older_than_days)
-    query = "DELETE FROM discord_logs WHERE created_at < %s"
-    cursor.execute(query, (threshold,))
-    db.commit()
-    cursor.close()
-    db.close()
+    with connect_db() as db:
+        cursor = db.cursor()
+        threshold = datetime.now() - timedelta(days=older_than_days)
+        query = "DELETE FROM discord_logs WHERE created_at < %s"
+        cursor.execute(query, (threshold,))
+        db.commit()
+        cursor.close()
 
 def delete_old_voice_logs(older_than_days=1):
-    db = connect_db()
-    cursor = db.cursor()
+    with connect_db() as db:
+        cursor = db.cursor()
 
-    query = """
+        query = """
         DELETE FROM discord_logs
         WHERE event_type = 'voice_update' AND created_at < %s
     """
-    from datetime import datetime, timedelta
-    threshold = datetime.now() - timedelta(days=older_than_days)
-    cursor.execute(query, (threshold,))
+        from datetime import datetime, timedelta
+        threshold = datetime.now() - timedelta(days=older_than_days)
+        cursor.execute(query, (threshold,))
 
-    db.commit()
-    cursor.close()
-    db.close()
+        db.commit()
+        cursor.close()
 
 
 def get_logs_by_type(guild_id, event_type, limit=10, offset=0):
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
-    query = """
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
+        query = """
         SELECT * FROM discord_logs
         WHERE guild_id = %s AND event_type = %s
         ORDER BY created_at DESC
         LIMIT %s OFFSET %s
     """
-    cursor.execute(query, (guild_id, event_type, limit, offset))
-    results_raw = cursor.fetchall()
-    for row in results_raw:
-        row['event_data'] = json.loads(row['event_data'])  # JSON to dict
-    cursor.close()
-    db.close()
+        cursor.execute(query, (guild_id, event_type, limit, offset))
+        results_raw = cursor.fetchall()
+        for row in results_raw:
+            row['event_data'] = json.loads(row['event_data'])  # JSON to dict
+        cursor.close()
     return results_raw
 
 def _normalize_pair_users(user1_id, user2_id):
@@ -957,19 +1324,18 @@ def get_streak_pair(guild_id, user1_id, user2_id):
     """
     Ambil data pasangan streak (kalau ada).
     """
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    u1, u2 = _normalize_pair_users(user1_id, user2_id)
-    cursor.execute("""
-        SELECT *
-        FROM streak_pairs
-        WHERE guild_id = %s AND user1_id = %s AND user2_id = %s
-    """, (guild_id, u1, u2))
+        u1, u2 = _normalize_pair_users(user1_id, user2_id)
+        cursor.execute("""
+            SELECT *
+            FROM streak_pairs
+            WHERE guild_id = %s AND user1_id = %s AND user2_id = %s
+        """, (guild_id, u1, u2))
 
-    row = cursor.fetchone()
-    cursor.close()
-    db.close()
+        row = cursor.fetchone()
+        cursor.close()
     return row
 
 def create_streak_pair(guild_id, user1_id, user2_id, initiator_id):
@@ -984,70 +1350,67 @@ def create_streak_pair(guild_id, user1_id, user2_id, initiator_id):
     if existing:
         # 🔥 Jika sudah BROKEN → reset total dan jadikan PENDING ulang
         if existing["status"] == "BROKEN":
-            db = connect_db()
-            cursor = db.cursor(dictionary=True)
+            with connect_db() as db:
+                cursor = db.cursor(dictionary=True)
 
-            cursor.execute("""
-                UPDATE streak_pairs
-                SET 
-                    status = 'PENDING',
-                    initiator_id = %s,
-                    current_streak = 0,
-                    max_streak = 0,
-                    needs_restore = 0,
-                    restore_deadline = NULL,
-                    restore_used_this_cycle = 0,
-                    restore_month = NULL,
-                    restore_year = NULL,
-                    last_update_date = NULL
-                WHERE id = %s
-            """, (initiator_id, existing["id"]))
+                cursor.execute("""
+                    UPDATE streak_pairs
+                    SET 
+                        status = 'PENDING',
+                        initiator_id = %s,
+                        current_streak = 0,
+                        max_streak = 0,
+                        needs_restore = 0,
+                        restore_deadline = NULL,
+                        restore_used_this_cycle = 0,
+                        restore_month = NULL,
+                        restore_year = NULL,
+                        last_update_date = NULL
+                    WHERE id = %s
+                """, (initiator_id, existing["id"]))
 
-            db.commit()
+                db.commit()
 
-            cursor.execute("SELECT * FROM streak_pairs WHERE id = %s", (existing["id"],))
-            row = cursor.fetchone()
+                cursor.execute("SELECT * FROM streak_pairs WHERE id = %s", (existing["id"],))
+                row = cursor.fetchone()
 
-            cursor.close()
-            db.close()
+                cursor.close()
             return row
 
         # Kalau bukan BROKEN, cukup return existing
         return existing
 
     # 🔥 Kalau belum ada → buat baru
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    u1, u2 = _normalize_pair_users(user1_id, user2_id)
-    cursor.execute("""
-        INSERT INTO streak_pairs (guild_id, user1_id, user2_id, initiator_id, status)
-        VALUES (%s, %s, %s, %s, 'PENDING')
-    """, (guild_id, u1, u2, initiator_id))
-    db.commit()
+        u1, u2 = _normalize_pair_users(user1_id, user2_id)
+        cursor.execute("""
+            INSERT INTO streak_pairs (guild_id, user1_id, user2_id, initiator_id, status)
+            VALUES (%s, %s, %s, %s, 'PENDING')
+        """, (guild_id, u1, u2, initiator_id))
+        db.commit()
 
-    pair_id = cursor.lastrowid
-    cursor.execute("SELECT * FROM streak_pairs WHERE id = %s", (pair_id,))
-    row = cursor.fetchone()
+        pair_id = cursor.lastrowid
+        cursor.execute("SELECT * FROM streak_pairs WHERE id = %s", (pair_id,))
+        row = cursor.fetchone()
 
-    cursor.close()
-    db.close()
+        cursor.close()
     return row
 
 def set_streak_status(pair_id, status):
     """
     Ubah status streak_pairs: PENDING / ACTIVE / DENIED / BROKEN.
     """
-    db = connect_db()
-    cursor = db.cursor()
-    cursor.execute("""
-        UPDATE streak_pairs
-        SET status = %s
-        WHERE id = %s
-    """, (status, pair_id))
-    db.commit()
-    cursor.close()
-    db.close()
+    with connect_db() as db:
+        cursor = db.cursor()
+        cursor.execute("""
+            UPDATE streak_pairs
+            SET status = %s
+            WHERE id = %s
+        """, (status, pair_id))
+        db.commit()
+        cursor.close()
 
 def get_pending_streak_requests(guild_id, target_user_id=None, limit=20, offset=0):
     """
@@ -1055,32 +1418,31 @@ def get_pending_streak_requests(guild_id, target_user_id=None, limit=20, offset=
     - Kalau target_user_id = None -> semua pending di guild.
     - Kalau target_user_id diisi -> hanya yang melibatkan user tsb.
     """
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
-
-    if target_user_id is None:
-        cursor.execute("""
-            SELECT *
-            FROM streak_pairs
-            WHERE guild_id = %s
-              AND status = 'PENDING'
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """, (guild_id, limit, offset))
-    else:
-        cursor.execute("""
-            SELECT *
-            FROM streak_pairs
-            WHERE guild_id = %s
-              AND status = 'PENDING'
-              AND (user1_id = %s OR user2_id = %s)
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """, (guild_id, target_user_id, target_user_id, limit, offset))
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    rows = cursor.fetchall()
-    cursor.close()
-    db.close()
+        if target_user_id is None:
+            cursor.execute("""
+                SELECT *
+                FROM streak_pairs
+                WHERE guild_id = %s
+                  AND status = 'PENDING'
+                ORDER BY created_at DESC
+                LIMIT %s OFFSET %s
+            """, (guild_id, limit, offset))
+        else:
+            cursor.execute("""
+                SELECT *
+                FROM streak_pairs
+                WHERE guild_id = %s
+                  AND status = 'PENDING'
+                  AND (user1_id = %s OR user2_id = %s)
+                ORDER BY created_at DESC
+                LIMIT %s OFFSET %s
+            """, (guild_id, target_user_id, target_user_id, limit, offset))
+
+        rows = cursor.fetchall()
+        cursor.close()
     return rows
 
 def get_active_streaks(guild_id, limit=20, offset=0, order_by="current"):
@@ -1088,66 +1450,71 @@ def get_active_streaks(guild_id, limit=20, offset=0, order_by="current"):
     Ambil list pasangan streak aktif untuk command /topstreak.
     order_by: 'current' atau 'max'
     """
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    if order_by == "max":
-        order_sql = "max_streak DESC"
-    else:
-        order_sql = "current_streak DESC"
+        if order_by == "max":
+            order_sql = "max_streak DESC"
+        else:
+            order_sql = "current_streak DESC"
 
-    query = f"""
+        query = f"""
         SELECT *
         FROM streak_pairs
         WHERE guild_id = %s AND status = 'ACTIVE'
         ORDER BY {order_sql}, updated_at DESC
         LIMIT %s OFFSET %s
     """
-    cursor.execute(query, (guild_id, limit, offset))
-    rows = cursor.fetchall()
+        cursor.execute(query, (guild_id, limit, offset))
+        rows = cursor.fetchall()
 
-    cursor.close()
-    db.close()
+        cursor.close()
     return rows
 
 def get_streak_settings(guild_id):
     """
     Ambil pengaturan streak per guild.
     """
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT *
-        FROM streak_settings
-        WHERE guild_id = %s
-    """, (guild_id,))
-    row = cursor.fetchone()
+        cursor.execute("""
+            SELECT *
+            FROM streak_settings
+            WHERE guild_id = %s
+        """, (guild_id,))
+        row = cursor.fetchone()
 
-    cursor.close()
-    db.close()
+        cursor.close()
     return row
 
+def get_all_streak_settings(db):
+    """Semua streak_settings → {guild_id: row_dict}."""
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT * FROM streak_settings")
+    result = {row["guild_id"]: row for row in cursor.fetchall()}
+    cursor.close()
+    return result
+
 def upsert_streak_settings(guild_id, command_channel_id=None, log_channel_id=None, auto_update=True):
     """
     Simpan / update pengaturan streak.
     """
-    db = connect_db()
-    cursor = db.cursor()
+    with connect_db() as db:
+        cursor = db.cursor()
 
-    cursor.execute("""
-        INSERT INTO streak_settings (guild_id, command_channel_id, log_channel_id, auto_update)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            command_channel_id = VALUES(command_channel_id),
-            log_channel_id = VALUES(log_channel_id),
-            auto_update = VALUES(auto_update),
-            updated_at = CURRENT_TIMESTAMP
-    """, (guild_id, command_channel_id, log_channel_id, auto_update))
+        cursor.execute("""
+            INSERT INTO streak_settings (guild_id, command_channel_id, log_channel_id, auto_update)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                command_channel_id = VALUES(command_channel_id),
+                log_channel_id = VALUES(log_channel_id),
+                auto_update = VALUES(auto_update),
+                updated_at = CURRENT_TIMESTAMP
+        """, (guild_id, command_channel_id, log_channel_id, auto_update))
 
-    db.commit()
-    cursor.close()
-    db.close()
+        db.commit()
+        cursor.close()
 
 def apply_streak_update(guild_id, user1_id, user2_id, channel_id, message_id, author_id,
                         is_restore=False, today=None):
@@ -1177,178 +1544,173 @@ def apply_streak_update(guild_id, user1_id, user2_id, channel_id, message_id, au
     if today is None:
         today = date.today()
 
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
-
-    u1, u2 = _normalize_pair_users(user1_id, user2_id)
-    # Lock baris ini secara halus (MySQL default nggak terlalu strict,
-    # tapi at least kita ambil data paling baru)
-    cursor.execute("""
-        SELECT *
-        FROM streak_pairs
-        WHERE guild_id = %s AND user1_id = %s AND user2_id = %s
-        LIMIT 1
-    """, (guild_id, u1, u2))
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    pair = cursor.fetchone()
-    if not pair:
-        cursor.close()
-        db.close()
-        return {
-            "ok": False,
-            "reason": "pair_not_found",
-            "pair": None,
-            "before": 0,
-            "after": 0,
-            "action_type": None,
-            "broken": False,
-            "delta_days": None,
-        }
-
-    if pair["status"] != "ACTIVE":
-        cursor.close()
-        db.close()
-        return {
-            "ok": False,
-            "reason": "pair_not_active",
-            "pair": pair,
-            "before": pair.get("current_streak", 0),
-            "after": pair.get("current_streak", 0),
-            "action_type": None,
-            "broken": False,
-            "delta_days": None,
-        }
-
-    last_date = pair["last_update_date"]
-    current = pair["current_streak"] or 0
-    before = current
-    broken = False
-    action_type = "UPDATE"
-    delta_days = None
-
-    if last_date is None:
-        # pertama kali nyala
-        current = 1
-    else:
-        if isinstance(last_date, datetime):
-            last_date = last_date.date()
+        u1, u2 = _normalize_pair_users(user1_id, user2_id)
+        # Lock baris ini secara halus (MySQL default nggak terlalu strict,
+        # tapi at least kita ambil data paling baru)
+        cursor.execute("""
+            SELECT *
+            FROM streak_pairs
+            WHERE guild_id = %s AND user1_id = %s AND user2_id = %s
+            LIMIT 1
+        """, (guild_id, u1, u2))
 
-        delta_days = (today - last_date).days
+        pair = cursor.fetchone()
+        if not pair:
+            cursor.close()
+            return {
+                "ok": False,
+                "reason": "pair_not_found",
+                "pair": None,
+                "before": 0,
+                "after": 0,
+                "action_type": None,
+                "broken": False,
+                "delta_days": None,
+            }
 
-        if delta_days <= 0:
-            # hari ini sudah pernah dihitung atau waktu mundur → abaikan
+        if pair["status"] != "ACTIVE":
             cursor.close()
-            db.close()
             return {
                 "ok": False,
-                "reason": "already_updated_today",
+                "reason": "pair_not_active",
                 "pair": pair,
-                "before": before,
-                "after": before,
+                "before": pair.get("current_streak", 0),
+                "after": pair.get("current_streak", 0),
                 "action_type": None,
                 "broken": False,
-                "delta_days": delta_days,
+                "delta_days": None,
             }
 
-        elif delta_days == 1:
-            # normal naik
-            current = before + 1
+        last_date = pair["last_update_date"]
+        current = pair["current_streak"] or 0
+        before = current
+        broken = False
+        action_type = "UPDATE"
+        delta_days = None
 
-            cursor.execute("""
-                UPDATE streak_pairs
-                SET needs_restore = 0,
-                    restore_deadline = NULL
-                WHERE id = %s
-            """, (pair["id"],))
+        if last_date is None:
+            # pertama kali nyala
+            current = 1
+        else:
+            if isinstance(last_date, datetime):
+                last_date = last_date.date()
+
+            delta_days = (today - last_date).days
+
+            if delta_days <= 0:
+                # hari ini sudah pernah dihitung atau waktu mundur → abaikan
+                cursor.close()
+                return {
+                    "ok": False,
+                    "reason": "already_updated_today",
+                    "pair": pair,
+                    "before": before,
+                    "after": before,
+                    "action_type": None,
+                    "broken": False,
+                    "delta_days": delta_days,
+                }
+
+            elif delta_days == 1:
+                # normal naik
+                current = before + 1
 
-        elif delta_days == 2:
-            if is_restore:
-                cursor2 = db.cursor()
-                cursor2.execute("""
+                cursor.execute("""
                     UPDATE streak_pairs
                     SET needs_restore = 0,
                         restore_deadline = NULL
                     WHERE id = %s
                 """, (pair["id"],))
-                db.commit()
-
-                # --- Reset restore cycle jika perlu ---
-                pair = ensure_restore_cycle(pair)
-
-                # batas restore 5x / bulan
-                if pair["restore_used_this_cycle"] >= 5:
-                    cursor.close()
-                    db.close()
-                    return {
-                        "ok": False,
-                        "reason": "restore_quota_reached",
-                        "pair": pair,
-                        "before": before,
-                        "after": before,
-                        "action_type": None,
-                        "broken": True,
-                        "delta_days": delta_days,
-                    }
 
-                current = before + 1
-                action_type = "RESTORE"
-
-                # increment restore count
-                cursor2 = db.cursor()
-                cursor2.execute("""
-                    UPDATE streak_pairs
-                    SET restore_used_this_cycle = restore_used_this_cycle + 1
-                    WHERE id = %s
-                """, (pair["id"],))
-                db.commit()
-                cursor2.close()
-
-            else:
+            elif delta_days == 2:
+                if is_restore:
+                    cursor2 = db.cursor()
+                    cursor2.execute("""
+                        UPDATE streak_pairs
+                        SET needs_restore = 0,
+                            restore_deadline = NULL
+                        WHERE id = %s
+                    """, (pair["id"],))
+                    db.commit()
+
+                    # --- Reset restore cycle jika perlu ---
+                    pair = ensure_restore_cycle(pair)
+
+                    # batas restore 5x / bulan
+                    if pair["restore_used_this_cycle"] >= 5:
+                        cursor.close()
+                        return {
+                            "ok": False,
+                            "reason": "restore_quota_reached",
+                            "pair": pair,
+                            "before": before,
+                            "after": before,
+                            "action_type": None,
+                            "broken": True,
+                            "delta_days": delta_days,
+                        }
+
+                    current = before + 1
+                    action_type = "RESTORE"
+
+                    # increment restore count
+                    cursor2 = db.cursor()
+                    cursor2.execute("""
+                        UPDATE streak_pairs
+                        SET restore_used_this_cycle = restore_used_this_cycle + 1
+                        WHERE id = %s
+                    """, (pair["id"],))
+                    db.commit()
+                    cursor2.close()
+
+                else:
+                    current = 1
+                    broken = True
+
+            else:  # delta_days >= 3
+                # sudah lewat 2 hari → tidak bisa restore, mulai dari 1 lagi
                 current = 1
                 broken = True
 
-        else:  # delta_days >= 3
-            # sudah lewat 2 hari → tidak bisa restore, mulai dari 1 lagi
-            current = 1
-            broken = True
+        # update streak_pairs
+        new_max = max(pair.get("max_streak", 0) or 0, current)
 
-    # update streak_pairs
-    new_max = max(pair.get("max_streak", 0) or 0, current)
+        cursor.execute("""
+            UPDATE streak_pairs
+            SET current_streak = %s,
+                max_streak = %s,
+                last_update_date = %s
+            WHERE id = %s
+        """, (current, new_max, today, pair["id"]))
 
-    cursor.execute("""
-        UPDATE streak_pairs
-        SET current_streak = %s,
-            max_streak = %s,
-            last_update_date = %s
-        WHERE id = %s
-    """, (current, new_max, today, pair["id"]))
-
-    # insert log
-    cursor.execute("""
-        INSERT INTO streak_logs (
-            guild_id, pair_id, channel_id, message_id,
-            author_id, before_streak, after_streak, action_type
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """, (
-        guild_id,
-        pair["id"],
-        channel_id,
-        message_id,
-        author_id,
-        before,
-        current,
-        action_type,
-    ))
+        # insert log
+        cursor.execute("""
+            INSERT INTO streak_logs (
+                guild_id, pair_id, channel_id, message_id,
+                author_id, before_streak, after_streak, action_type
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            guild_id,
+            pair["id"],
+            channel_id,
+            message_id,
+            author_id,
+            before,
+            current,
+            action_type,
+        ))
 
-    db.commit()
+        db.commit()
 
-    # ambil pair terbaru
-    cursor.execute("SELECT * FROM streak_pairs WHERE id = %s", (pair["id"],))
-    updated_pair = cursor.fetchone()
+        # ambil pair terbaru
+        cursor.execute("SELECT * FROM streak_pairs WHERE id = %s", (pair["id"],))
+        updated_pair = cursor.fetchone()
 
-    cursor.close()
-    db.close()
+        cursor.close()
 
     return {
         "ok": True,
@@ -1365,51 +1727,151 @@ def mark_needs_restore(pair_id, deadline_date):
     """
     Tandai bahwa pair ini butuh restore (hari kedua tidak api).
     """
-    db = connect_db()
-    cursor = db.cursor()
-    cursor.execute("""
-        UPDATE streak_pairs
-        SET needs_restore = 1,
-            restore_deadline = %s
-        WHERE id = %s
-    """, (deadline_date, pair_id))
-    db.commit()
-    cursor.close()
-    db.close()
+    with connect_db() as db:
+        cursor = db.cursor()
+        cursor.execute("""
+            UPDATE streak_pairs
+            SET needs_restore = 1,
+                restore_deadline = %s
+            WHERE id = %s
+        """, (deadline_date, pair_id))
+        db.commit()
+        cursor.close()
+
+def process_streak_deadlines(db, today, guild_ids):
+    """
+    Reset harian streak secara set-based (dipakai StreakCog.process_daily_reset).
+
+    Dalam SATU transaksi:
+    1. Normalisasi siklus restore (bulan/tahun beda → counter 0), seperti ensure_restore_cycle
+    2. Kunci kandidat (delta >= 2 atau sedang needs_restore) dengan SELECT ... FOR UPDATE
+    3. Klasifikasi: 'warn' (delta 2, kuota ada), 'dead_quota' (kuota habis), 'dead'
+    4. UPDATE per aksi pakai daftar id
+
+    Return {guild_id: [(action, pair_dict), ...]} dengan nilai pair SESUDAH update,
+    supaya notifikasi bisa dikirim tanpa query ulang.
+    """
+    guild_ids = list(guild_ids)
+    if not guild_ids:
+        return {}
+
+    cycle = date.today()
+    in_guilds = ", ".join(["%s"] * len(guild_ids))
+    cursor = db.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""
+            UPDATE streak_pairs
+            SET restore_month = %s,
+                restore_year = %s,
+                restore_used_this_cycle = 0
+            WHERE status = 'ACTIVE'
+              AND guild_id IN ({in_guilds})
+              AND (restore_month IS NULL OR restore_year IS NULL
+                   OR restore_month <> %s OR restore_year <> %s)
+        """, (cycle.month, cycle.year, *guild_ids, cycle.month, cycle.year))
+
+        cursor.execute(f"""
+            SELECT *
+            FROM streak_pairs
+            WHERE status = 'ACTIVE'
+              AND guild_id IN ({in_guilds})
+              AND last_update_date IS NOT NULL
+              AND (DATEDIFF(%s, last_update_date) >= 2 OR needs_restore = 1)
+            FOR UPDATE
+        """, (*guild_ids, today))
+        rows = cursor.fetchall()
+
+        actions = []
+        for pair in rows:
+            delta = (today - pair["last_update_date"]).days
+            used = pair.get("restore_used_this_cycle") or 0
+            deadline = pair.get("restore_deadline")
+
+            if delta == 2:
+                actions.append(("dead_quota" if used >= 5 else "warn", pair))
+            elif pair["needs_restore"] == 1 and deadline and today > deadline:
+                actions.append(("dead", pair))
+            elif delta >= 3:
+                actions.append(("dead", pair))
+            elif used >= 5 and pair["needs_restore"] == 1:
+                actions.append(("dead_quota", pair))
+
+        warn_ids = [p["id"] for action, p in actions if action == "warn"]
+        dead_ids = [p["id"] for action, p in actions if action != "warn"]
+
+        if warn_ids:
+            cursor.execute(f"""
+                UPDATE streak_pairs
+                SET needs_restore = 1,
+                    restore_deadline = %s
+                WHERE id IN ({", ".join(["%s"] * len(warn_ids))})
+            """, (today, *warn_ids))
+
+        if dead_ids:
+            cursor.execute(f"""
+                UPDATE streak_pairs
+                SET current_streak = 0,
+                    needs_restore = 0,
+                    restore_deadline = NULL,
+                    restore_used_this_cycle = 0,
+                    restore_month = NULL,
+                    restore_year = NULL,
+                    status = 'BROKEN'
+                WHERE id IN ({", ".join(["%s"] * len(dead_ids))})
+            """, tuple(dead_ids))
+
+        db.commit()
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    # samakan dict dengan isi tabel sesudah update
+    grouped = {}
+    for action, pair in actions:
+        if action == "warn":
+            pair.update(needs_restore=1, restore_deadline=today)
+        else:
+            pair.update(
+                current_streak=0, needs_restore=0, restore_deadline=None,
+                restore_used_this_cycle=0, restore_month=None, restore_year=None,
+                status="BROKEN"
+            )
+        grouped.setdefault(pair["guild_id"], []).append((action, pair))
+    return grouped
 
 def clear_restore_flags(pair_id):
     """
     Hanya reset flag restore, JANGAN reset kuota.
     """
-    db = connect_db()
-    cursor = db.cursor()
-    cursor.execute("""
-        UPDATE streak_pairs
-        SET needs_restore = 0,
-            restore_deadline = NULL
-        WHERE id = %s
-    """, (pair_id,))
-    db.commit()
-    cursor.close()
-    db.close()
+    with connect_db() as db:
+        cursor = db.cursor()
+        cursor.execute("""
+            UPDATE streak_pairs
+            SET needs_restore = 0,
+                restore_deadline = NULL
+            WHERE id = %s
+        """, (pair_id,))
+        db.commit()
+        cursor.close()
 
 def kill_streak_due_to_deadline(pair_id):
-    db = connect_db()
-    cursor = db.cursor()
-    cursor.execute("""
-        UPDATE streak_pairs
-        SET current_streak = 0,
-            needs_restore = 0,
-            restore_deadline = NULL,
-            restore_used_this_cycle = 0,
-            restore_month = NULL,
-            restore_year = NULL,
-            status = 'BROKEN'
-        WHERE id = %s
-    """, (pair_id,))
-    db.commit()
-    cursor.close()
-    db.close()
+    with connect_db() as db:
+        cursor = db.cursor()
+        cursor.execute("""
+            UPDATE streak_pairs
+            SET current_streak = 0,
+                needs_restore = 0,
+                restore_deadline = NULL,
+                restore_used_this_cycle = 0,
+                restore_month = NULL,
+                restore_year = NULL,
+                status = 'BROKEN'
+            WHERE id = %s
+        """, (pair_id,))
+        db.commit()
+        cursor.close()
 
 def auto_process_gap(pair):
     """
@@ -1518,20 +1980,19 @@ def force_new_day(pair_id):
     Fungsi ini hanya membersihkan restore flags
     agar perhitungan gap berjalan normal.
     """
-    db = connect_db()
-    cursor = db.cursor()
+    with connect_db() as db:
+        cursor = db.cursor()
 
-    cursor.execute("""
-        UPDATE streak_pairs
-        SET 
-            needs_restore = 0,
-            restore_deadline = NULL
-        WHERE id = %s
-    """, (pair_id,))
+        cursor.execute("""
+            UPDATE streak_pairs
+            SET 
+                needs_restore = 0,
+                restore_deadline = NULL
+            WHERE id = %s
+        """, (pair_id,))
 
-    db.commit()
-    cursor.close()
-    db.close()
+        db.commit()
+        cursor.close()
 
 def ensure_restore_cycle(pair):
     """
@@ -1550,18 +2011,17 @@ def ensure_restore_cycle(pair):
 
     # Jika belum pernah diset → set sekarang
     if stored_month is None or stored_year is None:
-        db = connect_db()
-        cursor = db.cursor()
-        cursor.execute("""
-            UPDATE streak_pairs
-            SET restore_month = %s,
-                restore_year = %s,
-                restore_used_this_cycle = 0
-            WHERE id = %s
-        """, (cur_month, cur_year, pair["id"]))
-        db.commit()
-        cursor.close()
-        db.close()
+        with connect_db() as db:
+            cursor = db.cursor()
+            cursor.execute("""
+                UPDATE streak_pairs
+                SET restore_month = %s,
+                    restore_year = %s,
+                    restore_used_this_cycle = 0
+                WHERE id = %s
+            """, (cur_month, cur_year, pair["id"]))
+            db.commit()
+            cursor.close()
 
         pair["restore_month"] = cur_month
         pair["restore_year"] = cur_year
@@ -1570,18 +2030,17 @@ def ensure_restore_cycle(pair):
 
     # Jika bulan berbeda → reset counter
     if stored_month != cur_month or stored_year != cur_year:
-        db = connect_db()
-        cursor = db.cursor()
-        cursor.execute("""
-            UPDATE streak_pairs
-            SET restore_month = %s,
-                restore_year = %s,
-                restore_used_this_cycle = 0
-            WHERE id = %s
-        """, (cur_month, cur_year, pair["id"]))
-        db.commit()
-        cursor.close()
-        db.close()
+        with connect_db() as db:
+            cursor = db.cursor()
+            cursor.execute("""
+                UPDATE streak_pairs
+                SET restore_month = %s,
+                    restore_year = %s,
+                    restore_used_this_cycle = 0
+                WHERE id = %s
+            """, (cur_month, cur_year, pair["id"]))
+            db.commit()
+            cursor.close()
 
         pair["restore_month"] = cur_month
         pair["restore_year"] = cur_year
@@ -1594,56 +2053,53 @@ def set_tier_emoji(guild_id, min_streak, emoji_id):
     Simpan atau update emoji untuk tier tertentu.
     UNIQUE per (guild_id, min_streak).
     """
-    db = connect_db()
-    cursor = db.cursor()
+    with connect_db() as db:
+        cursor = db.cursor()
 
-    cursor.execute("""
-        INSERT INTO streak_emoji_map (guild_id, min_streak, emoji_id)
-        VALUES (%s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            emoji_id = VALUES(emoji_id),
-            created_at = CURRENT_TIMESTAMP
-    """, (guild_id, min_streak, emoji_id))
+        cursor.execute("""
+            INSERT INTO streak_emoji_map (guild_id, min_streak, emoji_id)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                emoji_id = VALUES(emoji_id),
+                created_at = CURRENT_TIMESTAMP
+        """, (guild_id, min_streak, emoji_id))
 
-    db.commit()
-    cursor.close()
-    db.close()
+        db.commit()
+        cursor.close()
 
 def get_tier_emojis(guild_id):
     """
     Ambil semua tier emoji untuk guild,
     diurutkan dari min_streak kecil ke besar.
     """
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT *
-        FROM streak_emoji_map
-        WHERE guild_id = %s
-        ORDER BY min_streak ASC
-    """, (guild_id,))
+        cursor.execute("""
+            SELECT *
+            FROM streak_emoji_map
+            WHERE guild_id = %s
+            ORDER BY min_streak ASC
+        """, (guild_id,))
 
-    rows = cursor.fetchall()
-    cursor.close()
-    db.close()
+        rows = cursor.fetchall()
+        cursor.close()
     return rows
 
 def delete_tier_emoji(guild_id, min_streak):
     """
     Hapus emoji tier tertentu.
     """
-    db = connect_db()
-    cursor = db.cursor()
+    with connect_db() as db:
+        cursor = db.cursor()
 
-    cursor.execute("""
-        DELETE FROM streak_emoji_map
-        WHERE guild_id = %s AND min_streak = %s
-    """, (guild_id, min_streak))
+        cursor.execute("""
+            DELETE FROM streak_emoji_map
+            WHERE guild_id = %s AND min_streak = %s
+        """, (guild_id, min_streak))
 
-    db.commit()
-    cursor.close()
-    db.close()
+        db.commit()
+        cursor.close()
 
 def get_emoji_for_streak(guild_id, streak):
     """
@@ -1653,20 +2109,19 @@ def get_emoji_for_streak(guild_id, streak):
     Return:
         emoji_id atau None
     """
-    db = connect_db()
-    cursor = db.cursor(dictionary=True)
+    with connect_db() as db:
+        cursor = db.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT emoji_id
-        FROM streak_emoji_map
-        WHERE guild_id = %s AND min_streak <= %s
-        ORDER BY min_streak DESC
-        LIMIT 1
-    """, (guild_id, streak))
-
-    row = cursor.fetchone()
-    cursor.close()
-    db.close()
+        cursor.execute("""
+            SELECT emoji_id
+            FROM streak_emoji_map
+            WHERE guild_id = %s AND min_streak <= %s
+            ORDER BY min_streak DESC
+            LIMIT 1
+        """, (guild_id, streak))
+
+        row = cursor.fetchone()
+        cursor.close()
 
     if row:
         return row["emoji_id"]
@@ -1676,6 +2131,77 @@ def get_emoji_for_streak(guild_id, streak):
 # ============================================================
 #  USER CASH (GAMBLE SYSTEM)
 # ============================================================
+# Auto-earn dari chat dibuffer di memori lalu di-flush per interval
+# (lihat GambleCog). Pembacaan saldo tidak menulis apa-apa: saldo = cash di DB
+# + earn yang belum ter-commit (pending + in-flight). Mutasi saldo menulis
+# pending milik user itu di transaksi yang sama, jadi tetap satu commit.
+_pending_cash = {}    # user_id -> cash yang belum ditulis
+_inflight_cash = {}   # user_id -> cash yang sedang ditulis (belum commit)
+_pending_cash_lock = threading.Lock()
+
+def queue_cash_earn(user_id, amount):
+    with _pending_cash_lock:
+        _pending_cash[user_id] = _pending_cash.get(user_id, 0) + amount
+
+def _take_pending_cash(user_ids=None):
+    """Pindahkan pending → in-flight (masih terhitung di saldo sampai commit)."""
+    global _pending_cash
+    with _pending_cash_lock:
+        if user_ids is None:
+            taken, _pending_cash = _pending_cash, {}
+        else:
+            taken = {uid: _pending_cash.pop(uid) for uid in set(user_ids) if uid in _pending_cash}
+        for uid, amount in taken.items():
+            _inflight_cash[uid] = _inflight_cash.get(uid, 0) + amount
+    return list(taken.items())
+
+def _finish_pending_cash(rows, committed):
+    # commit sukses → lepas dari in-flight; gagal → balik ke pending
+    with _pending_cash_lock:
+        for uid, amount in rows:
+            left = _inflight_cash.get(uid, 0) - amount
+            if left:
+                _inflight_cash[uid] = left
+            else:
+                _inflight_cash.pop(uid, None)
+            if not committed:
+                _pending_cash[uid] = _pending_cash.get(uid, 0) + amount
+
+def _unsettled_cash(user_id):
+    with _pending_cash_lock:
+        return _pending_cash.get(user_id, 0) + _inflight_cash.get(user_id, 0)
+
+def _write_pending_cash(cursor, rows):
+    """INSERT earn ke transaksi yang sedang jalan; commit ikut pemanggil."""
+    if rows:
+        cursor.executemany("""
+            INSERT INTO user_cash (user_id, cash)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE cash = cash + VALUES(cash)
+        """, rows)
+
+def flush_cash_earn(db):
+    """Tulis semua earn pending dalam satu INSERT multi-row + satu commit."""
+    # lock cuma dipegang untuk tukar dict; I/O DB di luar lock supaya
+    # queue_cash_earn (dipanggil dari event loop) tidak ikut menunggu
+    rows = _take_pending_cash()
+    if not rows:
+        return 0
+
+    committed = False
+    cursor = db.cursor()
+    try:
+        _write_pending_cash(cursor, rows)
+        db.commit()
+        committed = True
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        _finish_pending_cash(rows, committed)
+    return len(rows)
+
 def get_user_cash(db, user_id, guild_id=None):
     cursor = db.cursor()
     cursor.execute("SELECT cash FROM user_cash WHERE user_id = %s", (user_id,))
@@ -1683,13 +2209,13 @@ def get_user_cash(db, user_id, guild_id=None):
     cursor.close()
 
     if row:
-        return row[0]
+        return row[0] + _unsettled_cash(user_id)
 
     cursor = db.cursor()
     cursor.execute("INSERT INTO user_cash (user_id, cash) VALUES (%s, %s)", (user_id, 0))
     db.commit()
     cursor.close()
-    return 0
+    return _unsettled_cash(user_id)
 
 def set_user_cash(db, user_id, amount):
     cursor = db.cursor()
@@ -1702,6 +2228,134 @@ def set_user_cash(db, user_id, amount):
     db.commit()
     cursor.close()
 
+# ------------------------------------------------------------
+#  ATOMIC CASH MUTATIONS
+#  Saldo dihitung di dalam MySQL (cash = cash ± x), jadi tidak ada
+#  lost update antar cog. Saldo baru dikembalikan lewat
+#  LAST_INSERT_ID(expr) → ikut di paket OK, tanpa SELECT tambahan.
+# ------------------------------------------------------------
+def _insert_id_to_balance(value):
+    # LAST_INSERT_ID() selalu BIGINT UNSIGNED; saldo negatif lama bisa wrap
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def credit_user_cash(db, user_id, amount):
+    """Tambah saldo secara atomik. Return saldo baru."""
+    if amount <= 0:
+        return get_user_cash(db, user_id)
+
+    rows = _take_pending_cash([user_id])
+    committed = False
+    cursor = db.cursor()
+    try:
+        _write_pending_cash(cursor, rows)
+        cursor.execute("""
+            INSERT INTO user_cash (user_id, cash)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE cash = LAST_INSERT_ID(cash + VALUES(cash))
+        """, (user_id, amount))
+        # rowcount 1 = baris baru, 2 = baris lama di-update
+        new_cash = amount if cursor.rowcount == 1 else _insert_id_to_balance(cursor.lastrowid)
+        db.commit()
+        committed = True
+        return new_cash
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        _finish_pending_cash(rows, committed)
+
+def debit_user_cash(db, user_id, amount, partial=False):
+    """
+    Kurangi saldo secara atomik.
+    - partial=False → hanya jika cash >= amount, kalau tidak return None.
+    - partial=True  → potong sebanyak yang ada (saldo minimal 0).
+    Return saldo baru.
+    """
+    if amount <= 0:
+        return get_user_cash(db, user_id)
+
+    rows = _take_pending_cash([user_id])
+    committed = False
+    cursor = db.cursor()
+    try:
+        _write_pending_cash(cursor, rows)
+        if partial:
+            cursor.execute("""
+                UPDATE user_cash
+                SET cash = LAST_INSERT_ID(GREATEST(cash - %s, 0))
+                WHERE user_id = %s
+            """, (amount, user_id))
+        else:
+            cursor.execute("""
+                UPDATE user_cash
+                SET cash = LAST_INSERT_ID(cash - %s)
+                WHERE user_id = %s AND cash >= %s
+            """, (amount, user_id, amount))
+
+        if cursor.rowcount == 0:
+            db.rollback()
+            return 0 if partial else None
+
+        new_cash = _insert_id_to_balance(cursor.lastrowid)
+        db.commit()
+        committed = True
+        return new_cash
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        _finish_pending_cash(rows, committed)
+
+def transfer_user_cash(db, from_id, to_id, amount, partial=False):
+    """
+    Pindahkan cash from_id → to_id dalam SATU transaksi.
+    partial=True → kalau saldo pengirim kurang, pindahkan sebanyak yang ada.
+    Return (moved, from_new, to_new) atau None kalau saldo tidak cukup.
+    """
+    rows = _take_pending_cash([from_id, to_id])
+    committed = False
+    cursor = db.cursor()
+    try:
+        _write_pending_cash(cursor, rows)
+        moved = amount
+        if partial:
+            cursor.execute("SELECT cash FROM user_cash WHERE user_id = %s FOR UPDATE", (from_id,))
+            row = cursor.fetchone()
+            moved = max(0, min(amount, row[0] if row else 0))
+
+        if moved <= 0:
+            db.rollback()
+            return (0, get_user_cash(db, from_id), get_user_cash(db, to_id)) if partial else None
+
+        cursor.execute("""
+            UPDATE user_cash
+            SET cash = LAST_INSERT_ID(cash - %s)
+            WHERE user_id = %s AND cash >= %s
+        """, (moved, from_id, moved))
+        if cursor.rowcount == 0:
+            db.rollback()
+            return None
+        from_new = _insert_id_to_balance(cursor.lastrowid)
+
+        cursor.execute("""
+            INSERT INTO user_cash (user_id, cash)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE cash = LAST_INSERT_ID(cash + VALUES(cash))
+        """, (to_id, moved))
+        to_new = moved if cursor.rowcount == 1 else _insert_id_to_balance(cursor.lastrowid)
+
+        db.commit()
+        committed = True
+        return moved, from_new, to_new
+    except Error:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        _finish_pending_cash(rows, committed)
+
 # ============================================================
 #  GAMBLE LOG
 # ============================================================
@@ -1795,6 +2449,14 @@ def get_channel_settings(db, guild_id, setting_type):
     cursor.close()
     return row[0] if row else None
 
+def get_all_channel_settings(db):
+    """Semua channel_settings → {(guild_id, setting_type): channel_id}."""
+    cursor = db.cursor()
+    cursor.execute("SELECT guild_id, setting_type, channel_id FROM channel_settings")
+    result = {(guild_id, setting_type): channel_id for guild_id, setting_type, channel_id in cursor.fetchall()}
+    cursor.close()
+    return result
+
 
 # ============================================================
 #  DAILY SYSTEM
@@ -1947,6 +2609,14 @@ def get_gamble_setting(db, guild_id, key):
     cursor.close()
     return row[0] if row else None
 
+def get_all_gamble_settings(db):
+    """Semua gamble_settings → {(guild_id, setting_key): setting_value}."""
+    cursor = db.cursor()
+    cursor.execute("SELECT guild_id, setting_key, setting_value FROM gamble_settings")
+    result = {(guild_id, key): value for guild_id, key, value in cursor.fetchall()}
+    cursor.close()
+    return result
+
 def ensure_gamble_channel(self, ctx):
     ch = get_gamble_setting(self.db, ctx.guild.id, "gamble_ch")
     if ch and ctx.channel.id != int(ch):
@@ -4,9 +4,9 @@ import asyncio
 import random
 
 from database import (
-    get_user_cash, set_user_cash,
+    get_user_cash, transfer_user_cash,
     create_duel_request, get_duel_request, delete_duel_request,
-    log_gamble, get_gamble_setting
+    log_gamble
 )
 from gamble_utils import gamble_only
 
@@ -31,7 +31,7 @@ class DuelCog(commands.Cog):
     # PARSE BET
     # =====================================================================
     def parse_bet(self, ctx, amount_str, user_cash):
-        maxbet = get_gamble_setting(self.db, ctx.guild.id, "maxbet")
+        maxbet = self.bot.guild_settings.get_gamble(ctx.guild.id, "maxbet")
         maxbet = int(maxbet) if maxbet else None
 
         if amount_str.lower() == "all":
@@ -195,11 +195,7 @@ class DuelCog(commands.Cog):
         # ======================
         # MONEY TRANSFER
         # ======================
-        cashW = get_user_cash(self.db, winner)
-        cashL = get_user_cash(self.db, loser)
-
-        set_user_cash(self.db, winner, cashW + bet)
-        set_user_cash(self.db, loser, cashL - bet)
+        transfer_user_cash(self.db, loser, winner, bet, partial=True)
 
         # Log
         log_gamble(self.db, guild_id, challenger_id, "duel", bet,
@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.ui import View, Button
 import random
 import os
@@ -8,11 +8,13 @@ import datetime
 import asyncio
 
 from database import (
-    get_user_cash, set_user_cash,
+    get_user_cash, credit_user_cash, debit_user_cash, transfer_user_cash,
     log_gamble, get_rob_victim_protect,
-    get_gamble_setting, set_gamble_setting, get_rob_stats, 
-    add_rob_success, add_rob_fail, get_total_gamble_wins, get_user_protection
+    get_rob_stats, 
+    add_rob_success, add_rob_fail, get_total_gamble_wins, get_user_protection,
+    queue_cash_earn, flush_cash_earn, run_db
 )
+from mysql.connector import Error
 
 from gamble_utils import (
     gamble_only,
@@ -33,26 +35,23 @@ class ConfirmTransfer(View):
     @discord.ui.button(label="✅ Confirm", style=discord.ButtonStyle.green)
     async def confirm(self, interaction, button):
 
-        current_giver = get_user_cash(self.db, self.giver.id)
+        # Transfer beneran (atomik, satu transaksi)
+        result = transfer_user_cash(self.db, self.giver.id, self.target.id, self.amount)
 
-        if current_giver < self.amount:
+        if result is None:
             return await interaction.response.edit_message(
                 content="❌ Saldo kamu tidak cukup.",
                 view=None
             )
 
-        # Transfer beneran
-        set_user_cash(self.db, self.giver.id, current_giver - self.amount)
-
-        current_target = get_user_cash(self.db, self.target.id)
-        set_user_cash(self.db, self.target.id, current_target + self.amount)
+        _, giver_cash, _ = result
 
         embed = discord.Embed(
             title="💸 Transfer Berhasil",
             description=(
                 f"{self.giver.mention} telah mentransfer **{comma(self.amount)} coins** "
                 f"kepada {self.target.mention}.\n\n"
-                f"💰 Saldo kamu sekarang: **{comma(current_giver - self.amount)}**"
+                f"💰 Saldo kamu sekarang: **{comma(giver_cash)}**"
             ),
             color=discord.Color.green()
         )
@@ -92,9 +91,7 @@ class ConfirmGive(View):
     @discord.ui.button(label="✅ Confirm", style=discord.ButtonStyle.green)
     async def confirm(self, interaction: discord.Interaction, button: Button):
         # Update cash
-        current = get_user_cash(self.db, self.target.id)
-        new_cash = current + self.amount
-        set_user_cash(self.db, self.target.id, new_cash)
+        new_cash = credit_user_cash(self.db, self.target.id, self.amount)
 
 
         embed = discord.Embed(
@@ -126,6 +123,8 @@ class ConfirmGive(View):
         self.stop()
 
 
+CASH_FLUSH_INTERVAL = 10  # detik
+
 class GambleCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -139,6 +138,23 @@ class GambleCog(commands.Cog):
         self.gamble_cooldown = 3
         self.last_gamble = {}
 
+        self.flush_earn.start()
+
+    async def cog_unload(self):
+        self.flush_earn.cancel()
+        await self.flush_pending_earn()
+
+    @tasks.loop(seconds=CASH_FLUSH_INTERVAL)
+    async def flush_earn(self):
+        await self.flush_pending_earn()
+
+    async def flush_pending_earn(self):
+        try:
+            # tanpa timeout: kalau write gagal, batch digabung lagi ke buffer
+            await run_db(flush_cash_earn, timeout=None)
+        except Error as e:
+            print(f"[GAMBLE] Flush auto earn gagal, dicoba lagi nanti: {e!r}")
+
 
     # =====================================================
     # HOLD BALANCE SYSTEM
@@ -202,8 +218,7 @@ class GambleCog(commands.Cog):
         # reward calculation
         gain = 3 + min(len(content) // 30, 7)
 
-        current = get_user_cash(self.db, user)
-        set_user_cash(self.db, user, current + gain)
+        queue_cash_earn(user, gain)
 
 
 
@@ -231,7 +246,7 @@ class GambleCog(commands.Cog):
         if ctx.author.id not in [ctx.guild.owner_id, 416234104317804544]:
             return await ctx.send("❌ Kamu tidak punya izin.")
 
-        set_gamble_setting(self.db, ctx.guild.id, "gamble_ch", channel.id)
+        await self.bot.guild_settings.set_gamble(ctx.guild.id, "gamble_ch", channel.id)
         await ctx.send(f"🎰 Channel gamble telah diatur ke {channel.mention}")
 
 
@@ -246,7 +261,7 @@ class GambleCog(commands.Cog):
         if amount < 1:
             return await ctx.send("❌ Maxbet harus > 0.")
 
-        set_gamble_setting(self.db, ctx.guild.id, "maxbet", amount)
+        await self.bot.guild_settings.set_gamble(ctx.guild.id, "maxbet", amount)
         await ctx.send(f"🔒 Maxbet ditetapkan ke **{amount} coins**")
 
     # ======================================================================
@@ -338,7 +353,7 @@ class GambleCog(commands.Cog):
         cash = self.get_available(user)
 
 
-        maxbet = get_gamble_setting(self.db, guild, "maxbet")
+        maxbet = self.bot.guild_settings.get_gamble(guild, "maxbet")
         maxbet = int(maxbet) if maxbet else None
 
         if amount_str.lower() == "all":
@@ -434,21 +449,19 @@ class GambleCog(commands.Cog):
         # ============================
         actual = random.choice(["HEAD", "TAIL"])
         final_img = head_img if actual == "HEAD" else tail_img
-        current = get_user_cash(self.db, ctx.author.id)
         self.release_amount(ctx.author.id, bet)
 
         if guess == actual:
-            new_cash = current + bet
+            new_cash = credit_user_cash(self.db, ctx.author.id, bet)
             status = f"🟢 **Kamu menang! +{comma(bet)}**"
             color = discord.Color.green()
             res_code = "WIN"
         else:
-            new_cash = current - bet
+            new_cash = debit_user_cash(self.db, ctx.author.id, bet, partial=True)
             status = f"🔴 **Kamu kalah! -{comma(bet)}**"
             color = discord.Color.red()
             res_code = "LOSE"
 
-        set_user_cash(self.db, ctx.author.id, new_cash)
         log_gamble(self.db, ctx.guild.id, ctx.author.id, "coinflip", bet, res_code)
 
         final_embed = discord.Embed(
@@ -550,10 +563,9 @@ class GambleCog(commands.Cog):
         if is_win:
             multi = multipliers[r1]
             win_amount = bet * multi
-            current = get_user_cash(self.db, ctx.author.id)
             self.release_amount(ctx.author.id, bet)
 
-            new_cash = current + win_amount
+            new_cash = credit_user_cash(self.db, ctx.author.id, win_amount)
 
             desc = (
                 f"🟢 **MENANG!** {r1*3}\n"
@@ -563,18 +575,15 @@ class GambleCog(commands.Cog):
             color = discord.Color.green()
             status = "WIN"
         else:
-            current = get_user_cash(self.db, ctx.author.id)
             self.release_amount(ctx.author.id, bet)  # <— WAJIB DITAMBAH
 
-            new_cash = current - bet
-            set_user_cash(self.db, ctx.author.id, new_cash)
+            new_cash = debit_user_cash(self.db, ctx.author.id, bet, partial=True)
 
             desc = f"🔴 **KALAH! -{comma(bet)} coins**"
             color = discord.Color.red()
             status = "LOSE"
 
         # Save
-        set_user_cash(self.db, ctx.author.id, new_cash)
         log_gamble(self.db, ctx.guild.id, ctx.author.id, "slots", bet, status)
 
         # Final embed
@@ -2,7 +2,6 @@
 
 import discord
 from functools import wraps
-from database import get_gamble_setting
 import time
 
 
@@ -33,8 +32,8 @@ def global_gamble_cooldown(guild_id, user_id):
 # =====================================================
 #   CEK APAKAH COMMAND DIPAKAI DI CHANNEL GAMBLE
 # =====================================================
-def check_gamble_channel(db, ctx):
-    ch = get_gamble_setting(db, ctx.guild.id, "gamble_ch")
+def check_gamble_channel(ctx):
+    ch = ctx.bot.guild_settings.get_gamble(ctx.guild.id, "gamble_ch")
     if not ch:
         return (
             "❌ Channel gamble belum diset.\n"
@@ -56,7 +55,7 @@ def gamble_only():
         async def inner(self, ctx, *args, **kwargs):
 
             # cek channel dulu
-            err = check_gamble_channel(self.db, ctx)
+            err = check_gamble_channel(ctx)
             if err:
                 return await ctx.send(err)
 
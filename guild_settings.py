@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+from mysql.connector import Error
+
+from database import (
+    run_db, run_db_func,
+    get_all_channel_settings, set_channel_settings,
+    get_all_feature_status, set_feature_status,
+    get_all_gamble_settings, set_gamble_setting,
+    get_all_streak_settings, get_streak_settings, upsert_streak_settings
+)
+
+GUILD_SETTINGS_TTL = 300   # detik, refresh penuh dari DB
+
+
+# ============================================================
+#  GUILD SETTINGS CACHE
+# ============================================================
+class GuildSettingsCache:
+    """
+    Cache in-memory untuk channel_settings, feature_status, gamble_settings
+    dan streak_settings. Dibaca tanpa query di hot path (on_message, check),
+    ditulis write-through lewat setter, dan di-refresh penuh tiap TTL supaya
+    perubahan dari luar bot tetap ikut kebaca.
+    """
+
+    def __init__(self, ttl=GUILD_SETTINGS_TTL):
+        self.ttl = ttl
+
+        self.channels = {}   # (guild_id, setting_type) → channel_id
+        self.features = {}   # (guild_id, feature_name) → bool
+        self.gamble = {}     # (guild_id, setting_key) → str
+        self.streak = {}     # guild_id → row dict
+
+        # (nama dict, key) → waktu setter selesai; dipakai warmup untuk merge per key
+        self._written = {}
+        self._refresh_task = None
+
+    # ============================================================
+    #  WARMUP / REFRESH
+    # ============================================================
+    async def warmup(self):
+        started = time.monotonic()
+
+        fresh = {
+            "channels": await run_db(get_all_channel_settings, timeout=None),
+            "features": await run_db(get_all_feature_status, timeout=None),
+            "gamble": await run_db(get_all_gamble_settings, timeout=None),
+            "streak": await run_db(get_all_streak_settings, timeout=None),
+        }
+
+        # Setter yang selesai sebelum load mulai sudah ke-commit → ada di snapshot.
+        # Yang selesai selama load belum tentu kebaca, jadi nilai cache-nya menang.
+        # Setter yang masih jalan menulis ke dict baru begitu selesai.
+        for (name, key), written_at in list(self._written.items()):
+            if written_at < started:
+                del self._written[(name, key)]
+                continue
+            current = getattr(self, name)
+            if key in current:
+                fresh[name][key] = current[key]
+
+        self.channels = fresh["channels"]
+        self.features = fresh["features"]
+        self.gamble = fresh["gamble"]
+        self.streak = fresh["streak"]
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.warmup()
+            except (asyncio.TimeoutError, Error) as e:
+                print(f"[GuildSettings] Refresh gagal: {e}")
+
+    def start(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    # ============================================================
+    #  GETTER
+    # ============================================================
+    def get_channel(self, guild_id, setting_type):
+        return self.channels.get((guild_id, setting_type))
+
+    def get_feature(self, guild_id, feature_name, default=True):
+        return self.features.get((guild_id, feature_name), default)
+
+    def get_gamble(self, guild_id, key):
+        return self.gamble.get((guild_id, key))
+
+    def get_streak(self, guild_id):
+        return self.streak.get(guild_id)
+
+    # ============================================================
+    #  SETTER (write-through)
+    # ============================================================
+    def _mark_written(self, name, key):
+        self._written[(name, key)] = time.monotonic()
+
+    async def set_channel(self, guild_id, setting_type, channel_id):
+        await run_db(set_channel_settings, guild_id, setting_type, channel_id, timeout=None)
+        self.channels[(guild_id, setting_type)] = channel_id
+        self._mark_written("channels", (guild_id, setting_type))
+
+    async def set_feature(self, guild_id, feature_name, status):
+        await run_db(set_feature_status, guild_id, feature_name, status, timeout=None)
+        self.features[(guild_id, feature_name)] = bool(status)
+        self._mark_written("features", (guild_id, feature_name))
+
+    async def set_gamble(self, guild_id, key, value):
+        value = str(value)
+        await run_db(set_gamble_setting, guild_id, key, value, timeout=None)
+        self.gamble[(guild_id, key)] = value
+        self._mark_written("gamble", (guild_id, key))
+
+    async def set_streak(self, guild_id, command_channel_id=None, log_channel_id=None, auto_update=True):
+        await run_db_func(
+            upsert_streak_settings,
+            guild_id,
+            command_channel_id=command_channel_id,
+            log_channel_id=log_channel_id,
+            auto_update=auto_update,
+            timeout=None
+        )
+        # ambil ulang supaya updated_at & default kolom sama dengan DB
+        self.streak[guild_id] = await run_db_func(get_streak_settings, guild_id, timeout=None)
+        self._mark_written("streak", guild_id)
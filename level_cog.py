@@ -1,20 +1,27 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from database import (
     get_user_xp,
-    set_user_xp,
+    add_user_xp_batch,
     get_level_role,
     insert_level_role,
-    set_channel_settings,
-    get_channel_settings,
     is_level_disabled,
     disable_level,
     enable_level,
     get_no_xp_roles,
     add_no_xp_role,
-    remove_no_xp_role
+    remove_no_xp_role,
+    get_xp_leaderboard,
+    run_db
 )
+from mysql.connector import Error
+import asyncio
 import time
+from collections import OrderedDict
+
+XP_FLUSH_INTERVAL = 5  # detik
+XP_CACHE_SIZE = 5000   # user di ledger; yang paling lama tidak aktif dibuang duluan
+XP_CACHE_TTL = 600     # detik, total dibaca ulang dari DB (edit XP dari luar cog ikut terbaca)
 
 class LevelCog(commands.Cog):
     def __init__(self, bot):
@@ -25,6 +32,84 @@ class LevelCog(commands.Cog):
         self.disabled_guilds = set()
         self.no_xp_roles = {} 
 
+        # Write-behind XP ledger
+        self.xp_totals = OrderedDict()   # (guild_id, user_id) -> (total XP, waktu load)
+        self.pending_xp = {}    # (guild_id, user_id) -> XP yang belum di-flush
+        self.inflight_xp = {}   # batch yang sedang ditulis flush
+        self.flush_lock = asyncio.Lock()
+        self.flush_xp.start()
+
+    async def cog_unload(self):
+        # tunggu flush yang sedang jalan; cancel di tengah run_db = batch hilang
+        async with self.flush_lock:
+            self.flush_xp.cancel()
+        await self.flush_pending_xp()
+
+    @tasks.loop(seconds=XP_FLUSH_INTERVAL)
+    async def flush_xp(self):
+        await self.flush_pending_xp()
+
+    async def flush_pending_xp(self):
+        """Tulis semua XP pending ke DB dalam satu batch."""
+        async with self.flush_lock:
+            if not self.pending_xp:
+                return
+
+            batch, self.pending_xp = self.pending_xp, {}
+            self.inflight_xp = batch
+            rows = [(user_id, guild_id, gained) for (guild_id, user_id), gained in batch.items()]
+            try:
+                # tanpa timeout: kalau dibatalkan di tengah jalan, kita tidak tahu
+                # batch-nya sudah ke-commit atau belum
+                await run_db(add_user_xp_batch, rows, timeout=None)
+            except Error as e:
+                print(f"[LEVEL] Flush XP gagal ({len(rows)} user), dicoba lagi nanti: {e!r}")
+                for key, gained in batch.items():
+                    self.pending_xp[key] = self.pending_xp.get(key, 0) + gained
+            finally:
+                self.inflight_xp = {}
+
+    def cached_xp(self, key):
+        entry = self.xp_totals.get(key)
+        if entry is None or time.monotonic() - entry[1] >= XP_CACHE_TTL:
+            return None
+        self.xp_totals.move_to_end(key)
+        return entry[0]
+
+    async def get_total_xp(self, guild_id, user_id):
+        """Total XP dari ledger; DB dibaca kalau belum ada / sudah lewat TTL."""
+        key = (guild_id, user_id)
+        total = self.cached_xp(key)
+        if total is not None:
+            return total
+
+        xp = await run_db(get_user_xp, user_id, guild_id)
+        # bisa saja sudah diisi coroutine lain selama await
+        total = self.cached_xp(key)
+        if total is None:
+            total = xp + self.pending_xp.get(key, 0) + self.inflight_xp.get(key, 0)
+            self.xp_totals[key] = (total, time.monotonic())
+            while len(self.xp_totals) > XP_CACHE_SIZE:
+                self.xp_totals.popitem(last=False)
+        return total
+
+    def add_xp(self, guild_id, user_id, gained):
+        # dipanggil tepat setelah get_total_xp (tanpa await di antaranya)
+        key = (guild_id, user_id)
+        total, loaded_at = self.xp_totals[key]
+        total += gained
+        self.xp_totals[key] = (total, loaded_at)
+        self.pending_xp[key] = self.pending_xp.get(key, 0) + gained
+        return total
+
+    def invalidate_xp(self, guild_id, user_id=None):
+        """Buang total di ledger setelah XP diubah di luar on_message (reset/set)."""
+        if user_id is not None:
+            self.xp_totals.pop((guild_id, user_id), None)
+            return
+        for key in [k for k in self.xp_totals if k[0] == guild_id]:
+            del self.xp_totals[key]
+
     def is_admin_or_owner(self, ctx):
         return ctx.author.guild_permissions.administrator or ctx.author.id == 416234104317804544
 
@@ -65,7 +150,7 @@ class LevelCog(commands.Cog):
 
     @commands.command(name="level", extras={"category": "XP"})
     async def show_level(self, ctx):
-        xp = get_user_xp(self.db, ctx.author.id, ctx.guild.id)
+        xp = await self.get_total_xp(ctx.guild.id, ctx.author.id)
         level = self.calculate_level(xp)
         await ctx.send(f"🔢 {ctx.author.mention}, kamu level {level} dengan {xp} XP.")
 
@@ -92,7 +177,7 @@ class LevelCog(commands.Cog):
     async def setchlevel(self, ctx, channel: discord.TextChannel):
         if not self.is_admin_or_owner(ctx):
             return await ctx.send("❌ Hanya admin atau user yang diizinkan yang bisa menggunakan command ini.")
-        set_channel_settings(self.db, ctx.guild.id, "level", channel.id)
+        await self.bot.guild_settings.set_channel(ctx.guild.id, "level", channel.id)
         await ctx.send(f"✅ Channel level-up diatur ke {channel.mention}")
 
     @commands.command(name="leveloff", extras={"category": "XP"})
@@ -152,9 +237,12 @@ class LevelCog(commands.Cog):
         bonus = min(len(message.content) // 20, 10)
         gained = base_xp + bonus
 
-        xp_before = get_user_xp(self.db, user_id, guild_id)
-        xp_after = xp_before + gained
-        set_user_xp(self.db, user_id, guild_id, xp_after)
+        try:
+            xp_before = await self.get_total_xp(guild_id, user_id)
+        except (asyncio.TimeoutError, Error) as e:
+            print(f"[LEVEL] Gagal ambil XP {user_id}@{guild_id}: {e!r}")
+            return
+        xp_after = self.add_xp(guild_id, user_id, gained)
 
         level_before = self.calculate_level(xp_before)
         level_after = self.calculate_level(xp_after)
@@ -162,7 +250,10 @@ class LevelCog(commands.Cog):
         if level_after > level_before:
             role_id = self.guild_level_roles.get(guild_id, {}).get(level_after)
             if role_id is None:
-                role_id = get_level_role(self.db, guild_id, level_after)
+                try:
+                    role_id = await run_db(get_level_role, guild_id, level_after)
+                except (asyncio.TimeoutError, Error):
+                    role_id = None
                 if role_id:
                     self.guild_level_roles.setdefault(guild_id, {})[level_after] = role_id
 
@@ -177,19 +268,14 @@ class LevelCog(commands.Cog):
                     except Exception as e:
                         print(f"[ERROR] Memberi role gagal: {e}")
 
-            ch_id = get_channel_settings(self.db, guild_id, "level")
+            ch_id = self.bot.guild_settings.get_channel(guild_id, "level")
             channel = message.guild.get_channel(int(ch_id)) if ch_id else message.channel
             await channel.send(msg)
 
     @commands.command(name="leaderboard", help="Menampilkan 10 user dengan XP tertinggi", extras={"category": "XP"})
     async def leaderboard(self, ctx):
-        cursor = self.db.cursor()
-        cursor.execute("""
-            SELECT user_id, xp FROM user_levels
-            WHERE guild_id = %s ORDER BY xp DESC LIMIT 10
-        """, (ctx.guild.id,))
-        results = cursor.fetchall()
-        cursor.close()
+        await self.flush_pending_xp()
+        results = await run_db(get_xp_leaderboard, ctx.guild.id, 10)
 
         if not results:
             return await ctx.send("📉 Tidak ada data XP untuk server ini.")
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
-import yt_dlp
+from ytdl_pool import ytdl_extract
+from transcode import get_transcoder, TranscodeError
+from clip_cache import ClipCache
 import os
 import asyncio
 import mimetypes
@@ -9,8 +11,8 @@ import shutil
 import requests
 import re
 import logging
-import subprocess
 import uuid
+import io
 
 logger = logging.getLogger('link_cog')
 logger.setLevel(logging.DEBUG)
@@ -19,9 +21,91 @@ formatter = logging.Formatter('[%(levelname)s] %(message)s')
 ch.setFormatter(formatter)
 logger.addHandler(ch)
 
-INSTAGRAM_RE = re.compile(r"https?://(?:www\.)?(?:instagram\.com|instagr\.am|l\.instagram\.com)/\S+")
-TIKTOK_RE = re.compile(r"https?://(?:www\.)?(?:tiktok\.com|vt\.tiktok\.com)/\S+")
-YOUTUBE_SHORTS_RE = re.compile(r"https?://(?:www\.)?youtube\.com/shorts/\S+")
+# Instagram / TikTok / YouTube Shorts dalam satu pattern (case-insensitive,
+# jadi span match bisa langsung dipakai di konten asli)
+MEDIA_LINK_RE = re.compile(
+    r"https?://(?:www\.)?"
+    r"(?:(?:instagram\.com|instagr\.am|l\.instagram\.com|tiktok\.com|vt\.tiktok\.com)/|youtube\.com/shorts/)"
+    r"\S+",
+    re.IGNORECASE
+)
+# prefilter on_message: cari "http" tanpa bikin salinan lowercase pesan
+HTTP_PREFILTER_RE = re.compile("http", re.IGNORECASE)
+
+# ============================================================
+# Kompres ke ukuran target (batas upload guild)
+# ============================================================
+DEFAULT_UPLOAD_LIMIT = 8 * 1024 * 1024   # DM / guild tidak diketahui
+SIZE_MARGIN = 0.92          # sisakan ruang untuk overhead container mp4
+MIN_VIDEO_KBPS = 150        # di bawah ini hasilnya tidak layak ditonton → tidak usah encode
+AUDIO_KBPS = 96
+AUDIO_KBPS_LOW = 48
+
+# (video kbps minimum, tinggi maksimum)
+RESOLUTION_STEPS = [
+    (2500, 1080),
+    (1500, 720),
+    (800, 540),
+    (400, 480),
+    (0, 360),
+]
+
+
+def upload_limit(guild):
+    """Batas upload untuk guild (ikut boost tier)."""
+    return guild.filesize_limit if guild else DEFAULT_UPLOAD_LIMIT
+
+
+def plan_target_encode(duration, limit_bytes):
+    """
+    Hitung bitrate video/audio supaya hasil encode muat di `limit_bytes`.
+    Return (video_kbps, audio_kbps, max_height) atau None kalau tidak mungkin.
+    """
+    total_kbps = limit_bytes * 8 * SIZE_MARGIN / duration / 1000
+    audio_kbps = AUDIO_KBPS if total_kbps >= 600 else AUDIO_KBPS_LOW
+    video_kbps = int(total_kbps - audio_kbps)
+    if video_kbps < MIN_VIDEO_KBPS:
+        return None
+
+    max_height = next(h for min_kbps, h in RESOLUTION_STEPS if video_kbps >= min_kbps)
+    return video_kbps, audio_kbps, max_height
+
+
+# ============================================================
+# Workspace per job
+# ============================================================
+class MediaJob:
+    """
+    Folder sementara untuk satu job (download / convert): temp_files/<id>/.
+    Semua file hasil job ditulis di sini dan foldernya dihapus utuh saat job
+    selesai, jadi job yang jalan bersamaan tidak saling hapus / salah ambil file.
+    """
+
+    def __init__(self, root):
+        self.id = uuid.uuid4().hex
+        self.dir = os.path.join(root, self.id)
+        self.media_id = None   # extractor:id dari yt-dlp setelah download
+        os.makedirs(self.dir, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def new_path(self, ext):
+        return self.path(f"{uuid.uuid4().hex}{ext}")
+
+    def files(self):
+        return [f for f in glob.glob(os.path.join(self.dir, '*')) if os.path.isfile(f)]
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+        return False
+
 
 class link_cog(commands.Cog):
     def __init__(self, bot):
@@ -31,93 +115,130 @@ class link_cog(commands.Cog):
         self.temp_folder = 'temp_files'
         os.makedirs(self.temp_folder, exist_ok=True)
 
-        # Bersihkan temp setiap start
+        # Bersihkan sisa job lama setiap start (belum ada job yang jalan)
         for f in os.listdir(self.temp_folder):
+            path = os.path.join(self.temp_folder, f)
             try:
-                os.remove(os.path.join(self.temp_folder, f))
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
             except:
                 pass
 
         logger.info(f"Temp folder tersedia: {self.temp_folder}")
 
+        # hasil final (siap upload) per media → repost tidak download/kompres ulang
+        self.clip_cache = ClipCache()
+
     # ============================================================
-    # Utility: Clear temp folder
+    # Utility: workspace job
     # ============================================================
-    def clear_temp(self):
-        for f in glob.glob(os.path.join(self.temp_folder, '*')):
-            try:
-                os.remove(f)
-            except Exception as e:
-                logger.error(f"Gagal hapus {f}: {e}")
-
-    # Alias lama agar tetap backward compatible
-    def clean_media_folder(self):
-        return self.clear_temp()
+    def new_job(self):
+        """Pakai dengan `with self.new_job() as job:` → folder job dihapus saat keluar."""
+        return MediaJob(self.temp_folder)
 
 
-    def convert_to_mp3(self, video_path):
-        mp3_path = os.path.join(self.temp_folder, f"{uuid.uuid4().hex}.mp3")
+    # ============================================================
+    # Transcode (ffmpeg async lewat TranscodeManager)
+    # ============================================================
+    async def transcode(self, label, args, output_path):
         try:
-            subprocess.run([
-                'ffmpeg', '-i', video_path, '-vn', '-acodec', 'libmp3lame', '-ab', '192k', '-ar', '44100', mp3_path
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return mp3_path
-        except Exception as e:
-            logger.error(f"Gagal konversi ke MP3: {e}")
+            ms = await get_transcoder().run(args, label=label)
+            logger.info(f"{label} selesai dalam {ms:.0f} ms")
+            return output_path
+        except (TranscodeError, OSError) as e:
+            logger.error(f"Gagal {label}: {e}")
+            return None
+
+    async def convert_to_mp3(self, video_path, job):
+        mp3_path = job.new_path(".mp3")
+        return await self.transcode("mp3", [
+            '-i', video_path, '-vn', '-acodec', 'libmp3lame', '-ab', '192k', '-ar', '44100', mp3_path
+        ], mp3_path)
+
+    async def compress_video(self, input_path, job, limit_bytes=DEFAULT_UPLOAD_LIMIT):
+        """
+        Encode two-pass ke bitrate yang dihitung dari durasi + batas upload,
+        turunkan resolusi kalau bitrate kecil. Return None tanpa encode kalau
+        video memang terlalu panjang untuk muat.
+        """
+        duration = await get_transcoder().probe_duration(input_path)
+        if not duration:
+            return None
+
+        plan = plan_target_encode(duration, limit_bytes)
+        if not plan:
+            logger.info(f"Video {duration:.0f}s tidak mungkin muat di {limit_bytes // (1024 * 1024)} MB")
             return None
 
-    def compress_video(self, input_path):
-        output_path = os.path.join(self.temp_folder, f"{uuid.uuid4().hex}.mp4")
+        video_kbps, audio_kbps, max_height = plan
+        output_path = job.new_path(".mp4")
+        passlog = job.path("x264pass")
+        common = [
+            '-i', input_path,
+            '-vf', f"scale=-2:'min({max_height},ih)'",
+            '-c:v', 'libx264', '-preset', 'veryfast',
+            '-b:v', f'{video_kbps}k', '-maxrate', f'{int(video_kbps * 1.2)}k', '-bufsize', f'{video_kbps * 2}k',
+            '-passlogfile', passlog,
+        ]
+
+        # pass 1: analisa saja, tanpa audio & output
         try:
-            subprocess.run([
-                'ffmpeg', '-i', input_path, '-vcodec', 'libx264', '-crf', '28', '-preset', 'fast', output_path
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return output_path
-        except Exception as e:
-            logger.error(f"Gagal kompres video: {e}")
+            ms = await get_transcoder().run(common + ['-pass', '1', '-an', '-f', 'null', os.devnull], label="compress-pass1")
+            logger.info(f"compress-pass1 selesai dalam {ms:.0f} ms")
+        except (TranscodeError, OSError) as e:
+            logger.error(f"Gagal compress-pass1: {e}")
+            return None
+
+        output = await self.transcode("compress-pass2", common + [
+            '-pass', '2', '-c:a', 'aac', '-b:a', f'{audio_kbps}k',
+            '-movflags', '+faststart', output_path
+        ], output_path)
+
+        if output and os.path.getsize(output) > limit_bytes:
+            logger.warning(f"Hasil kompres masih {os.path.getsize(output)} byte > {limit_bytes}")
             return None
+        return output
+
+    async def convert_to_gif(self, video_path, job):
+        gif_path = job.new_path(".gif")
+        return await self.transcode("gif", [
+            '-i', video_path,
+            '-vf', 'fps=12,scale=480:-1:flags=lanczos,split[s0][s1];[s0]palettegen[p];[s1][p]paletteuse',
+            '-loop', '0', gif_path
+        ], gif_path)
 
     # ============================================================
     # Download via yt-dlp
     # ============================================================
-    def download_media_yt_dlp(self, url, audio_only=False):
-        self.clear_temp()
-
+    def download_media_yt_dlp(self, url, job, audio_only=False):
         if url.startswith("mmp3 "):
             url = url.replace("mmp3 ", "", 1).strip()
 
-        ydl_opts = {
-            'outtmpl': os.path.join(self.temp_folder, '%(id)s.%(ext)s'),
-            'quiet': True,
-            'noplaylist': True,
-            'no_warnings': True,
-            'ignoreerrors': False,
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-            }
-        }
+        # opsi yt-dlp ada di ytdl_pool.PROFILES (instance dipakai ulang)
+        profile = 'download-audio' if audio_only else 'download-video'
 
-        if audio_only:
-            ydl_opts['format'] = 'bestaudio/best'
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }]
-        else:
-            ydl_opts['format'] = 'bestvideo[ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[ext=mp4][vcodec^=avc1]/best'
-            ydl_opts['merge_output_format'] = 'mp4'
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            try:
-                info = ydl.extract_info(url, download=True)
-                if not info:
-                    return None
-            except Exception as e:
-                logger.error(f"DownloadError: {e}")
+        try:
+            info = ytdl_extract(profile, url, download=True, outtmpl=job.path('%(id)s.%(ext)s'))
+            if not info:
                 return None
+        except Exception as e:
+            logger.error(f"DownloadError: {e}")
+            return None
 
-        files = glob.glob(os.path.join(self.temp_folder, '*'))
+        if info.get('id'):
+            job.media_id = f"{info.get('extractor_key') or info.get('extractor')}:{info['id']}"
+
+        # path final (setelah merge / convert mp3) dari yt-dlp
+        for item in info.get('requested_downloads') or []:
+            path = item.get('filepath')
+            if path and os.path.exists(path):
+                logger.info(f"File hasil download: {path}")
+                return path
+
+        # fallback: folder job hanya berisi file job ini
+        files = job.files()
         if not files:
             return None
 
@@ -133,39 +254,67 @@ class link_cog(commands.Cog):
         if message.author.bot:
             return
 
-        if message.content.startswith("m"):
+        content = message.content
+
+        # gate murah dulu: hampir semua pesan tidak berisi link sama sekali
+        # (regex-nya IGNORECASE, jadi "HTTPS://" juga harus lolos)
+        if not HTTP_PREFILTER_RE.search(content) or content.startswith("m"):
             return
 
-        content = message.content.lower()
+        if message.guild and not self.bot.guild_settings.get_feature(message.guild.id, "link_download"):
+            return
 
-        if INSTAGRAM_RE.search(content) or TIKTOK_RE.search(content) or YOUTUBE_SHORTS_RE.search(content):
+        match = MEDIA_LINK_RE.search(content)
+        if match:
             await message.channel.typing()
             try:
-                loop = asyncio.get_running_loop()
-                file_path = await loop.run_in_executor(None, self.download_media_yt_dlp, message.content, False)
-
-                if not file_path:
-                    await message.channel.send("Gagal mengunduh video.")
+                limit = upload_limit(message.guild)
+
+                # link yang sama pernah diproses → kirim langsung dari cache
+                url = match.group(0).split('?')[0]
+                media_id = self.clip_cache.lookup_url(url)
+                looked_up = media_id is not None
+                cached = self.clip_cache.get(media_id, limit) if looked_up else None
+                if cached:
+                    await message.channel.send(file=discord.File(cached, filename="video.mp4"))
                     return
 
-                if not file_path.lower().endswith(('.mp4', '.mov', '.webm', '.mkv')):
-                    os.remove(file_path)
-                    await message.channel.send("File yang didownload bukan video.")
-                    return
+                with self.new_job() as job:
+                    loop = asyncio.get_running_loop()
+                    file_path = await loop.run_in_executor(None, self.download_media_yt_dlp, message.content, job, False)
 
-                size_mb = os.path.getsize(file_path) / (1024 * 1024)
-                if size_mb > 8:
-                    compressed = self.compress_video(file_path)
-                    if compressed and os.path.getsize(compressed) < 8 * 1024 * 1024:
-                        await message.channel.send(file=discord.File(compressed, filename="video_compressed.mp4"))
-                        os.remove(compressed)
-                    else:
-                        await message.channel.send(f"File terlalu besar ({size_mb:.2f} MB)")
-                    os.remove(file_path)
-                    return
+                    if not file_path:
+                        await message.channel.send("Gagal mengunduh video.")
+                        return
+
+                    if not file_path.lower().endswith(('.mp4', '.mov', '.webm', '.mkv')):
+                        await message.channel.send("File yang didownload bukan video.")
+                        return
+
+                    media_id = job.media_id
+                    if media_id:
+                        self.clip_cache.remember_url(url, media_id)
+                        # link beda, media sama (mis. vt.tiktok) → lewati kompres.
+                        # Kalau lookup pertama sudah jalan, miss-nya sudah tercatat.
+                        cached = self.clip_cache.get(media_id, limit, count=not looked_up)
+                        if cached:
+                            await message.channel.send(file=discord.File(cached, filename="video.mp4"))
+                            return
+
+                    size_mb = os.path.getsize(file_path) / (1024 * 1024)
+                    if os.path.getsize(file_path) > limit:
+                        compressed = await self.compress_video(file_path, job, limit)
+                        if compressed:
+                            if media_id:
+                                compressed = self.clip_cache.put(media_id, str(limit), compressed)
+                            await message.channel.send(file=discord.File(compressed, filename="video_compressed.mp4"))
+                        else:
+                            await message.channel.send(f"File terlalu besar ({size_mb:.2f} MB)")
+                        return
 
-                await message.channel.send(file=discord.File(file_path, filename="video.mp4"))
-                os.remove(file_path)
+                    if media_id:
+                        file_path = self.clip_cache.put(media_id, "orig", file_path)
+                    await message.channel.send(file=discord.File(file_path, filename="video.mp4"))
 
             except Exception as e:
                 logger.error(f"Error saat proses video: {e}")
@@ -178,39 +327,33 @@ class link_cog(commands.Cog):
     async def gif_command(self, ctx, *, url: str = None):
         await ctx.typing()
         try:
-            video_path = None
-
-            if url and (url.startswith("http://") or url.startswith("https://")):
-                loop = asyncio.get_running_loop()
-                video_path = await loop.run_in_executor(None, self.download_media_yt_dlp, url, False)
-
-            elif ctx.message.reference:
-                try:
-                    replied = await ctx.channel.fetch_message(ctx.message.reference.message_id)
-                    for attachment in replied.attachments:
-                        if attachment.filename.lower().endswith(('.mp4', '.mov', '.webm', '.mkv')):
-                            unique_name = f"{uuid.uuid4().hex}_{attachment.filename}"
-                            video_path = os.path.join('temp_files', unique_name)
-                            await attachment.save(video_path)
-                            break
-                except Exception as e:
-                    logger.warning(f"Gagal ambil pesan reply: {e}")
-
-            if not video_path or not os.path.exists(video_path):
-                await ctx.send("Video tidak ditemukan atau format tidak didukung.", delete_after=5)
-                return
-
-            gif_path = self.convert_to_gif(video_path)
-            if gif_path and os.path.getsize(gif_path) < 8 * 1024 * 1024:
-                await ctx.send(file=discord.File(gif_path, filename="output.gif"))
-                self.clear_temp()
-            else:
-                await ctx.send("Gagal membuat GIF atau ukuran terlalu besar.", delete_after=5)
+            with self.new_job() as job:
+                video_path = None
+
+                if url and (url.startswith("http://") or url.startswith("https://")):
+                    loop = asyncio.get_running_loop()
+                    video_path = await loop.run_in_executor(None, self.download_media_yt_dlp, url, job, False)
+
+                elif ctx.message.reference:
+                    try:
+                        replied = await ctx.channel.fetch_message(ctx.message.reference.message_id)
+                        for attachment in replied.attachments:
+                            if attachment.filename.lower().endswith(('.mp4', '.mov', '.webm', '.mkv')):
+                                video_path = job.path(attachment.filename)
+                                await attachment.save(video_path)
+                                break
+                    except Exception as e:
+                        logger.warning(f"Gagal ambil pesan reply: {e}")
+
+                if not video_path or not os.path.exists(video_path):
+                    await ctx.send("Video tidak ditemukan atau format tidak didukung.", delete_after=5)
+                    return
 
-            os.remove(video_path)
-            if gif_path and os.path.exists(gif_path):
-                os.remove(gif_path)
-                self.clear_temp()
+                gif_path = await self.convert_to_gif(video_path, job)
+                if gif_path and os.path.getsize(gif_path) <= upload_limit(ctx.guild):
+                    await ctx.send(file=discord.File(gif_path, filename="output.gif"))
+                else:
+                    await ctx.send("Gagal membuat GIF atau ukuran terlalu besar.", delete_after=5)
 
         except Exception as e:
             logger.error(f"Gagal proses GIF: {e}")
@@ -232,34 +375,25 @@ class link_cog(commands.Cog):
                     await ctx.send("Link tidak valid. Harap mulai dengan http:// atau https://", delete_after=5)
                     return
 
-                loop = asyncio.get_running_loop()
-                file_path = await loop.run_in_executor(None, self.download_media_yt_dlp, url, True)
+                with self.new_job() as job:
+                    loop = asyncio.get_running_loop()
+                    file_path = await loop.run_in_executor(None, self.download_media_yt_dlp, url, job, True)
 
-                if not file_path or not os.path.exists(file_path) or os.path.getsize(file_path) < 1024:
-                    await ctx.send("Gagal mengambil audio dari link.", delete_after=5)
-                    return
-
-                if not file_path.endswith(".mp3"):
-                    new_path = file_path + ".mp3"
-                    os.rename(file_path, new_path)
-                    file_path = new_path
+                    if not file_path or not os.path.exists(file_path) or os.path.getsize(file_path) < 1024:
+                        await ctx.send("Gagal mengambil audio dari link.", delete_after=5)
+                        return
 
-                await ctx.send(file=discord.File(file_path, filename="audio.mp3"))
-                os.remove(file_path)
-                self.clear_temp()
+                    await ctx.send(file=discord.File(file_path, filename="audio.mp3"))
 
             elif ctx.message.attachments:
                 for attachment in ctx.message.attachments:
                     if attachment.filename.lower().endswith(('.mp4', '.mov', '.webm', '.mkv')):
-                        unique_name = f"{uuid.uuid4().hex}_{attachment.filename}"
-                        video_path = os.path.join(self.temp_folder, unique_name)
-                        await attachment.save(video_path)
-                        mp3_path = self.convert_to_mp3(video_path)
-                        if mp3_path:
-                            await ctx.send(file=discord.File(mp3_path, filename="audio.mp3"))
-                            os.remove(mp3_path)
-                            self.clear_temp()
-                        os.remove(video_path)
+                        with self.new_job() as job:
+                            video_path = job.path(attachment.filename)
+                            await attachment.save(video_path)
+                            mp3_path = await self.convert_to_mp3(video_path, job)
+                            if mp3_path:
+                                await ctx.send(file=discord.File(mp3_path, filename="audio.mp3"))
                         return
 
                 await ctx.send("Tidak ada video yang dilampirkan.", delete_after=5)
@@ -270,6 +404,18 @@ class link_cog(commands.Cog):
             logger.error(f"Gagal proses audio: {e}")
             await ctx.send("Gagal memproses audio.", delete_after=5)
 
+    @commands.command(name="clipcache", extras={"category": "Downloader"})
+    async def clip_cache_command(self, ctx):
+        st = self.clip_cache.snapshot()
+        embed = discord.Embed(title="📦 Clip Cache", color=discord.Color.blurple())
+        embed.add_field(name="File", value=f"**{st['files']}** • {st['size_mb']:.1f}/{st['max_mb']:.0f} MB", inline=False)
+        embed.add_field(
+            name="Statistik",
+            value=f"Hit: **{st['hits']}** • Miss: **{st['misses']}** • Dibuang: **{st['evictions']}**",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
     @commands.command(name="tts", extras={"category": "Downloader"})
     async def voice_command(self, ctx, *, text: str):
         await ctx.typing()
@@ -280,7 +426,6 @@ class link_cog(commands.Cog):
             return
 
         voice_id = "TxGEqnHWrfWFTfGW9XjX"  # Antoni
-        output_path = os.path.join('temp_files', f"{uuid.uuid4().hex}.mp3")
 
         url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
         headers = {
@@ -301,12 +446,8 @@ class link_cog(commands.Cog):
             response = requests.post(url, headers=headers, json=data)
             response.raise_for_status()
 
-            with open(output_path, "wb") as f:
-                f.write(response.content)
-
-            await ctx.send(file=discord.File(output_path, filename="tts.mp3"))
-            os.remove(output_path)
-            self.clear_temp()
+            # kecil → langsung dari memori, tidak perlu file sementara
+            await ctx.send(file=discord.File(io.BytesIO(response.content), filename="tts.mp3"))
 
         except Exception as e:
             logger.error(f"Gagal buat TTS ElevenLabs: {e}")
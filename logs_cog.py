@@ -156,9 +156,8 @@ class LogCog(commands.Cog):
         is_owner = ctx.author.id == ctx.guild.owner_id or ctx.author.id == 416234104317804544
         if not is_owner:
             return await ctx.send("❌ Hanya pemilik server atau developer yang bisa menggunakan command ini.")
-        db = connect_db()
-        set_channel_settings(db, ctx.guild.id, "log", channel.id)
-        db.close()
+        with connect_db() as db:
+            set_channel_settings(db, ctx.guild.id, "log", channel.id)
         await ctx.send(f"✅ Channel log telah disetel ke {channel.mention}")
 
     @commands.command(name="log", extras={"category": "Admin"})
@@ -174,35 +173,32 @@ class LogCog(commands.Cog):
     async def on_message_delete(self, message):
         if not message.guild or message.author.bot:
             return
-        db = connect_db()
-        log_event_discord(db, message.guild.id, message.author.id, "message_delete", {
-            "content": message.content,
-            "channel": message.channel.name
-        })
-        db.close()
+        with connect_db() as db:
+            log_event_discord(db, message.guild.id, message.author.id, "message_delete", {
+                "content": message.content,
+                "channel": message.channel.name
+            })
 
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
         if not before.guild or before.author.bot:
             return
-        db = connect_db()
-        log_event_discord(db, before.guild.id, before.author.id, "message_edit", {
-            "before": before.content,
-            "after": after.content,
-            "channel": before.channel.name
-        })
-        db.close()
+        with connect_db() as db:
+            log_event_discord(db, before.guild.id, before.author.id, "message_edit", {
+                "before": before.content,
+                "after": after.content,
+                "channel": before.channel.name
+            })
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         if not member.guild:
             return
-        db = connect_db()
-        log_event_discord(db, member.guild.id, member.id, "voice_update", {
-            "before_channel": before.channel.name if before.channel else None,
-            "after_channel": after.channel.name if after.channel else None
-        })
-        db.close()
+        with connect_db() as db:
+            log_event_discord(db, member.guild.id, member.id, "voice_update", {
+                "before_channel": before.channel.name if before.channel else None,
+                "after_channel": after.channel.name if after.channel else None
+            })
 
     @commands.Cog.listener()
     async def on_user_update(self, before, after):
@@ -210,18 +206,17 @@ class LogCog(commands.Cog):
         for guild in self.bot.guilds:
             member = guild.get_member(after.id)
             if member:
-                db = connect_db()
-                if before.name != after.name:
-                    log_event_discord(db, guild.id, after.id, "username_change", {
-                        "before": before.name,
-                        "after": after.name
-                    })
-                if before.discriminator != after.discriminator:
-                    log_event_discord(db, guild.id, after.id, "discriminator_change", {
-                        "before": before.discriminator,
-                        "after": after.discriminator
-                    })
-                db.close()
+                with connect_db() as db:
+                    if before.name != after.name:
+                        log_event_discord(db, guild.id, after.id, "username_change", {
+                            "before": before.name,
+                            "after": after.name
+                        })
+                    if before.discriminator != after.discriminator:
+                        log_event_discord(db, guild.id, after.id, "discriminator_change", {
+                            "before": before.discriminator,
+                            "after": after.discriminator
+                        })
 
 async def setup(bot):
     await bot.add_cog(LogCog(bot))
@@ -7,8 +7,11 @@ from rapidfuzz import process, fuzz
 from collections import defaultdict
 
 # Database dan migrasi
-from database import connect_db, ensure_database_exists, CommandManager, ChannelBlockManager
+from database import connect_db_dedicated, ensure_database_exists, get_pool, shutdown_db_executor, CommandManager, ChannelBlockManager
 from migration import migrate
+from guild_settings import GuildSettingsCache
+from ytdl_pool import close_ytdl_pools
+from transcode import shutdown_transcoder
 
 # Import semua cog
 from main_cog import main_cog
@@ -75,6 +78,7 @@ class MadBot(commands.Bot):
         self.db = None
         self.command_manager = None
         self.channel_manager = None
+        self.guild_settings = None
 
     async def on_message(self, message):
         if message.author.bot:
@@ -82,22 +86,40 @@ class MadBot(commands.Bot):
         await self.process_commands(message)
 
 
+    async def close(self):
+        if self.guild_settings:
+            self.guild_settings.stop()
+        await super().close()
+        await asyncio.to_thread(shutdown_db_executor)
+        get_pool().close_all()
+        if self.db:
+            self.db.close()
+        close_ytdl_pools()
+        shutdown_transcoder()
+
     async def setup_hook(self):
         self.remove_command("help")
 
         # siapkan DB
         ensure_database_exists()
-        self.db = connect_db()
+        # koneksi sendiri (bukan dari pool) — dipegang seumur bot
+        self.db = connect_db_dedicated()
 
         # migration
         migrate(self.db)
 
         # manager per-command
         self.command_manager = CommandManager()
+        self.command_manager.load_all()
 
         # manager per-channel (NEW)
         self.channel_manager = ChannelBlockManager(self.db)
 
+        # cache setting per guild (channel/feature/gamble/streak)
+        self.guild_settings = GuildSettingsCache()
+        await self.guild_settings.warmup()
+        self.guild_settings.start()
+
         # Load semua COG
         await self.add_cog(main_cog(self))
         await self.add_cog(image_cog(self))
@@ -8,6 +8,7 @@
 # ✔ Preload next track (low latency transition)
 # ✔ Auto leave after idle 60s / empty VC 60s
 # ✔ Queue / Loop / Skip / Shuffle
+# ✔ Player terpisah per guild (GuildPlayer + PlayerRegistry)
 #
 # Prefix mengikuti main bot (tidak ditentukan di sini)
 
@@ -15,16 +16,17 @@ import discord
 import asyncio
 import os
 import re
-import shutil
 import random
+import time
 import requests
+from collections import OrderedDict
 from discord.ext import commands
 from discord.ui import View, Button
-from yt_dlp import YoutubeDL
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 from dotenv import load_dotenv
-from database import set_channel_settings, get_channel_settings
+from ytdl_pool import ytdl_extract, prewarm_ytdl, get_ytdl_stats
+from transcode import get_transcoder
 
 load_dotenv()
 
@@ -38,21 +40,136 @@ sp = spotipy.Spotify(
     )
 )
 
+# ======================================================
+# SONG CACHE — metadata awet, stream URL sesuai expire
+# ======================================================
+
+SONG_CACHE_SIZE = 512
+SONG_META_TTL = 24 * 3600      # title/thumbnail/duration
+STREAM_DEFAULT_TTL = 3600      # kalau URL tidak punya parameter expire
+STREAM_EXPIRE_MARGIN = 300     # anggap basi 5 menit sebelum expire asli
+
+# resolver Spotify → YouTube
+RESOLVE_WORKERS = int(os.getenv("MUSIC_RESOLVE_WORKERS", 4))      # extract paralel (global)
+RESOLVE_LOOKAHEAD = int(os.getenv("MUSIC_RESOLVE_LOOKAHEAD", 8))  # lagu di depan play head
+
+# gapless: ffmpeg lagu berikut di-spawn sekian detik sebelum lagu sekarang habis
+PRELOAD_LEAD = 15
+
+# progress now-playing: satu scheduler untuk semua guild
+PROGRESS_INTERVAL = 5          # detik, jeda minimum antar edit per player
+PROGRESS_MAX_INTERVAL = 30     # batas atas saat sering kena rate limit
+PROGRESS_EDIT_RATE = float(os.getenv("MUSIC_PROGRESS_EDIT_RATE", 2))  # edit/detik total
+PROGRESS_SLOW_EDIT = 1.0       # edit selama ini (detik) → dianggap ditahan rate limit
+
+# tanpa efek → kirim Opus langsung (tanpa decode ke PCM + encode ulang di Python)
+OPUS_PASSTHROUGH = os.getenv("MUSIC_OPUS_PASSTHROUGH", "1") != "0"
+# compressor default di semua stream; matikan (0) supaya passthrough bisa dipakai
+AUTO_NORMALIZE = os.getenv("MUSIC_AUTO_NORMALIZE", "1") != "0"
+
+_EXPIRE_RE = re.compile(r"[?&/]expire[=/](\d+)")
+
+
+def stream_expires_at(url):
+    """Unix time kapan stream URL googlevideo kedaluwarsa (dari parameter expire)."""
+    if not url:
+        return 0
+    m = _EXPIRE_RE.search(url)
+    if m:
+        return int(m.group(1))
+    return time.time() + STREAM_DEFAULT_TTL
+
+
+def stream_is_fresh(url):
+    return bool(url) and stream_expires_at(url) - STREAM_EXPIRE_MARGIN > time.time()
+
+
+def info_to_song(info):
+    """Info yt-dlp → dict lagu yang dipakai queue."""
+    return {
+        "source": info.get("url"),
+        "title": info.get("title", "Unknown"),
+        "thumbnail": info.get("thumbnail"),
+        "duration": info.get("duration_string") or info.get("duration"),
+        "webpage_url": info.get("webpage_url"),
+        "acodec": info.get("acodec"),
+    }
+
+
+def make_placeholder(query):
+    """Entry queue yang belum di-resolve (judul = query pencarian)."""
+    return {"source": None, "title": query, "thumbnail": None, "duration": None}
+
+
+class SongCache:
+    """
+    LRU terbatas untuk hasil search_yt. Metadata (title/thumbnail/duration/
+    webpage_url) disimpan lama, stream URL hanya selama belum expire — setelah
+    itu entry tetap dipakai untuk metadata dan stream di-resolve ulang.
+    """
+
+    def __init__(self, maxsize=SONG_CACHE_SIZE, meta_ttl=SONG_META_TTL):
+        self.maxsize = maxsize
+        self.meta_ttl = meta_ttl
+        self.entries = OrderedDict()   # key → (meta dict, stored_at)
+        self.streams = {}              # key → (url, expires_at)
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return salinan hasil; source=None kalau stream sudah basi. None kalau miss."""
+        item = self.entries.get(key)
+        if item is None or time.time() - item[1] > self.meta_ttl:
+            if item is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        result = dict(item[0])
+        url, expires_at = self.streams.get(key, (None, 0))
+        if url and expires_at - STREAM_EXPIRE_MARGIN > time.time():
+            result["source"] = url
+            self.hits += 1
+        else:
+            self.streams.pop(key, None)
+            result["source"] = None
+            self.stale += 1
+        return result
+
+    def put(self, key, result):
+        meta = {k: v for k, v in result.items() if k != "source"}
+        self.entries[key] = (meta, time.time())
+        self.entries.move_to_end(key)
+        if result.get("source"):
+            self.streams[key] = (result["source"], stream_expires_at(result["source"]))
+
+        while len(self.entries) > self.maxsize:
+            old_key, _ = self.entries.popitem(last=False)
+            self.streams.pop(old_key, None)
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        self.streams.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+
 # ======================================================
 # BUTTON CONTROL VIEW
 # ======================================================
 
 class PlayerControl(View):
-    def __init__(self, cog):
+    def __init__(self, player):
         super().__init__(timeout=None)
-        self.cog = cog
+        self.player = player
 
     # Pause
     @discord.ui.button(emoji="⏸", style=discord.ButtonStyle.gray)
     async def pause(self, interaction: discord.Interaction, button: Button):
-        vc = self.cog.vc
-        if vc and vc.is_playing():
-            vc.pause()
+        if self.player.pause():
             await interaction.response.send_message("⏸ Lagu dijeda.", ephemeral=True)
         else:
             await interaction.response.send_message("⚠ Tidak ada lagu yang berjalan.", ephemeral=True)
@@ -60,9 +177,7 @@ class PlayerControl(View):
     # Resume
     @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.green)
     async def resume(self, interaction: discord.Interaction, button: Button):
-        vc = self.cog.vc
-        if vc and vc.is_paused():
-            vc.resume()
+        if self.player.resume():
             await interaction.response.send_message("▶️ Dilanjutkan.", ephemeral=True)
         else:
             await interaction.response.send_message("⚠ Tidak ada lagu yang dijeda.", ephemeral=True)
@@ -70,7 +185,7 @@ class PlayerControl(View):
     # Skip
     @discord.ui.button(emoji="⏭️", style=discord.ButtonStyle.blurple)
     async def skip(self, interaction: discord.Interaction, button: Button):
-        vc = self.cog.vc
+        vc = self.player.vc
         if vc and vc.is_playing():
             vc.stop()
             await interaction.response.send_message("⏭️ Skip lagu.", ephemeral=True)
@@ -80,45 +195,50 @@ class PlayerControl(View):
     # Volume Down
     @discord.ui.button(emoji="🔉", style=discord.ButtonStyle.gray)
     async def vol_down(self, interaction: discord.Interaction, button: Button):
-        self.cog.volume = max(0.1, self.cog.volume - 0.1)
-        if self.cog.vc and (self.cog.vc.is_playing() or self.cog.vc.is_paused()):
-            await self.cog.refresh_current()
+        player = self.player
+        player.volume = round(max(0.1, player.volume - 0.1), 2)
+        # jawab dulu: refresh bisa re-resolve + spawn ffmpeg (lewat batas 3 detik)
         await interaction.response.send_message(
-            f"🔉 Volume: {int(self.cog.volume*100)}%", ephemeral=True
+            f"🔉 Volume: {int(player.volume*100)}%", ephemeral=True
         )
+        if player.vc and (player.vc.is_playing() or player.vc.is_paused()):
+            await player.refresh_current()
     # Volume Up
     @discord.ui.button(emoji="🔊", style=discord.ButtonStyle.gray)
     async def vol_up(self, interaction: discord.Interaction, button: Button):
-        self.cog.volume = min(2.0, self.cog.volume + 0.1)
-        if self.cog.vc and (self.cog.vc.is_playing() or self.cog.vc.is_paused()):
-            await self.cog.refresh_current()
+        player = self.player
+        player.volume = round(min(2.0, player.volume + 0.1), 2)
+        # jawab dulu: refresh bisa re-resolve + spawn ffmpeg (lewat batas 3 detik)
         await interaction.response.send_message(
-            f"🔊 Volume: {int(self.cog.volume*100)}%", ephemeral=True
+            f"🔊 Volume: {int(player.volume*100)}%", ephemeral=True
         )
+        if player.vc and (player.vc.is_playing() or player.vc.is_paused()):
+            await player.refresh_current()
     # Loop toggle
     @discord.ui.button(emoji="🔁", style=discord.ButtonStyle.gray)
     async def loop_toggle(self, interaction: discord.Interaction, button: Button):
-        if self.cog.loop_mode is None:
-            self.cog.loop_mode = "single"
+        player = self.player
+        if player.loop_mode is None:
+            player.loop_mode = "single"
             msg = "🔁 Loop ON (single)"
-        elif self.cog.loop_mode == "single":
-            self.cog.loop_mode = "queue"
+        elif player.loop_mode == "single":
+            player.loop_mode = "queue"
             msg = "🔁 Loop ON (queue)"
         else:
-            self.cog.loop_mode = None
+            player.loop_mode = None
             msg = "⏹ Loop OFF"
 
         await interaction.response.send_message(msg, ephemeral=True)
 
 class QueueView(View):
-    def __init__(self, cog, ctx, page=0):
+    def __init__(self, player, ctx, page=0):
         super().__init__(timeout=30)
-        self.cog = cog
+        self.player = player
         self.ctx = ctx
         self.page = page
 
     async def update(self, interaction):
-        embed = self.cog.build_queue_page(self.ctx.guild, self.page)
+        embed = self.player.build_queue_page(self.page)
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="⬅ Prev", style=discord.ButtonStyle.gray)
@@ -129,7 +249,7 @@ class QueueView(View):
 
     @discord.ui.button(label="Next ➡", style=discord.ButtonStyle.gray)
     async def next_page(self, interaction, button):
-        total = len(self.cog.music_queue)
+        total = len(self.player.music_queue)
         max_page = max(0, (total - 1) // 10)
 
         if self.page < max_page:
@@ -137,19 +257,24 @@ class QueueView(View):
         await self.update(interaction)
 
 
-class music_cog(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
+# ======================================================
+# GUILD PLAYER — state playback satu guild
+# ======================================================
 
-        self.spotify_backlog = []
+class GuildPlayer:
+    """
+    Semua state playback milik satu guild: voice client, queue, filter,
+    progress task dan timer auto-leave. Resource bersama (search_yt, cache,
+    ffmpeg, channel musik) tetap di cog dan diakses lewat self.cog.
+    """
 
-        self.MAX_BATCH = 5
+    def __init__(self, cog, guild):
+        self.cog = cog
+        self.bot = cog.bot
+        self.guild = guild
 
         self.pending_spotify_tracks = []
-
-        self.loading_spotify = False
-
-        self.song_cache = {}  # title -> song_data
+        self.resolve_tasks = set()   # resolver placeholder yang sedang jalan
 
         # autoplay state
         self.autoplay = False
@@ -160,8 +285,10 @@ class music_cog(commands.Cog):
         # state untuk Now Playing / progress
         self.now_playing_message = None
         self.started_at = None          # datetime mulai lagu
+        self.paused_at = None           # datetime saat dijeda (progress berhenti)
+        self.current_profile = None     # output_profile() source yang sedang diputar
         self.current_duration = None    # durasi dalam detik
-        self.progress_task = None       # background task updater progress
+        self.last_progress = None       # progress bar terakhir yang sudah di-edit ke embed
 
         # playback state
         self.vc = None
@@ -175,27 +302,15 @@ class music_cog(commands.Cog):
         self.idle_disconnect_task = None
         self.empty_vc_disconnect_task = None
 
-        # preload next track holder
+        # preload next track holder (ffmpeg sudah jalan untuk lagu berikut)
         self.preloaded_source = None
+        self.preloaded_key = None       # (id(song), url, filter) saat disiapkan
+        self.preload_task = None
+        self.track_ended_at = None      # perf_counter saat lagu sebelumnya selesai
 
         # loop mode: None, "single", "queue"
         self.loop_mode = None
 
-        # channels where embed will be sent
-        self.channel_settings = {}
-
-        # database
-        self.db = bot.db
-
-        try:
-            self.channel_settings = get_channel_settings(self.db) or {}
-        except Exception as e:
-            print(f"[MUSIC_COG] Gagal load channel_settings dari DB: {e}")
-            self.channel_settings = {}
-
-        # FFmpeg executable (Windows)
-        self.ffmpeg_executable = shutil.which("ffmpeg")
-
         # Default volume
         self.volume = 1.0
 
@@ -203,7 +318,22 @@ class music_cog(commands.Cog):
         self.bassboost_level = None
 
         # normalize + compressor always on (from your selection)
-        self.auto_normalize = True
+        self.auto_normalize = AUTO_NORMALIZE
+
+        # accounting per player
+        self.created_at = time.monotonic()
+        self.songs_played = 0
+        self.play_errors = 0
+        self.ffmpeg_spawns = 0
+        self.opus_spawns = 0
+        self.tracks_resolved = 0
+        self.tracks_failed = 0
+        self.preload_hits = 0
+        self.preload_misses = 0
+        self.gap_count = 0
+        self.gap_total_ms = 0.0
+        self.gap_max_ms = 0.0
+        self.gap_last_ms = 0.0
 
     # ======================================================
     # FFmpeg FILTER BUILDER
@@ -212,15 +342,12 @@ class music_cog(commands.Cog):
     def build_ffmpeg_filters(self):
         """
         Build dynamic FFmpeg filter string based on:
-        - volume
         - bassboost
         - normalize/compander
+        Volume tidak lewat ffmpeg, tapi PCMVolumeTransformer (bisa diubah live).
         """
         filters = []
 
-        # Volume
-        filters.append(f"volume={self.volume}")
-
         # BassBoost
         if self.bassboost_level == "low":
             filters.append("bass=g=3")
@@ -239,6 +366,18 @@ class music_cog(commands.Cog):
 
         return ",".join(filters)
 
+    def uses_passthrough(self):
+        """
+        True kalau tidak ada filter sama sekali (volume 100%, bass off, dan
+        compressor auto_normalize mati) — output passthrough identik dengan
+        jalur PCM, hanya tanpa decode/encode ulang.
+        """
+        return OPUS_PASSTHROUGH and self.volume == 1.0 and not self.build_ffmpeg_filters()
+
+    def output_profile(self):
+        """Penanda jalur output; ffmpeg hasil preload hanya dipakai kalau masih sama."""
+        return "opus" if self.uses_passthrough() else self.build_ffmpeg_filters()
+
 
     # ======================================================
     # DURATION / PROGRESS HELPER
@@ -284,6 +423,29 @@ class music_cog(commands.Cog):
         s = t % 60
         return f"{m}:{s:02d}"
 
+    def position(self):
+        """Posisi lagu sekarang (detik), berhenti maju selama dijeda."""
+        if not self.started_at:
+            return 0.0
+        ref = self.paused_at or discord.utils.utcnow()
+        return max(0.0, (ref - self.started_at).total_seconds())
+
+    def pause(self):
+        if not self.vc or not self.vc.is_playing():
+            return False
+        self.vc.pause()
+        self.paused_at = discord.utils.utcnow()
+        return True
+
+    def resume(self):
+        if not self.vc or not self.vc.is_paused():
+            return False
+        self.vc.resume()
+        if self.paused_at and self.started_at:
+            self.started_at += discord.utils.utcnow() - self.paused_at
+        self.paused_at = None
+        return True
+
     def build_progress_bar(self):
         """
         Bangun progress bar teks, misal:
@@ -292,9 +454,7 @@ class music_cog(commands.Cog):
         if not self.current_duration or not self.started_at:
             return "▱▱▱▱▱▱▱▱▱▱ `0:00 / ??:??`"
 
-        now = discord.utils.utcnow()
-        elapsed = (now - self.started_at).total_seconds()
-        elapsed = max(0, min(self.current_duration, int(elapsed)))
+        elapsed = max(0, min(self.current_duration, int(self.position())))
 
         ratio = elapsed / self.current_duration if self.current_duration else 0
         total_blocks = 10
@@ -356,173 +516,188 @@ class music_cog(commands.Cog):
         return embed
 
     # ======================================================
-    # YOUTUBE SEARCH & EXTRACT — Anti SABR 2025
+    # PRELOAD NEXT TRACK
     # ======================================================
 
-    async def search_yt(self, query):
-        # Cek cache dulu
-        key = query.lower().strip()
-        if key in self.song_cache:
-            return self.song_cache[key]
-
-        loop = asyncio.get_running_loop()
-
-        def run():
-            YDL_OPTIONS = {
-                "format": "bestaudio/best",
-                "quiet": True,
-                "noplaylist": True,
-                "default_search": "auto",
-                "ignoreerrors": True,
-                "no_warnings": True,
-                "geo_bypass": True,
-                "nocheckcertificate": True,
-                "cachedir": False,
-            }
-            with YoutubeDL(YDL_OPTIONS) as ydl:
-                try:
-                    return ydl.extract_info(query, download=False)
-                except:
-                    return None
-
-        info = await loop.run_in_executor(None, run)
-        if not info:
-            return None
-
-        if "entries" in info:
-            info = info["entries"][0]
-
-        if not info:
-            return None
-
-        result = {
-            "source": info.get("url"),
-            "title": info.get("title", "Unknown"),
-            "thumbnail": info.get("thumbnail"),
-            "duration": info.get("duration_string") or info.get("duration"),
-        }
-
-        # Simpan ke CACHE!
-        self.song_cache[key] = result
-
-        return result
-
-
-    def yt_search_filtered(self, query):
+    def schedule_resolve(self):
+        """
+        Resolve placeholder di RESOLVE_LOOKAHEAD lagu terdepan secara paralel.
+        Hasil langsung mengisi dict lagu di queue begitu selesai, urutan tetap.
+        """
+        for song, _ in self.music_queue[:RESOLVE_LOOKAHEAD]:
+            if song.get("source") or song.get("resolving") or song.get("unresolvable"):
+                continue
+            song["resolving"] = True
+            task = asyncio.create_task(self._resolve_placeholder(song))
+            self.resolve_tasks.add(task)
+            task.add_done_callback(self.resolve_tasks.discard)
 
-        YDL_OPTIONS = {
-            "format": "bestaudio/best",
-            "quiet": True,
-            "noplaylist": True,
-            "default_search": "ytsearch10",
-            "ignoreerrors": True,
-            "extractor_args": {"youtube": {"player_client": ["default"]}},
-        }
+    async def _resolve_placeholder(self, song):
+        try:
+            result = await self.cog.resolve_query(song["title"])
+        except Exception as e:
+            print(f"[RESOLVE ERROR] {song['title']}: {e}")
+            result = None
+        finally:
+            song.pop("resolving", None)
+
+        if result:
+            song.update(result)
+            self.tracks_resolved += 1
+        else:
+            song["unresolvable"] = True
+            self.tracks_failed += 1
 
-        with YoutubeDL(YDL_OPTIONS) as ydl:
-            try:
-                info = ydl.extract_info(query, download=False)
-            except:
-                return None
+    async def preload_next(self):
+        # geser jendela lookahead setiap ganti lagu
+        self.schedule_resolve()
+        self.discard_preload()
 
-        if not info or "entries" not in info:
-            return None
+        if not self.music_queue:
+            return
 
-        def pick_audio(entry):
-            if "formats" not in entry:
-                return None
-            for f in entry["formats"]:
-                if f.get("acodec") != "none" and f.get("vcodec") == "none":
-                    return f.get("url")
-            return None
+        next_song, _ = self.music_queue[0]
 
-        for entry in info["entries"]:
-            if not entry:
-                continue
+        # Resolve kalau masih placeholder / stream URL sudah basi
+        await self.cog.ensure_stream(next_song)
 
-            dur = entry.get("duration")
-            title = entry.get("title", "").lower()
+        # ffmpeg lagu berikut disiapkan menjelang akhir lagu sekarang
+        self.preload_task = asyncio.create_task(self._prime_next(next_song))
 
-            if any(x in title for x in [
-                "mix", "playlist", "hour", "extended", "full album"
-            ]):
-                continue
+    async def _prime_next(self, song):
+        """
+        Spawn ffmpeg untuk lagu berikut PRELOAD_LEAD detik sebelum lagu sekarang
+        habis, supaya koneksi stream + buffer pertama sudah siap saat pindah lagu.
+        Tidak langsung di awal: koneksi yang nganggur lama bisa diputus server.
+        """
+        try:
+            if self.current_duration and self.started_at:
+                wait = self.current_duration - self.position() - PRELOAD_LEAD
+                if wait > 0:
+                    await asyncio.sleep(wait)
 
-            if not dur or dur < 120 or dur > 360:
-                continue
+            # queue berubah (skip/shuffle/clear) selama menunggu → batal
+            if not self.music_queue or self.music_queue[0][0] is not song:
+                return
 
-            audio_url = pick_audio(entry)
-            if not audio_url:
-                continue
+            await self.cog.ensure_stream(song)
+            if not song.get("source"):
+                return
 
-            return {
-                "source": audio_url,
-                "title": entry.get("title"),
-                "thumbnail": entry.get("thumbnail"),
-                "duration": entry.get("duration"),
-            }
+            self.discard_preload()
+            self.preloaded_source = self.build_audio_source(song["source"], song.get("acodec"))
+            self.preloaded_key = (id(song), song["source"], self.output_profile())
+        except asyncio.CancelledError:
+            pass
 
+    def take_preloaded(self, song):
+        """Pakai ffmpeg yang sudah disiapkan kalau masih cocok (lagu, URL, filter)."""
+        source = self.preloaded_source
+        key = self.preloaded_key
+        self.preloaded_source = None
+        self.preloaded_key = None
+
+        if (
+            source
+            and key == (id(song), song.get("source"), self.output_profile())
+            and stream_is_fresh(song.get("source"))
+        ):
+            self.preload_hits += 1
+            return source
+
+        if source:
+            source.cleanup()
+        self.preload_misses += 1
         return None
 
+    def discard_preload(self):
+        if self.preload_task and self.preload_task is not asyncio.current_task():
+            self.preload_task.cancel()
+        self.preload_task = None
 
-    # ======================================================
-    # SPOTIFY HANDLING
-    # ======================================================
-
-    def extract_spotify_id(self, url, type_):
-        pattern = rf"open\.spotify\.com/{type_}/([a-zA-Z0-9]+)"
-        m = re.search(pattern, url)
-        return m.group(1) if m else None
-
-    async def handle_spotify(self, query):
-        """
-        Convert Spotify → list of search keywords for YouTube
-        """
-        results = []
-
-        if "open.spotify.com/track" in query:
-            tid = self.extract_spotify_id(query, "track")
-            if tid:
-                track = sp.track(tid)
-                results.append(f"{track['name']} {track['artists'][0]['name']}")
-
-        elif "open.spotify.com/album" in query:
-            aid = self.extract_spotify_id(query, "album")
-            if aid:
-                album = sp.album(aid)
-                for t in album["tracks"]["items"]:
-                    results.append(f"{t['name']} {t['artists'][0]['name']}")
+        if self.preloaded_source:
+            self.preloaded_source.cleanup()
+        self.preloaded_source = None
+        self.preloaded_key = None
 
-        elif "open.spotify.com/playlist" in query:
-            pid = self.extract_spotify_id(query, "playlist")
-            if pid:
-                playlist = sp.playlist(pid)
-                for item in playlist["tracks"]["items"]:
-                    t = item["track"]
-                    results.append(f"{t['name']} {t['artists'][0]['name']}")
+    def record_gap(self):
+        """Jeda antara lagu sebelumnya selesai dan lagu ini mulai diputar."""
+        if self.track_ended_at is None:
+            return
+        gap_ms = (time.perf_counter() - self.track_ended_at) * 1000
+        self.track_ended_at = None
 
-        return results
+        self.gap_count += 1
+        self.gap_total_ms += gap_ms
+        self.gap_max_ms = max(self.gap_max_ms, gap_ms)
+        self.gap_last_ms = gap_ms
 
     # ======================================================
-    # PRELOAD NEXT TRACK
+    # FFmpeg SOURCE
     # ======================================================
 
-    async def preload_next(self):
-        if not self.music_queue:
-            return
-
-        next_song, _ = self.music_queue[0]
+    def build_audio_source(self, url, acodec=None, start=0):
+        before_opt = (
+            "-nostdin "
+            "-reconnect 1 "
+            "-reconnect_streamed 1 "
+            "-reconnect_delay_max 5 "
+            "-reconnect_on_network_error 1 "
+            "-reconnect_at_eof 1 "
+            "-protocol_whitelist file,http,https,tcp,tls,crypto "
+            "-fflags +genpts "
+        )
+        # mulai dari tengah lagu (ganti filter) → seek di input, bukan dari awal
+        if start > 0:
+            before_opt += f"-ss {start:.2f} "
+
+        self.ffmpeg_spawns += 1
+
+        # ======================================================
+        # Jalur Opus: stream YouTube biasanya sudah Opus → cukup remux (copy),
+        # selain itu ffmpeg yang encode ke Opus; discord.py tidak encode apa-apa
+        # ======================================================
+        if self.uses_passthrough():
+            self.opus_spawns += 1
+            return discord.FFmpegOpusAudio(
+                url,
+                codec="copy" if acodec == "opus" else None,
+                executable=self.cog.ffmpeg_executable,
+                before_options=before_opt,
+                options="-vn -threads 1 -nostats -hide_banner -loglevel error"
+            )
 
-        # Resolve hanya kalau masih placeholder
-        if next_song.get("source") in [None, ""]:
-            resolved = await self.search_yt(next_song["title"])
-            if resolved:
-                next_song["source"] = resolved["source"]
-                next_song["title"] = resolved["title"]
-                next_song["thumbnail"] = resolved["thumbnail"]
-                next_song["duration"] = resolved["duration"]
+        options_str = (
+            f'-vn -af "{self.build_ffmpeg_filters()}" '
+            "-threads 1 "
+            "-flags +low_delay "
+            "-ignore_unknown "
+            "-nostats -hide_banner -loglevel error"
+        )
 
+        return discord.FFmpegPCMAudio(
+            url,
+            executable=self.cog.ffmpeg_executable,
+            before_options=before_opt,
+            options=options_str
+        )
 
+    def wrap_volume(self, source):
+        """Jalur PCM dibungkus PCMVolumeTransformer; jalur Opus selalu volume 100%."""
+        if source.is_opus():
+            return source
+        return discord.PCMVolumeTransformer(source, volume=self.volume)
+
+    def needs_new_source(self):
+        """Apakah perubahan volume/bass butuh ffmpeg baru (bukan cukup ubah volume)."""
+        if self.current_profile == "opus":
+            return not self.uses_passthrough()
+        return self.current_profile != self.build_ffmpeg_filters()
+
+    def _after_callback(self):
+        return lambda e: self.bot.loop.call_soon_threadsafe(
+            asyncio.create_task, self._continue_next(e)
+        )
 
 
     # ======================================================
@@ -534,11 +709,12 @@ class music_cog(commands.Cog):
             self.is_playing = False
             self.current_song = None
             self.started_at = None
+            self.paused_at = None
+            self.current_profile = None
             self.current_duration = None
+            self.track_ended_at = None
 
-            if self.progress_task:
-                self.progress_task.cancel()
-                self.progress_task = None
+            self.stop_progress_updater()
 
             await self.start_idle_timer()
             return
@@ -558,63 +734,43 @@ class music_cog(commands.Cog):
             elif self.vc.channel != voice_channel:
                 await self.vc.move_to(voice_channel)
         except Exception as e:
-            print(f"[VC ERROR] {e}")
+            print(f"[VC ERROR] {self.guild.id}: {e}")
             self.is_playing = False
             return
 
         if self.vc.is_playing():
             self.vc.stop()
 
-        filter_chain = self.build_ffmpeg_filters()
-
-        before_opt = (
-            "-nostdin "
-            "-reconnect 1 "
-            "-reconnect_streamed 1 "
-            "-reconnect_delay_max 5 "
-            "-reconnect_on_network_error 1 "
-            "-reconnect_at_eof 1 "
-            "-protocol_whitelist file,http,https,tcp,tls,crypto "
-            "-fflags +genpts "
-        )
-
-        options_str = (
-            f'-vn -af "{filter_chain}" '
-            "-threads 1 "
-            "-flags +low_delay "
-            "-ignore_unknown "
-            "-nostats -hide_banner -loglevel error"
-        )
-
         try:
-            # Pastikan current_song sudah punya source
-            if self.current_song.get("source") in [None, ""]:
-                resolved = await self.search_yt(self.current_song["title"])
-                if resolved:
-                    self.current_song.update(resolved)
-
-            source = self.current_song["source"]  # ⬅⬅ HANYA ini, TANPA preloaded_source
-
-            self.vc.play(
-                discord.FFmpegPCMAudio(
-                    source,
-                    executable=self.ffmpeg_executable,
-                    before_options=before_opt,
-                    options=options_str
-                ),
-                after=lambda e: self.bot.loop.call_soon_threadsafe(
-                    asyncio.create_task, self._continue_next(e)
-                )
+            # Pastikan current_song punya source yang belum expire
+            await self.cog.ensure_stream(self.current_song)
+
+            if not self.current_song.get("source"):
+                print(f"[PLAY] Lewati, tidak ketemu di YouTube: {self.current_song['title']}")
+                self.play_errors += 1
+                self.discard_preload()
+                return await self.play_music()
+
+            # ⬅ pakai ffmpeg hasil preload kalau ada, kalau tidak spawn baru
+            audio = self.take_preloaded(self.current_song) or self.build_audio_source(
+                self.current_song["source"], self.current_song.get("acodec")
             )
 
+            self.vc.play(self.wrap_volume(audio), after=self._after_callback())
+            self.current_profile = self.output_profile()
+            self.record_gap()
+            self.started_at = discord.utils.utcnow()
+            self.paused_at = None
+            self.songs_played += 1
+
             self.is_playing = True
 
             embed = self.build_now_playing_embed()
             controls = PlayerControl(self)
             # Kalau belum ada message (lagu pertama), kirim embed baru
             if not self.now_playing_message:
-                self.now_playing_message = await self.send_to_music_channel(
-                    self.vc.guild, embed, view=controls
+                self.now_playing_message = await self.cog.send_to_music_channel(
+                    self.guild, embed, view=controls
                 )
             else:
                 # Kalau sudah ada (next track), cukup EDIT embed lama
@@ -622,8 +778,8 @@ class music_cog(commands.Cog):
                     await self.now_playing_message.edit(embed=embed, view=controls)
                 except:
                     # fallback kalau message hilang
-                    self.now_playing_message = await self.send_to_music_channel(
-                        self.vc.guild, embed, view=controls
+                    self.now_playing_message = await self.cog.send_to_music_channel(
+                        self.guild, embed, view=controls
                     )
 
             await self.start_progress_updater()
@@ -632,110 +788,89 @@ class music_cog(commands.Cog):
             await self.preload_next()
 
         except Exception as e:
-            print(f"[PLAY ERROR] {e}")
+            print(f"[PLAY ERROR] {self.guild.id}: {e}")
+            self.play_errors += 1
             self.is_playing = False
 
 
     async def refresh_current(self):
-        if not self.current_song or not self.vc:
+        """
+        Terapkan volume/bass ke lagu yang sedang diputar tanpa mengulang lagu:
+        - cukup volume (jalur PCM) → ubah PCMVolumeTransformer, ffmpeg tetap jalan
+        - filter / jalur Opus↔PCM berubah → ffmpeg baru mulai dari posisi
+          sekarang (-ss), source di-swap di voice client tanpa stop, jadi
+          callback after tidak terpanggil
+        """
+        if not self.current_song or not self.vc or not self.vc.source:
             return
 
-        self.skip_after = True
-
-        if self.vc.is_playing() or self.vc.is_paused():
-            self.vc.stop()
-
-        filter_chain = self.build_ffmpeg_filters()
+        if not self.needs_new_source():
+            if isinstance(self.vc.source, discord.PCMVolumeTransformer):
+                self.vc.source.volume = self.volume
+            return
 
-        before_opt = (
-            "-nostdin "
-            "-reconnect 1 "
-            "-reconnect_streamed 1 "
-            "-reconnect_on_network_error 1 "
-            "-reconnect_delay_max 5 "
-            "-reconnect_at_eof 1 "
-            "-protocol_whitelist file,http,https,tcp,tls,crypto"
-        )
+        # lagu bisa dijeda berjam-jam → stream URL mungkin sudah expire
+        await self.cog.ensure_stream(self.current_song)
+        if not self.vc or not self.vc.source or not self.current_song.get("source"):
+            return
 
-        options_str = (
-            f'-vn -af "{filter_chain}" '
-            "-threads 1 "
-            "-flags +low_delay "
-            "-ignore_unknown "
-            "-nostats -hide_banner -loglevel error"
-        )
+        was_paused = self.vc.is_paused()
+        new_source = self.wrap_volume(self.build_audio_source(
+            self.current_song["source"],
+            self.current_song.get("acodec"),
+            start=self.position()
+        ))
 
-        source = self.current_song["source"]  # ⬅ langsung pakai ini
+        old_source = self.vc.source
+        self.vc.source = new_source
+        self.current_profile = self.output_profile()
+        if was_paused:
+            self.vc.pause()
 
-        self.vc.play(
-            discord.FFmpegPCMAudio(
-                source,
-                executable=self.ffmpeg_executable,
-                before_options=before_opt,
-                options=options_str
-            ),
-            after=lambda e: self.bot.loop.call_soon_threadsafe(
-                asyncio.create_task, self._continue_next(e)
-            )
-        )
-        self.is_playing = True
-        self.started_at = discord.utils.utcnow()
+        # beri waktu thread player selesai membaca frame terakhir dari source lama
+        self.bot.loop.call_later(1, old_source.cleanup)
 
     async def start_progress_updater(self):
-        """
-        Background task untuk update field progress setiap beberapa detik.
-        """
+        """Daftarkan player ke ProgressScheduler milik cog (update progress embed)."""
         if not self.now_playing_message or not self.current_duration:
             return
+        self.cog.progress.register(self)
 
-        # stop task lama kalau ada
-        if self.progress_task:
-            self.progress_task.cancel()
-            self.progress_task = None
-
-        async def runner():
-            try:
-                while self.is_playing and self.vc and self.vc.is_connected():
-                    await asyncio.sleep(5)
-                    await self.update_progress_embed()
-            except asyncio.CancelledError:
-                pass
-
-        self.progress_task = asyncio.create_task(runner())
+    def stop_progress_updater(self):
+        self.cog.progress.unregister(self)
 
     async def update_progress_embed(self):
-        # kalau message hilang / None → STOP UPDATER
+        """Edit embed now-playing sekali. Return False kalau updater harus berhenti."""
         if not self.vc or not self.vc.is_connected():
-            return
+            return False
 
         if not self.now_playing_message:
             self.is_playing = False
-            if self.progress_task:
-                self.progress_task.cancel()
-                self.progress_task = None
-            return
+            self.stop_progress_updater()
+            return False
 
         try:
             embed = self.build_now_playing_embed()
             if not embed:
-                return
+                return False
 
             await self.now_playing_message.edit(embed=embed)
+            return True
 
         except discord.NotFound:
             # message sudah terhapus → stop updater
             self.now_playing_message = None
-            if self.progress_task:
-                self.progress_task.cancel()
-                self.progress_task = None
+            self.stop_progress_updater()
+            return False
 
         except discord.HTTPException as e:
-            # jika rate limit / cannot edit → stop saja biar ga spam
+            # rate limit → scheduler yang memperlambat, message tetap dipakai
+            if e.status == 429:
+                raise
+            # cannot edit → stop saja biar ga spam
             self.now_playing_message = None
-            if self.progress_task:
-                self.progress_task.cancel()
-                self.progress_task = None
-
+            self.stop_progress_updater()
+            return False
 
 
     # ======================================================
@@ -753,18 +888,18 @@ class music_cog(commands.Cog):
                 self.skip_after = False
                 return
 
+            self.track_ended_at = time.perf_counter()
+
             last_song = self.current_song
 
             if self.autoplay:
                 self.loop_mode = None
 
-            # Hentikan progress task
-            if self.progress_task:
-                self.progress_task.cancel()
-                self.progress_task = None
+            # Hentikan progress updater
+            self.stop_progress_updater()
 
             if error:
-                print(f"[AFTER ERROR] {error}")
+                print(f"[AFTER ERROR] {self.guild.id}: {error}")
 
             # ===== LOOP SINGLE =====
             if self.loop_mode == "single" and last_song and not self.skip_after:
@@ -785,7 +920,7 @@ class music_cog(commands.Cog):
                     base = last_song["title"].split("-")[0].strip()
                     q = f"{base} official audio"
 
-                    auto = self.yt_search_filtered(q)
+                    auto = self.cog.yt_search_filtered(q)
 
                     if auto:
                         print("[AUTOPLAY] Next filtered:", auto["title"])
@@ -793,7 +928,7 @@ class music_cog(commands.Cog):
                         return await self.play_music()
 
                     # fallback
-                    fallback = self.yt_search_filtered("popular songs official audio")
+                    fallback = self.cog.yt_search_filtered("popular songs official audio")
                     if fallback:
                         print("[AUTOPLAY] Fallback:", fallback["title"])
                         self.music_queue.append([fallback, self.vc.channel])
@@ -805,61 +940,12 @@ class music_cog(commands.Cog):
                 await self.start_idle_timer()
                 return
 
-            # ===== AUTO LOAD SPOTIFY BACKLOG =====
-            if self.loading_spotify and len(self.music_queue) < self.MAX_BATCH and len(self.spotify_backlog) > 0:
-                next_batch = self.spotify_backlog[:self.MAX_BATCH]
-                self.spotify_backlog = self.spotify_backlog[self.MAX_BATCH:]
-
-                vc = self.vc.channel
-                loaded = 0
-
-                # Replace placeholder sesuai posisi
-                replace_start = 0
-
-
-                infos = []
-                for t in next_batch:
-                    s = await self.search_yt(t)
-                    if s:
-                        infos.append(s)
-
-                for info in infos:
-                    real_song = {
-                        "source": info["source"],
-                        "title": info["title"],
-                        "thumbnail": info["thumbnail"],
-                        "duration": info["duration"],
-                    }
-                    self.music_queue[replace_start][0] = real_song
-                    replace_start += 1
-                    loaded += 1
-
-                print(f"[SPOTIFY BATCH] Updated {loaded} placeholders with real tracks.")
-
-
             # ===== LANJUT =====
             await self.play_music()
 
 
     # ======================================================
-    # AUTO PLAY MUSIC
-    # ======================================================
-
-    @commands.command(name="autoplay", aliases=["ap"], extras={"category": "Music"})
-    async def autoplay_cmd(self, ctx, mode=None):
-        if mode not in ["on", "off"]:
-            return await ctx.send("🔁 Autoplay:\n`autoplay on`\n`autoplay off`")
-
-        if mode == "on":
-            self.autoplay = True
-            await ctx.send("🔁 **Autoplay diaktifkan.** Bot akan memutar lagu rekomendasi ketika queue habis.")
-        else:
-            self.autoplay = False
-            await ctx.send("⏹ Autoplay dimatikan.")
-
-
-    # ======================================================
-    # AUTO LEAVE (IDLE & EMPTY VC)
+    # AUTO LEAVE (IDLE & EMPTY VC)
     # ======================================================
 
     async def start_idle_timer(self):
@@ -873,8 +959,7 @@ class music_cog(commands.Cog):
             try:
                 await asyncio.sleep(60)
                 if not self.is_playing and self.vc and self.vc.is_connected():
-                    await self.vc.disconnect()
-                    self.vc = None
+                    await self.cog.players.destroy(self.guild.id)
             except asyncio.CancelledError:
                 pass
 
@@ -892,44 +977,496 @@ class music_cog(commands.Cog):
                 await asyncio.sleep(60)
                 members = [m for m in voice_channel.members if not m.bot]
                 if len(members) == 0 and self.vc and self.vc.is_connected():
-                    await self.vc.disconnect()
-                    self.vc = None
-                    self.is_playing = False
+                    await self.cog.players.destroy(self.guild.id)
             except asyncio.CancelledError:
                 pass
 
         self.empty_vc_disconnect_task = asyncio.create_task(empty_task())
 
+    # ======================================================
+    # QUEUE PAGE
+    # ======================================================
+
+    def build_queue_page(self, page):
+        """
+        Display queue berbasis urutan REAL:
+        1. Now Playing
+        2. Antrian queue
+        """
+        display_list = []
+
+        # NOW PLAYING → selalu item 1
+        if self.current_song:
+            display_list.append({
+                "title": f"▶️ {self.current_song['title']}",
+                "duration": self.current_song.get("duration", "?")
+            })
+
+        # SISANYA → dari self.music_queue
+        for song, _ in self.music_queue:
+            display_list.append({
+                "title": song["title"],
+                "duration": song.get("duration", "?")
+            })
+
+        if len(display_list) == 0:
+            return discord.Embed(
+                title="📭 Queue kosong.",
+                color=discord.Color.red()
+            )
+
+        PER_PAGE = 10
+        start = page * PER_PAGE
+        end = start + PER_PAGE
+        total_pages = max(1, (len(display_list) - 1) // PER_PAGE + 1)
+
+        embed = discord.Embed(
+            title=f"🎶 Music Queue (Page {page+1}/{total_pages})",
+            color=discord.Color.blurple()
+        )
+
+        desc = ""
+        for i, song in enumerate(display_list[start:end], start=start + 1):
+            desc += f"**{i}.** {song['title']}\n"
+
+        embed.add_field(name="Daftar Lagu", value=desc, inline=False)
+
+        # ⬅ Tambahan
+        embed.set_footer(
+            text=f"Now Playing berada di urutan pertama • Total lagu: {len(display_list)}"
+        )
+
+        return embed
+
+    # ======================================================
+    # CLEANUP / STATS
+    # ======================================================
+
+    async def cleanup(self):
+        """Lepas semua resource player: task, voice client, queue."""
+        current = asyncio.current_task()
+        self.stop_progress_updater()
+        for task in (self.idle_disconnect_task, self.empty_vc_disconnect_task):
+            if task and task is not current:
+                task.cancel()
+        self.idle_disconnect_task = None
+        self.empty_vc_disconnect_task = None
+
+        for task in self.resolve_tasks:
+            task.cancel()
+        self.discard_preload()
+
+        self.is_playing = False
+        self.music_queue.clear()
+
+        if self.vc and self.vc.is_connected():
+            # jangan lanjut ke lagu berikut saat stop karena disconnect
+            self.skip_after = True
+            await self.vc.disconnect()
+        self.vc = None
+
+    def stats(self):
+        return {
+            "connected": bool(self.vc and self.vc.is_connected()),
+            "playing": self.is_playing,
+            "queue": len(self.music_queue),
+            "resolving": len(self.resolve_tasks),
+            "resolved": self.tracks_resolved,
+            "unresolved": self.tracks_failed,
+            "songs_played": self.songs_played,
+            "play_errors": self.play_errors,
+            "ffmpeg_spawns": self.ffmpeg_spawns,
+            "opus_spawns": self.opus_spawns,
+            "preload_hits": self.preload_hits,
+            "preload_misses": self.preload_misses,
+            "gap_avg_ms": self.gap_total_ms / self.gap_count if self.gap_count else 0.0,
+            "gap_max_ms": self.gap_max_ms,
+            "gap_last_ms": self.gap_last_ms,
+            "uptime": int(time.monotonic() - self.created_at),
+        }
+
+
+# ======================================================
+# PROGRESS SCHEDULER
+# ======================================================
+
+class ProgressScheduler:
+    """
+    Satu loop untuk update progress embed semua player. Tiap putaran hanya
+    player yang progress bar-nya berubah yang di-edit, diberi jarak sesuai
+    PROGRESS_EDIT_RATE; interval melebar kalau player banyak atau edit mulai
+    ditahan rate limit, lalu pelan-pelan kembali ke PROGRESS_INTERVAL.
+    """
+
+    def __init__(self, rate=PROGRESS_EDIT_RATE):
+        self.rate = rate
+        self.players = set()
+        self.interval = PROGRESS_INTERVAL
+        self.task = None
+
+        self.edits = 0
+        self.skipped = 0
+        self.throttled = 0
+
+    def register(self, player):
+        player.last_progress = None
+        self.players.add(player)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def unregister(self, player):
+        self.players.discard(player)
+
+    async def _run(self):
+        try:
+            while self.players:
+                started = time.monotonic()
+                await self.tick()
+                await asyncio.sleep(max(0, self.interval - (time.monotonic() - started)))
+        except asyncio.CancelledError:
+            pass
+
+    async def tick(self):
+        slow = False
+
+        for player in list(self.players):
+            if player not in self.players:
+                continue
+            if not player.is_playing or not player.vc or not player.vc.is_connected():
+                self.unregister(player)
+                continue
+
+            # dijeda / tidak ada yang berubah → tidak perlu edit
+            bar = player.build_progress_bar()
+            if bar == player.last_progress:
+                self.skipped += 1
+                continue
+
+            t0 = time.monotonic()
+            try:
+                ok = await player.update_progress_embed()
+            except discord.HTTPException:
+                self.throttled += 1
+                slow = True
+                continue
+
+            if not ok:
+                continue
+
+            player.last_progress = bar
+            self.edits += 1
+            if time.monotonic() - t0 > PROGRESS_SLOW_EDIT:
+                self.throttled += 1
+                slow = True
+
+            await asyncio.sleep(1 / self.rate)
+
+        self.adapt(slow)
+
+    def adapt(self, slow):
+        # minimal selebar waktu yang dibutuhkan untuk edit semua player
+        base = max(PROGRESS_INTERVAL, len(self.players) / self.rate)
+        if slow:
+            self.interval = max(base, self.interval * 2)
+        else:
+            self.interval = max(base, self.interval - 1)
+        self.interval = min(PROGRESS_MAX_INTERVAL, self.interval)
+
+    def stop(self):
+        self.players.clear()
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+
+# ======================================================
+# PLAYER REGISTRY
+# ======================================================
+
+class PlayerRegistry:
+    """guild_id → GuildPlayer. Player dibuat saat dibutuhkan dan dibuang saat keluar VC."""
+
+    def __init__(self, cog):
+        self.cog = cog
+        self.players = {}
+        self.created = 0
+        self.destroyed = 0
+
+    def get(self, guild):
+        """Ambil / buat player. Hanya untuk join/play — command lain pakai peek()."""
+        player = self.players.get(guild.id)
+        if player is None:
+            player = self.players[guild.id] = GuildPlayer(self.cog, guild)
+            self.created += 1
+        return player
+
+    def peek(self, guild_id):
+        return self.players.get(guild_id)
+
+    async def destroy(self, guild_id):
+        player = self.players.pop(guild_id, None)
+        if player is None:
+            return
+        self.destroyed += 1
+        await player.cleanup()
+
+    async def destroy_all(self):
+        for guild_id in list(self.players):
+            await self.destroy(guild_id)
+
+    def __iter__(self):
+        return iter(list(self.players.values()))
+
+    def __len__(self):
+        return len(self.players)
+
+
+class music_cog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+        self.song_cache = SongCache()  # query → hasil search_yt (LRU + expire)
+
+        # satu GuildPlayer per guild
+        self.players = PlayerRegistry(self)
+
+        # update progress embed semua guild lewat satu loop
+        self.progress = ProgressScheduler()
+
+        # resolver query → YouTube: worker terbatas + dedup query yang sama
+        self.resolve_sem = asyncio.Semaphore(RESOLVE_WORKERS)
+        self.resolving = {}   # query key → Task
+
+        # FFmpeg executable (Windows)
+        self.ffmpeg_executable = get_transcoder().executable
+
+    async def cog_load(self):
+        # siapkan instance YoutubeDL supaya request pertama tidak bayar init extractor
+        await asyncio.to_thread(prewarm_ytdl, "audio-search", "filtered-search")
+
+    async def cog_unload(self):
+        await self.players.destroy_all()
+        self.progress.stop()
+
+    # ======================================================
+    # YOUTUBE SEARCH & EXTRACT — Anti SABR 2025
+    # ======================================================
+
+    async def search_yt(self, query):
+        # Cek cache dulu
+        key = query.lower().strip()
+        cached = self.song_cache.get(key)
+        if cached and cached["source"]:
+            return cached
+
+        # metadata masih ada tapi stream basi → resolve langsung dari URL video,
+        # tidak perlu search ulang
+        target = cached.get("webpage_url") if cached else None
+
+        result = await self.extract_yt(target or query)
+        if not result:
+            return None
+
+        # Simpan ke CACHE!
+        self.song_cache.put(key, result)
+
+        return result
+
+    async def extract_yt(self, query):
+        loop = asyncio.get_running_loop()
+
+        def run():
+            try:
+                return ytdl_extract("audio-search", query)
+            except:
+                return None
+
+        info = await loop.run_in_executor(None, run)
+        if not info:
+            return None
+
+        if "entries" in info:
+            info = info["entries"][0]
+
+        if not info:
+            return None
+
+        return info_to_song(info)
+
+    async def resolve_query(self, query):
+        """search_yt lewat worker pool; query identik yang sedang jalan ditumpangi."""
+        key = query.lower().strip()
+        task = self.resolving.get(key)
+        if task is None:
+            task = asyncio.create_task(self._resolve_limited(query))
+            self.resolving[key] = task
+            task.add_done_callback(lambda _: self.resolving.pop(key, None))
+        # shield: satu pemanggil batal tidak membatalkan pemanggil lain
+        return await asyncio.shield(task)
+
+    async def _resolve_limited(self, query):
+        async with self.resolve_sem:
+            return await self.search_yt(query)
+
+    async def ensure_stream(self, song):
+        """
+        Pastikan song["source"] bisa diputar: placeholder / URL yang sudah
+        (hampir) expire di-resolve ulang tepat sebelum dipakai.
+        """
+        if stream_is_fresh(song.get("source")):
+            return song
+
+        if song.get("webpage_url"):
+            resolved = await self.extract_yt(song["webpage_url"])
+        else:
+            resolved = await self.resolve_query(song["title"])
+
+        if resolved:
+            song.update(resolved)
+        return song
+
+
+    def yt_search_filtered(self, query):
+
+        try:
+            info = ytdl_extract("filtered-search", query)
+        except:
+            return None
+
+        if not info or "entries" not in info:
+            return None
+
+        def pick_audio(entry):
+            if "formats" not in entry:
+                return None
+            for f in entry["formats"]:
+                if f.get("acodec") != "none" and f.get("vcodec") == "none":
+                    return f
+            return None
+
+        for entry in info["entries"]:
+            if not entry:
+                continue
+
+            dur = entry.get("duration")
+            title = entry.get("title", "").lower()
+
+            if any(x in title for x in [
+                "mix", "playlist", "hour", "extended", "full album"
+            ]):
+                continue
+
+            if not dur or dur < 120 or dur > 360:
+                continue
+
+            audio = pick_audio(entry)
+            if not audio or not audio.get("url"):
+                continue
+
+            return {
+                "source": audio["url"],
+                "title": entry.get("title"),
+                "thumbnail": entry.get("thumbnail"),
+                "duration": entry.get("duration"),
+                "webpage_url": entry.get("webpage_url"),
+                "acodec": audio.get("acodec"),
+            }
+
+        return None
+
+
+    # ======================================================
+    # SPOTIFY HANDLING
+    # ======================================================
+
+    def extract_spotify_id(self, url, type_):
+        pattern = rf"open\.spotify\.com/{type_}/([a-zA-Z0-9]+)"
+        m = re.search(pattern, url)
+        return m.group(1) if m else None
+
+    async def handle_spotify(self, query):
+        """
+        Convert Spotify → list of search keywords for YouTube
+        """
+        results = []
+
+        if "open.spotify.com/track" in query:
+            tid = self.extract_spotify_id(query, "track")
+            if tid:
+                track = sp.track(tid)
+                results.append(f"{track['name']} {track['artists'][0]['name']}")
+
+        elif "open.spotify.com/album" in query:
+            aid = self.extract_spotify_id(query, "album")
+            if aid:
+                album = sp.album(aid)
+                for t in album["tracks"]["items"]:
+                    results.append(f"{t['name']} {t['artists'][0]['name']}")
+
+        elif "open.spotify.com/playlist" in query:
+            pid = self.extract_spotify_id(query, "playlist")
+            if pid:
+                playlist = sp.playlist(pid)
+                for item in playlist["tracks"]["items"]:
+                    t = item["track"]
+                    results.append(f"{t['name']} {t['artists'][0]['name']}")
+
+        return results
+
+
+    # ======================================================
+    # AUTO PLAY MUSIC
+    # ======================================================
+
+    @commands.command(name="autoplay", aliases=["ap"], extras={"category": "Music"})
+    async def autoplay_cmd(self, ctx, mode=None):
+        if mode not in ["on", "off"]:
+            return await ctx.send("🔁 Autoplay:\n`autoplay on`\n`autoplay off`")
+
+        player = self.players.peek(ctx.guild.id)
+        if not player:
+            return await ctx.send("❌ Tidak ada yang sedang diputar.")
+
+        if mode == "on":
+            player.autoplay = True
+            await ctx.send("🔁 **Autoplay diaktifkan.** Bot akan memutar lagu rekomendasi ketika queue habis.")
+        else:
+            player.autoplay = False
+            await ctx.send("⏹ Autoplay dimatikan.")
+
+
     # ======================================================
     # VOICE STATE LISTENER (DETECT EMPTY VC)
     # ======================================================
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
-        if not self.vc or not self.vc.channel:
+        player = self.players.peek(member.guild.id)
+        if not player or not player.vc or not player.vc.channel:
             return
 
-        vc = self.vc.channel
+        vc = player.vc.channel
 
         if before.channel == vc or after.channel == vc:
             members = [m for m in vc.members if not m.bot]
             if len(members) == 0:
-                await self.start_empty_vc_timer(vc)
+                await player.start_empty_vc_timer(vc)
             else:
-                if self.empty_vc_disconnect_task:
-                    self.empty_vc_disconnect_task.cancel()
-                    self.empty_vc_disconnect_task = None
+                if player.empty_vc_disconnect_task:
+                    player.empty_vc_disconnect_task.cancel()
+                    player.empty_vc_disconnect_task = None
 
     @commands.Cog.listener()
     async def on_disconnect(self):
         # untuk kasus region pindah / IP drop
-        if self.vc and not self.vc.is_connected():
-            try:
-                await asyncio.sleep(2)
-                await self.vc.connect()
-                print("[VC] Reconnected after drop.")
-            except:
-                pass
+        for player in self.players:
+            if player.vc and not player.vc.is_connected():
+                try:
+                    await asyncio.sleep(2)
+                    await player.vc.connect()
+                    print(f"[VC] Reconnected after drop ({player.guild.id}).")
+                except:
+                    pass
 
 
     # ======================================================
@@ -942,106 +1479,23 @@ class music_cog(commands.Cog):
             return await ctx.send("🔊 Join VC dulu.")
 
         vc = ctx.author.voice.channel
+        player = self.players.get(ctx.guild)
 
         # Spotify link
         if "open.spotify.com" in query:
-            self.loading_spotify = True
             tracks = await self.handle_spotify(query)
-            self.pending_spotify_tracks = tracks.copy()
             if not tracks:
                 return await ctx.send("❌ Tidak bisa ambil lagu dari Spotify.")
+            player.pending_spotify_tracks = tracks.copy()
+
+            # Semua track masuk sebagai placeholder; resolver paralel mengisi
+            # lagu-lagu terdepan, sisanya menyusul saat play head maju
+            for t in tracks:
+                player.music_queue.append([make_placeholder(t), vc])
+            player.schedule_resolve()
 
-            first_play = False
-            # ambil batch pertama
-            first_batch = tracks[:self.MAX_BATCH]
-            backlog = tracks[self.MAX_BATCH:]
-
-            self.spotify_backlog = backlog
-            self.loading_spotify = True
-
-            # parallel-safe batch convert
-            loop = asyncio.get_running_loop()
-
-            def convert_list(batch):
-                results = []
-                with YoutubeDL({
-                    "format": "bestaudio/best",
-                    "quiet": True,
-                    "noplaylist": True,
-                    "default_search": "auto",
-                    "ignoreerrors": True,
-                    "no_warnings": True,
-                }) as ydl:
-                    for q in batch:
-                        try:
-                            info = ydl.extract_info(q, download=False)
-                            if info:
-                                if "entries" in info:
-                                    info = info["entries"][0]
-                                results.append(info)
-                        except:
-                            pass
-                return results
-
-            # convert hanya track ke-2 dst sampai MAX_BATCH
-            batch_for_convert = tracks[1:self.MAX_BATCH]
-            infos = await loop.run_in_executor(None, lambda: convert_list(batch_for_convert))
-
-            added = 0
-            # Masukkan placeholder terlebih dahulu untuk SEMUA tracks
-            # === FIX: convert lagu pertama dulu (agar tidak skip ke lagu #2) ===
-            first_info = await self.search_yt(tracks[0])
-            # Paksa current_song punya semua data
-            if 'duration' not in first_info or not first_info['duration']:
-                first_info['duration'] = first_info.get('duration_string') or first_info.get('duration')
-
-            if not first_info.get("thumbnail"):
-                # Resolusi ulang untuk ambil thumbnail
-                fixed = await self.search_yt(first_info["title"])
-                if fixed:
-                    first_info["thumbnail"] = fixed.get("thumbnail")
-                    first_info["duration"] = fixed.get("duration", first_info["duration"])
-
-            if not first_info:
-                return await ctx.send("❌ Gagal memuat lagu pertama dari Spotify.")
-
-            # Masukkan track pertama sebagai REAL SONG
-            self.music_queue.append([
-                {
-                    "source": first_info["source"],
-                    "title": first_info["title"],
-                    "thumbnail": first_info["thumbnail"],
-                    "duration": first_info["duration"],
-                },
-                vc
-            ])
-
-            # Masukkan sisanya sebagai placeholder
-            for t in tracks[1:]:
-                self.music_queue.append([
-                    {"source": None, "title": t, "thumbnail": None, "duration": None},
-                    vc
-                ])
-
-
-            # Setelah itu baru process batch pertama
-            insert_index = 1  # index 0 sudah real (first_info)
-            for info in infos:
-                real_song = {
-                    "source": info.get("url"),
-                    "title": info.get("title"),
-                    "thumbnail": info.get("thumbnail"),
-                    "duration": info.get("duration_string") or info.get("duration"),
-                }
-                if insert_index < len(self.music_queue):
-                    self.music_queue[insert_index][0] = real_song
-                insert_index += 1
-
-
-
-
-            if not self.is_playing:
-                await self.play_music()
+            if not player.is_playing:
+                await player.play_music()
 
             total_tracks = len(tracks)
             await ctx.send(f"🎧 Berhasil menambahkan **{total_tracks}** lagu ke queue.")
@@ -1050,21 +1504,19 @@ class music_cog(commands.Cog):
 
 
         # YouTube search
-        self.loading_spotify = False
-        self.spotify_backlog.clear()
         song = await self.search_yt(query)
 
         if not song:
             return await ctx.send("❌ Lagu tidak ditemukan.")
 
-        self.music_queue.append([song, vc])
+        player.music_queue.append([song, vc])
         # Jika user tambah lagu, autoplay dimatikan agar tidak bentrok
-        if self.autoplay:
-            self.autoplay = False
+        if player.autoplay:
+            player.autoplay = False
             await ctx.send("⏹ Autoplay dimatikan karena kamu menambahkan lagu manual.")
 
-        if not self.is_playing:
-            await self.play_music()
+        if not player.is_playing:
+            await player.play_music()
 
         await ctx.send(f"🎵 Ditambahkan: **{song['title']}**")
 
@@ -1074,81 +1526,32 @@ class music_cog(commands.Cog):
 
     @commands.command(name="skip", aliases=["s", "next"], extras={"category": "Music"})
     async def skip_cmd(self, ctx):
-        if not self.vc or not self.vc.is_playing():
+        player = self.players.peek(ctx.guild.id)
+        if not player or not player.vc or not player.vc.is_playing():
             return await ctx.send("❌ Tidak ada lagu.")
 
-        self.vc.stop()
+        player.vc.stop()
         await ctx.send("⏭️ Skip.")
 
     # ======================================================
     # COMMAND: QUEUE AND LOOP
     # ======================================================
 
-    def build_queue_page(self, guild, page):
-        """
-        Display queue berbasis urutan REAL:
-        1. Now Playing
-        2. Antrian queue
-        """
-        display_list = []
-
-        # NOW PLAYING → selalu item 1
-        if self.current_song:
-            display_list.append({
-                "title": f"▶️ {self.current_song['title']}",
-                "duration": self.current_song.get("duration", "?")
-            })
-
-        # SISANYA → dari self.music_queue
-        for song, _ in self.music_queue:
-            display_list.append({
-                "title": song["title"],
-                "duration": song.get("duration", "?")
-            })
-
-        if len(display_list) == 0:
-            return discord.Embed(
-                title="📭 Queue kosong.",
-                color=discord.Color.red()
-            )
-
-        PER_PAGE = 10
-        start = page * PER_PAGE
-        end = start + PER_PAGE
-        total_pages = max(1, (len(display_list) - 1) // PER_PAGE + 1)
-
-        embed = discord.Embed(
-            title=f"🎶 Music Queue (Page {page+1}/{total_pages})",
-            color=discord.Color.blurple()
-        )
-
-        desc = ""
-        for i, song in enumerate(display_list[start:end], start=start + 1):
-            desc += f"**{i}.** {song['title']}\n"
-
-        embed.add_field(name="Daftar Lagu", value=desc, inline=False)
-
-        # ⬅ Tambahan
-        embed.set_footer(
-            text=f"Now Playing berada di urutan pertama • Total lagu: {len(display_list)}"
-        )
-
-        return embed
-
-
     @commands.command(name="queue", aliases=["q"], extras={"category": "Music"})
     async def queue_cmd(self, ctx):
-        if not self.current_song and len(self.music_queue) == 0:
+        player = self.players.peek(ctx.guild.id)
+        if not player or (not player.current_song and len(player.music_queue) == 0):
             return await ctx.send("📭 Queue kosong.")
 
-        embed = self.build_queue_page(ctx.guild, page=0)
-        view = QueueView(self, ctx, page=0)
+        embed = player.build_queue_page(page=0)
+        view = QueueView(player, ctx, page=0)
 
         await ctx.send(embed=embed, view=view)
 
     @commands.command(name="loop", extras={"category": "Music"})
     async def loop_cmd(self, ctx, mode=None):
         valid_modes = ["single", "queue", "off"]
+        player = self.players.peek(ctx.guild.id)
 
         if mode not in valid_modes:
             embed = discord.Embed(
@@ -1172,16 +1575,19 @@ class music_cog(commands.Cog):
                 inline=False
             )
 
-            current = self.loop_mode or "off"
+            current = (player.loop_mode if player else None) or "off"
             embed.set_footer(text=f"Current loop mode: {current}")
             return await ctx.send(embed=embed)
 
+        if not player:
+            return await ctx.send("❌ Tidak ada yang sedang diputar.")
+
         # Set mode
         if mode == "off":
-            self.loop_mode = None
+            player.loop_mode = None
             status = "off"
         else:
-            self.loop_mode = mode
+            player.loop_mode = mode
             status = mode
 
         embed = discord.Embed(
@@ -1197,41 +1603,24 @@ class music_cog(commands.Cog):
     # ======================================================
     @commands.command(name="shuffle", extras={"category": "Music"})
     async def shuffle_cmd(self, ctx):
+        player = self.players.peek(ctx.guild.id)
+
         # kalau tidak ada lagu
-        if len(self.pending_spotify_tracks) == 0 and len(self.music_queue) < 2:
+        if not player or (len(player.pending_spotify_tracks) == 0 and len(player.music_queue) < 2):
             return await ctx.send("🔀 Tidak ada yang bisa di-shuffle.")
 
         # 1. SHUFFLE FULL LIST
-        if len(self.pending_spotify_tracks) > 0:
-            random.shuffle(self.pending_spotify_tracks)
+        if len(player.pending_spotify_tracks) > 0:
+            random.shuffle(player.pending_spotify_tracks)
 
             # ambil VC user (kalau ada)
             vc = ctx.author.voice.channel if ctx.author.voice else None
 
-            # bangun ulang queue dari hasil shuffle
-            self.music_queue.clear()
-
-            first_info = await self.search_yt(self.pending_spotify_tracks[0])
-            if not first_info:
-                return await ctx.send("❌ Gagal memuat lagu pertama dari Spotify setelah shuffle.")
-
-            # masukkan track pertama sebagai REAL
-            self.music_queue.append([
-                {
-                    "source": first_info["source"],
-                    "title": first_info["title"],
-                    "thumbnail": first_info["thumbnail"],
-                    "duration": first_info["duration"],
-                },
-                vc
-            ])
-
-            # sisanya placeholder
-            for t in self.pending_spotify_tracks[1:]:
-                self.music_queue.append([
-                    {"source": None, "title": t, "thumbnail": None, "duration": None},
-                    vc
-                ])
+            # bangun ulang queue dari hasil shuffle (hasil resolve lama tetap kena cache)
+            player.music_queue.clear()
+            for t in player.pending_spotify_tracks:
+                player.music_queue.append([make_placeholder(t), vc])
+            player.schedule_resolve()
 
             return await ctx.send("🔀 Queue telah di-shuffle!")
 
@@ -1244,19 +1633,22 @@ class music_cog(commands.Cog):
 
     @commands.command(name="volume", aliases=["vol"], extras={"category": "Music"})
     async def volume_cmd(self, ctx, vol: int = None):
+        player = self.players.peek(ctx.guild.id)
+        if not player:
+            return await ctx.send("❌ Tidak ada yang sedang diputar.")
         if vol is None:
-            return await ctx.send(f"🔊 Volume sekarang: **{int(self.volume * 100)}%**")
+            return await ctx.send(f"🔊 Volume sekarang: **{int(player.volume * 100)}%**")
 
         if vol < 1 or vol > 200:
             return await ctx.send("❌ Volume harus 1–200%")
 
-        self.volume = vol / 100
+        player.volume = vol / 100
 
         await ctx.send(f"🔊 Volume diubah ke **{vol}%**")
 
         # Refresh audio jika sedang bermain / dijeda
-        if self.vc and (self.vc.is_playing() or self.vc.is_paused()):
-            await self.refresh_current()
+        if player.vc and (player.vc.is_playing() or player.vc.is_paused()):
+            await player.refresh_current()
 
     # ======================================================
     # COMMAND: BASSBOOST
@@ -1276,18 +1668,22 @@ class music_cog(commands.Cog):
                 "`bass insane`"
             )
 
+        player = self.players.peek(ctx.guild.id)
+        if not player:
+            return await ctx.send("❌ Tidak ada yang sedang diputar.")
+
         if level == "off":
-            self.bassboost_level = None
+            player.bassboost_level = None
             msg = "BassBoost dimatikan."
         else:
-            self.bassboost_level = level
+            player.bassboost_level = level
             msg = f"BassBoost diatur ke **{level.upper()}**"
 
         await ctx.send(msg)
 
         # sama seperti volume: refresh lagu yg lagi diputar
-        if self.vc and (self.vc.is_playing() or self.vc.is_paused()):
-            await self.refresh_current()
+        if player.vc and (player.vc.is_playing() or player.vc.is_paused()):
+            await player.refresh_current()
 
     # ======================================================
     # COMMAND: DISCONNECT
@@ -1295,16 +1691,95 @@ class music_cog(commands.Cog):
 
     @commands.command(name="disconnect", aliases=["dc", "stop", "leave"], extras={"category": "Music"})
     async def dc_cmd(self, ctx):
-        if not self.vc or not self.vc.is_connected():
+        player = self.players.peek(ctx.guild.id)
+        if not player or not player.vc or not player.vc.is_connected():
             return await ctx.send("❌ Bot tidak sedang di VC.")
 
-        await self.vc.disconnect()
-        self.vc = None
-        self.is_playing = False
-        self.music_queue.clear()
+        await self.players.destroy(ctx.guild.id)
 
         await ctx.send("👋 Bot keluar dari VC.")
 
+    # ======================================================
+    # COMMAND: MUSIC STATS (per player)
+    # ======================================================
+
+    @commands.command(name="musicstats", extras={"category": "Music"})
+    async def music_stats_cmd(self, ctx):
+        embed = discord.Embed(title="🎛 Music Players", color=discord.Color.blurple())
+        embed.add_field(
+            name="Global",
+            value=(
+                f"Aktif: **{len(self.players)}** • "
+                f"Dibuat: **{self.players.created}** • Dibuang: **{self.players.destroyed}**"
+            ),
+            inline=False
+        )
+        progress = self.progress
+        embed.add_field(
+            name="Progress Updater",
+            value=(
+                f"Player: **{len(progress.players)}** • Interval: **{progress.interval:.0f}s**\n"
+                f"Edit: **{progress.edits}** • Dilewati: **{progress.skipped}** • "
+                f"Rate limit: **{progress.throttled}**"
+            ),
+            inline=False
+        )
+        cache = self.song_cache
+        embed.add_field(
+            name="Song Cache",
+            value=(
+                f"Entry: **{len(cache)}/{cache.maxsize}** • Hit: **{cache.hits}**\n"
+                f"Stream basi: **{cache.stale}** • Miss: **{cache.misses}**"
+            ),
+            inline=False
+        )
+
+        tc = get_transcoder().snapshot()
+        embed.add_field(
+            name="FFmpeg Jobs",
+            value=(
+                f"Worker: **{tc['running']}/{tc['workers']}** • Antri: **{tc['queued']}**\n"
+                f"Selesai: **{tc['done']}** (avg **{tc['avg_ms']:.0f} ms**) • Gagal: **{tc['failed']}** • "
+                f"Batal: **{tc['cancelled']}** • Timeout: **{tc['timed_out']}**"
+                + "".join(
+                    f"\n`{label}` {status} • {run_ms:.0f} ms (antri {wait_ms:.0f} ms)"
+                    for label, wait_ms, run_ms, status in tc["recent"][-3:]
+                )
+            ),
+            inline=False
+        )
+
+        ytdl = get_ytdl_stats()
+        if ytdl:
+            embed.add_field(
+                name="yt-dlp",
+                value="\n".join(
+                    f"`{name}` • {st['calls']}x • avg **{st['avg_ms']:.0f} ms** • "
+                    f"max **{st['max_ms']:.0f} ms** • err {st['errors']} • inst {st['created']}"
+                    for name, st in ytdl.items()
+                ),
+                inline=False
+            )
+
+        player = self.players.peek(ctx.guild.id)
+        if player:
+            s = player.stats()
+            embed.add_field(
+                name="Server ini",
+                value=(
+                    f"VC: **{'ya' if s['connected'] else 'tidak'}** • Playing: **{'ya' if s['playing'] else 'tidak'}**\n"
+                    f"Queue: **{s['queue']}** • Resolving: **{s['resolving']}**\n"
+                    f"Resolved: **{s['resolved']}** • Gagal: **{s['unresolved']}**\n"
+                    f"Lagu diputar: **{s['songs_played']}** • Error: **{s['play_errors']}**\n"
+                    f"FFmpeg spawn: **{s['ffmpeg_spawns']}** (Opus **{s['opus_spawns']}**) • Umur: **{player.format_mmss(s['uptime'])}**\n"
+                    f"Preload: **{s['preload_hits']}** hit / **{s['preload_misses']}** miss\n"
+                    f"Jeda antar lagu: avg **{s['gap_avg_ms']:.0f} ms** • max **{s['gap_max_ms']:.0f} ms** • "
+                    f"terakhir **{s['gap_last_ms']:.0f} ms**"
+                ),
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
     # ======================================================
     # COMMAND: SONG (FIND BY LYRICS)
     # ======================================================
@@ -1369,15 +1844,7 @@ class music_cog(commands.Cog):
 
     @commands.command(name="setchmusic", aliases=["setchannel"], extras={"category": "Music"})
     async def setch_cmd(self, ctx, channel: discord.TextChannel):
-        guild_id = str(ctx.guild.id)
-        channel_id = str(channel.id)
-
-        set_channel_settings(self.db, guild_id, "music", channel_id)
-
-        if guild_id not in self.channel_settings:
-            self.channel_settings[guild_id] = {}
-
-        self.channel_settings[guild_id]["music"] = channel_id
+        await self.bot.guild_settings.set_channel(ctx.guild.id, "music", channel.id)
 
         await ctx.send(f"✅ Channel musik diatur ke {channel.mention}")
 
@@ -1386,29 +1853,19 @@ class music_cog(commands.Cog):
     # ======================================================
 
     async def send_to_music_channel(self, guild, embed, view=None):
-        gid = str(guild.id)
-        print("[DEBUG] channel_settings:", self.channel_settings)
-
-        if gid not in self.channel_settings:
-            print("[ERROR] Tidak ada entry guild di channel_settings")
-            return
-
-        ch_id = self.channel_settings.get(gid, {}).get("music")
-        print("[DEBUG] ch_id:", ch_id)
+        ch_id = self.bot.guild_settings.get_channel(guild.id, "music")
 
         if not ch_id:
-            print("[ERROR] Music channel belum di-set atau value kosong.")
+            print(f"[MUSIC] Music channel belum di-set untuk guild {guild.id}.")
             return
 
         target = guild.get_channel(int(ch_id))
-        print("[DEBUG] target channel object:", target)
 
         if not target:
-            print("[ERROR] Channel ID tidak ditemukan di guild!")
+            print(f"[MUSIC] Channel {ch_id} tidak ditemukan di guild {guild.id}!")
             return
 
         try:
-            print("[DEBUG] Sending embed now....")
             return await target.send(embed=embed, view=view)
         except Exception as e:
             print("[FATAL SEND ERROR]", e)
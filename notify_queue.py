@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import discord
+
+EMBEDS_PER_MESSAGE = 10   # batas Discord per pesan
+EMBED_CHARS_PER_MESSAGE = 6000   # batas total karakter semua embed dalam satu pesan
+DEFAULT_RATE = 1.0        # pesan per detik per channel
+DEFAULT_BURST = 5
+RETRY_DELAY = 2.0         # detik sebelum kirim ulang sekali setelah error 5xx
+DRAIN_TIMEOUT = 10.0      # detik maksimal flush antrian saat close()
+
+
+# ============================================================
+#  TOKEN BUCKET
+# ============================================================
+class TokenBucket:
+    """Pacing sederhana: `rate` token/detik, maksimal `capacity` token tersimpan."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self):
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+# ============================================================
+#  NOTIFICATION QUEUE
+# ============================================================
+class NotificationQueue:
+    """
+    Antrian pesan keluar per channel. Pemanggil cukup `enqueue(channel, embed)`
+    lalu lanjut; worker per channel menggabungkan embed yang menumpuk (maks 10
+    per pesan dan total 6000 karakter) dan mengirimnya dengan pacing token bucket, jadi rate limit satu
+    channel tidak menahan pekerjaan lain.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.queues = {}    # channel_id → asyncio.Queue[Embed]
+        self.buckets = {}   # channel_id → TokenBucket
+        self.workers = {}   # channel_id → Task
+        self.sent = 0
+        self.failed = 0
+
+    def enqueue(self, channel, embed):
+        queue = self.queues.get(channel.id)
+        if queue is None:
+            queue = self.queues[channel.id] = asyncio.Queue()
+            self.buckets[channel.id] = TokenBucket(self.rate, self.burst)
+        queue.put_nowait(embed)
+
+        worker = self.workers.get(channel.id)
+        if worker is None or worker.done():
+            self.workers[channel.id] = asyncio.create_task(self._drain(channel))
+
+    def enqueue_many(self, channel, embeds):
+        for embed in embeds:
+            self.enqueue(channel, embed)
+
+    async def _drain(self, channel):
+        queue = self.queues[channel.id]
+        bucket = self.buckets[channel.id]
+
+        pending = None
+        while pending is not None or not queue.empty():
+            first = pending if pending is not None else queue.get_nowait()
+            pending = None
+            batch = [first]
+            chars = len(first)
+            while len(batch) < EMBEDS_PER_MESSAGE and not queue.empty():
+                embed = queue.get_nowait()
+                if chars + len(embed) > EMBED_CHARS_PER_MESSAGE:
+                    # tidak muat → jadi pembuka batch berikutnya
+                    pending = embed
+                    break
+                batch.append(embed)
+                chars += len(embed)
+
+            await bucket.take()
+            await self._send(channel, batch)
+
+        self.workers.pop(channel.id, None)
+
+    async def _send(self, channel, batch):
+        for attempt in range(2):
+            try:
+                await channel.send(embeds=batch)
+                self.sent += 1
+                return
+            except discord.HTTPException as e:
+                # 5xx biasanya sementara → coba sekali lagi; 4xx tidak akan berubah
+                if attempt == 0 and e.status >= 500:
+                    await asyncio.sleep(RETRY_DELAY)
+                    continue
+                self.failed += 1
+                print(f"[NOTIFY] Gagal kirim ke #{channel.id}: {e}")
+                return
+
+    async def close(self, timeout=DRAIN_TIMEOUT):
+        """Tunggu antrian terkirim (maks `timeout` detik), sisanya dibatalkan."""
+        workers = [w for w in self.workers.values() if not w.done()]
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+        for worker in self.workers.values():
+            worker.cancel()
+        self.workers.clear()
@@ -6,11 +6,10 @@ from datetime import datetime
 import pytz
 
 from database import (
-    get_user_cash, set_user_cash,
+    get_user_cash, debit_user_cash, transfer_user_cash,
     get_user_protection, set_user_protection,
     get_rob_victim_protect, set_rob_victim_protect,
-    log_gamble,
-    get_gamble_setting, set_gamble_setting
+    log_gamble
 )
 
 from gamble_utils import gamble_only, comma
@@ -42,14 +41,14 @@ class RobCog(commands.Cog):
     async def rob_disable(self, ctx):
         if ctx.author.id not in [ctx.guild.owner_id, 416234104317804544]:
             return await ctx.send("❌ Kamu tidak punya izin.")
-        set_gamble_setting(self.db, ctx.guild.id, "rob_enabled", "0")
+        await self.bot.guild_settings.set_gamble(ctx.guild.id, "rob_enabled", "0")
         await ctx.send("🛑 Rob system dinonaktifkan.")
 
     @commands.command(name="robenable")
     async def rob_enable(self, ctx):
         if ctx.author.id not in [ctx.guild.owner_id, 416234104317804544]:
             return await ctx.send("❌ Kamu tidak punya izin.")
-        set_gamble_setting(self.db, ctx.guild.id, "rob_enabled", "1")
+        await self.bot.guild_settings.set_gamble(ctx.guild.id, "rob_enabled", "1")
         await ctx.send("🟢 Rob system diaktifkan.")
 
     # =============================================================
@@ -97,7 +96,7 @@ class RobCog(commands.Cog):
             set_user_protection(self.db, user_id, 0)
 
         # rob enabled?
-        enabled = get_gamble_setting(self.db, guild_id, "rob_enabled")
+        enabled = self.bot.guild_settings.get_gamble(guild_id, "rob_enabled")
         if enabled == "0":
             return await ctx.send("🛑 Rob dimatikan di server ini.")
 
@@ -212,28 +211,22 @@ untuk melanjutkan.
 
         now_ts = int(time.time())
 
-        # GLOBAL CASH
-        r_cash = get_user_cash(self.db, user_id)
-        v_cash = get_user_cash(self.db, target.id)
-
         # protections (GLOBAL)
         if get_user_protection(self.db, target.id) > now_ts:
             return await ctx.send("🛡 Target mengaktifkan proteksi sebelum diserang.")
         if get_rob_victim_protect(self.db, target.id) > now_ts:
             return await ctx.send("🛡 Target sedang aman dari rob.")
 
-        if v_cash < steal:
-            return await ctx.send("❌ Target saldo berubah, rob dibatalkan.")
-
         # =============================================================
         # SUCCESS
         # =============================================================
         if random.random() <= chance:
-            new_r = r_cash + steal
-            new_v = v_cash - steal
+            # atomik: gagal kalau saldo target sudah < steal
+            result = transfer_user_cash(self.db, target.id, user_id, steal)
+            if result is None:
+                return await ctx.send("❌ Target saldo berubah, rob dibatalkan.")
 
-            set_user_cash(self.db, user_id, new_r)
-            set_user_cash(self.db, target.id, new_v)
+            _, _, new_r = result
 
             # 2h shield (GLOBAL)
             set_rob_victim_protect(self.db, target.id, now_ts + 7200)
@@ -257,13 +250,8 @@ untuk melanjutkan.
         # =============================================================
         # FAIL
         # =============================================================
-        penalty = min(penalty, r_cash)
-
-        new_r = r_cash - penalty
-        new_v = v_cash + penalty
-
-        set_user_cash(self.db, user_id, new_r)
-        set_user_cash(self.db, target.id, new_v)
+        # penalty dipotong sebanyak saldo yang ada
+        penalty, new_r, _ = transfer_user_cash(self.db, user_id, target.id, penalty, partial=True)
 
         log_gamble(self.db, ctx.guild.id, user_id, "rob_fail", penalty, "LOSE")
         log_gamble(self.db, ctx.guild.id, target.id, "rob_bonus", penalty, "WIN")
@@ -291,7 +279,6 @@ untuk melanjutkan.
         user = ctx.author.id
         now_ts = int(time.time())
 
-        cash = get_user_cash(self.db, user)
         active = get_user_protection(self.db, user)
 
         if active > now_ts:
@@ -300,10 +287,9 @@ untuk melanjutkan.
             m = (left % 3600) // 60
             return await ctx.send(f"❌ Kamu sudah punya proteksi **{h} jam {m} menit**.")
 
-        if cash < 25000:
+        if debit_user_cash(self.db, user, 25000) is None:
             return await ctx.send("❌ Butuh **25000 coins**.")
 
-        set_user_cash(self.db, user, cash - 25000)
         set_user_protection(self.db, user, now_ts + 86400)
 
         await ctx.send("🛡 Proteksi aktif **24 jam**!")
@@ -9,21 +9,24 @@ from database import (
     set_streak_status,
     get_pending_streak_requests,
     get_active_streaks,
-    get_streak_settings,
-    upsert_streak_settings,
     apply_streak_update,
     get_tier_emojis,
     set_tier_emoji,
     delete_tier_emoji,
     get_emoji_for_streak,
-    mark_needs_restore,
     clear_restore_flags,
     kill_streak_due_to_deadline,
     auto_process_gap,
     ensure_restore_cycle,
-    force_new_day
+    force_new_day,
+    process_streak_deadlines,
+    run_db,
+    run_db_func
 
 )
+from mysql.connector import Error
+import asyncio
+from notify_queue import NotificationQueue
 
 from discord.ui import View, Button
 import pytz
@@ -34,6 +37,8 @@ import random
 from datetime import datetime, date, timedelta
 
 BLOCKED_MESSAGES = set()   # pakai set biasa untuk simpan pesan yang diblokir
+STREAK_DIGEST_THRESHOLD = 5   # lebih dari ini per guild → kirim digest, bukan embed satu-satu
+DIGEST_DESC_LIMIT = 4000      # batas deskripsi embed 4096, sisakan ruang
 
 # =========================
 #  Helper kecil
@@ -183,6 +188,34 @@ def format_pair_mention(pair_row):
     return f"<@{pair_row['user1_id']}> × <@{pair_row['user2_id']}>"
 
 
+def build_digest_embeds(title, colour, lines, footer=None):
+    """Gabungkan banyak baris jadi embed digest, dipecah per batas deskripsi Discord."""
+    embeds = []
+    chunk = []
+    size = 0
+    for line in lines:
+        if chunk and size + len(line) + 1 > DIGEST_DESC_LIMIT:
+            embeds.append(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        embeds.append(chunk)
+
+    result = []
+    for i, chunk in enumerate(embeds, start=1):
+        suffix = f" ({i}/{len(embeds)})" if len(embeds) > 1 else ""
+        embed = discord.Embed(
+            title=f"{title} — {len(lines)} pasangan{suffix}",
+            description="\n".join(chunk),
+            colour=colour
+        )
+        if footer:
+            embed.set_footer(text=footer)
+        result.append(embed)
+    return result
+
+
 
 class InfoPagination(View):
     def __init__(self, pages):
@@ -216,6 +249,7 @@ class StreakCog(commands.Cog):
         self.last_reset_date = None
         self.sent_warnings = {}   # key: pair_id -> date
         self.sent_deaths = {}     # key: pair_id -> date
+        self.notifier = NotificationQueue()
 
     @tasks.loop(minutes=1)
     async def daily_reset_check(self):
@@ -239,8 +273,9 @@ class StreakCog(commands.Cog):
         wib = pytz.timezone("Asia/Jakarta")
         self.last_reset_date = datetime.now(wib).date()
 
-    def cog_unload(self):
+    async def cog_unload(self):
         self.daily_reset_check.cancel()
+        await self.notifier.close()
 
 
     async def process_daily_reset(self):
@@ -256,120 +291,86 @@ class StreakCog(commands.Cog):
         wib = pytz.timezone("Asia/Jakarta")
         today = datetime.now(wib).date()
 
-        for guild in self.bot.guilds:
-            settings = get_streak_settings(guild.id)
-            if not settings:
-                continue
+        guilds = {
+            guild.id: guild for guild in self.bot.guilds
+            if self.bot.guild_settings.get_streak(guild.id)
+        }
 
-            log_channel_id = settings.get("log_channel_id")
-            log_channel = guild.get_channel(log_channel_id) if log_channel_id else None
+        # Semua guild diproses dalam satu transaksi set-based, notifikasi menyusul
+        try:
+            results = await run_db(process_streak_deadlines, today, guilds.keys(), timeout=None)
+        except Error as e:
+            print(f"[STREAK] Reset harian gagal: {e!r}")
+            return
 
-            rows = get_active_streaks(guild.id, limit=5000, offset=0)
-            if not rows:
+        # Kirim lewat antrian per channel; reset tidak menunggu Discord
+        for guild_id, actions in results.items():
+            guild = guilds[guild_id]
+            log_channel = self.get_log_channel(guild)
+            if not log_channel:
                 continue
 
-            for pair in rows:
-                pair = ensure_restore_cycle(pair)
-                last = pair["last_update_date"]
-
-                # kalau NULL (belum pernah nyala), jangan dihitung delta
-                if last is None:
-                    # skip pasangan ini, karena belum pernah punya streak harian
-                    continue
-
-                # Convert last date
-                if isinstance(last, str):
-                    try:
-                        last = datetime.strptime(last, "%Y-%m-%d").date()
-                    except:
-                        last = today
-
-
-                delta = (today - last).days
-                deadline = pair.get("restore_deadline")
-
-                # Convert deadline
-                if isinstance(deadline, str):
-                    try:
-                        deadline = datetime.strptime(deadline, "%Y-%m-%d").date()
-                    except:
-                        deadline = None
-
-                # -------------------------------
-                # CASE A — NEED RESTORE (delta 2)
-                # -------------------------------
-                if delta == 2:
-
-                    # ⚠️ CEK KUOTA RESTORE HABIS → LANGSUNG MATI
-                    if pair.get("restore_used_this_cycle", 0) >= 5:
-                        kill_streak_due_to_deadline(pair["id"])
-                        dead = get_streak_pair(guild.id, pair["user1_id"], pair["user2_id"])
-                        if log_channel:
-                            await self.send_streak_dead(
-                                guild,
-                                dead,
-                                restore_left_override="0 / 5"
-                            )
-                        continue
-
-                    # ⚠️ Jika kuota ada → baru peringatan
-                    mark_needs_restore(pair["id"], today)
-                    updated = get_streak_pair(guild.id, pair["user1_id"], pair["user2_id"])
-                    await self.send_warning_near_dead(guild, updated)
-                    continue
-
-                # -------------------------------
-                # CASE B — TERLAMBAT RESTORE
-                # -------------------------------
-                if pair["needs_restore"] == 1 and deadline:
-                    if today > deadline:
-                        kill_streak_due_to_deadline(pair["id"])
-                        dead = get_streak_pair(guild.id, pair["user1_id"], pair["user2_id"])
-
-                        if log_channel:
-                            await self.send_streak_dead(guild, dead)
-
-                        continue
-
-                # -------------------------------
-                # CASE C — DELTA >= 3 → auto mati
-                # -------------------------------
-                if delta >= 3:
-                    kill_streak_due_to_deadline(pair["id"])
-                    dead = get_streak_pair(guild.id, pair["user1_id"], pair["user2_id"])
-
-                    if log_channel:
-                        await self.send_streak_dead(guild, dead)
-
-                    continue
-
-                # -------------------------------
-                # CASE D — KUOTA RESTORE HABIS
-                # -------------------------------
-                if pair.get("restore_used_this_cycle", 0) >= 5 and pair.get("needs_restore", 0) == 1:
-                    kill_streak_due_to_deadline(pair["id"])
-                    dead = get_streak_pair(guild.id, pair["user1_id"], pair["user2_id"])
-
-                    if log_channel:
-                        await self.send_streak_dead(
-                            guild, 
-                            dead, 
-                            restore_left_override="0 / 5"
-                        )
-
-                    continue
+            warns = []
+            deaths = []
+            for action, pair in actions:
+                if action == "warn":
+                    if self.mark_sent(self.sent_warnings, pair["id"]):
+                        warns.append(pair)
+                elif self.mark_sent(self.sent_deaths, pair["id"]):
+                    override = "0 / 5" if action == "dead_quota" else None
+                    deaths.append((pair, override))
+
+            if len(warns) + len(deaths) > STREAK_DIGEST_THRESHOLD:
+                # terlalu banyak → gabung jadi digest supaya channel tidak banjir
+                if warns:
+                    self.notifier.enqueue_many(log_channel, build_digest_embeds(
+                        "⚠️ Streak Hampir Mati",
+                        discord.Colour.gold(),
+                        [f"{format_pair_mention(p)} — restore sebelum **{p['restore_deadline']}**" for p in warns],
+                        footer="Aktifkan kembali dengan `api @user` sebelum deadline 💀"
+                    ))
+                if deaths:
+                    self.notifier.enqueue_many(log_channel, build_digest_embeds(
+                        "💀 Streak Mati Total",
+                        discord.Colour.red(),
+                        [f"{format_pair_mention(p)} — sisa restore {self.restore_left(p, o)}" for p, o in deaths]
+                    ))
+                continue
 
+            # siklus restore sudah dinormalisasi process_streak_deadlines
+            for pair in warns:
+                self.notifier.enqueue(log_channel, self.build_warning_embed(pair))
+            for pair, override in deaths:
+                self.notifier.enqueue(log_channel, self.build_dead_embed(pair, override))
 
-    async def send_warning_near_dead(self, guild, pair):
-        """Kirim embed warning ke log channel."""
-        settings = get_streak_settings(guild.id)
+    # -------------------------------------------------
+    # Helper notifikasi log channel
+    # -------------------------------------------------
+    def get_log_channel(self, guild):
+        settings = self.bot.guild_settings.get_streak(guild.id)
         if not settings or not settings.get("log_channel_id"):
-            return
+            return None
+        return guild.get_channel(settings["log_channel_id"])
 
-        log_channel = guild.get_channel(settings["log_channel_id"])
-        if not log_channel:
-            return
+    @staticmethod
+    def mark_sent(store, pair_id):
+        """Prevent spam — True kalau belum terkirim hari ini (lalu ditandai)."""
+        today = date.today()
+        if store.get(pair_id) == today:
+            return False
+        store[pair_id] = today
+        return True
+
+    @staticmethod
+    def restore_left(pair, restore_left_override=None):
+        # (used_after mati = 0, jadi kematian karena kuota harus override manual)
+        if restore_left_override is not None:
+            return restore_left_override
+        used = pair.get("restore_used_this_cycle", 0) or 0
+        return f"{max(0, 5 - used)} / 5"
 
+    def build_warning_embed(self, pair):
+        """`pair` harus sudah lewat ensure_restore_cycle (sisa restore dibaca apa adanya)."""
         embed = discord.Embed(
             title="⚠️ Streak Hampir Mati!",
             description=(
@@ -380,49 +381,25 @@ class StreakCog(commands.Cog):
             ),
             colour=discord.Colour.gold()
         )
-        # --- Hitung sisa restore bulan ini ---
-        pair = ensure_restore_cycle(pair)
-        used = pair.get("restore_used_this_cycle", 0) or 0
-        left = max(0, 5 - used)
-
         embed.add_field(
             name="♻️ Sisa Restore Bulan Ini",
-            value=f"{left} / 5",
+            value=self.restore_left(pair),
             inline=True
         )
 
         embed.set_footer(text="Jika tidak, besok streak mati total 💀")
-        # Prevent spam — hanya kirim 1x per hari
-        today = date.today()
-
-        # pair_id sebagai key
-        pair_id = pair["id"]
-
-        last_sent = getattr(self, "sent_warnings", {}).get(pair_id)
-        if last_sent == today:
-            return  # sudah kirim hari ini, jangan spam
-
-        # simpan state
-        self.sent_warnings[pair_id] = today
-
-        await log_channel.send(embed=embed)
+        return embed
 
+    async def display_emoji(self, guild_id, streak):
+        """get_display_emoji versi async: lookup emoji lewat executor DB."""
+        emoji_id = await run_db_func(get_emoji_for_streak, guild_id, streak)
+        if emoji_id:
+            obj = self.bot.get_emoji(emoji_id)
+            return str(obj) if obj else f"<:e:{emoji_id}>"
+        default_emoji, _ = get_flame_tier(streak)
+        return default_emoji
 
-    async def send_streak_dead(self, guild, pair, restore_left_override=None):
-        """
-        Kirim embed kematian streak.
-        Jika restore_left_override diberikan → pakai angka itu.
-        Kalau tidak → pakai sisa restore berdasarkan pair saat ini.
-        """
-
-        settings = get_streak_settings(guild.id)
-        if not settings or not settings.get("log_channel_id"):
-            return
-
-        log_channel = guild.get_channel(settings["log_channel_id"])
-        if not log_channel:
-            return
-
+    def build_dead_embed(self, pair, restore_left_override=None):
         embed = discord.Embed(
             title="💀 Streak Mati Total",
             description=(
@@ -433,35 +410,33 @@ class StreakCog(commands.Cog):
             colour=discord.Colour.red()
         )
 
-        # --- Ambil restore sebelum mati ---
-        # (used_after mati = 0, jadi harus override manual biar benar)
-        used = pair.get("restore_used_this_cycle", 0) or 0
-
-        if restore_left_override is not None:
-            # Jika kamu kirim override → langsung pakai angka ini
-            left_display = restore_left_override
-        else:
-            # Fallback (dipakai kalau mati karena gap ≥ 3, bukan restore habis)
-            left_display = f"{max(0, 5 - used)} / 5"
-
         embed.add_field(
             name="♻️ Sisa Restore Bulan Ini (reset)",
-            value=left_display,
+            value=self.restore_left(pair, restore_left_override),
             inline=True
         )
+        return embed
 
-        today = date.today()
-
-        pair_id = pair["id"]
+    async def send_warning_near_dead(self, guild, pair):
+        """Antrikan embed warning ke log channel (maks 1x per hari per pair)."""
+        log_channel = self.get_log_channel(guild)
+        if not log_channel or not self.mark_sent(self.sent_warnings, pair["id"]):
+            return
 
-        last_dead = getattr(self, "sent_deaths", {}).get(pair_id)
-        if last_dead == today:
-            return  # sudah kirim embed mati hari ini
+        pair = await run_db_func(ensure_restore_cycle, pair)
+        self.notifier.enqueue(log_channel, self.build_warning_embed(pair))
 
-        # simpan state
-        self.sent_deaths[pair_id] = today
+    async def send_streak_dead(self, guild, pair, restore_left_override=None):
+        """
+        Antrikan embed kematian streak.
+        Jika restore_left_override diberikan → pakai angka itu.
+        Kalau tidak → pakai sisa restore berdasarkan pair saat ini.
+        """
+        log_channel = self.get_log_channel(guild)
+        if not log_channel or not self.mark_sent(self.sent_deaths, pair["id"]):
+            return
 
-        await log_channel.send(embed=embed)
+        self.notifier.enqueue(log_channel, self.build_dead_embed(pair, restore_left_override))
 
     # ---------------------------------------------
     # Listener 1: detect "api @user" di channel streak
@@ -478,15 +453,17 @@ class StreakCog(commands.Cog):
         guild = message.guild
         guild_id = guild.id
 
-        settings = get_streak_settings(guild_id)
+        # Semua gate di bawah murni in-memory; DB baru disentuh untuk "api @user" valid
+        settings = self.bot.guild_settings.get_streak(guild_id)
         if not settings:
             return
 
+        channel_id = message.channel.id
         cmd_channel_id = settings.get("command_channel_id")
         # ❌ Cegah API di channel log
         log_channel_id = settings.get("log_channel_id")
 
-        if log_channel_id and message.channel.id == log_channel_id:
+        if log_channel_id and channel_id == log_channel_id:
             if message.content.lower().startswith("api "):
                 await message.channel.send(
                     "❌ Tidak bisa menyalakan api di channel log.\nGunakan channel command."
@@ -494,17 +471,14 @@ class StreakCog(commands.Cog):
             BLOCKED_MESSAGES.add(message.id)
             return  # ⬅ FIX PENTING: stop SELURUH fungsi
 
-        if cmd_channel_id is None or message.channel.id != cmd_channel_id:
+        if cmd_channel_id is None or channel_id != cmd_channel_id:
             return
 
-        content = message.content.strip()
-        if not content:
+        if not message.mentions:
             return
 
-        parts = content.split()
-        if len(parts) < 2:
-            return
-        if parts[0].lower() != "api":
+        content = message.content.lstrip()
+        if content[:3].lower() != "api" or not content[3:4].isspace():
             return
 
         mentions = [m for m in message.mentions if not m.bot and m.id != message.author.id]
@@ -513,13 +487,23 @@ class StreakCog(commands.Cog):
 
         target = mentions[0]
 
-        pair = get_streak_pair(guild_id, message.author.id, target.id)
+        try:
+            await self.process_api_message(message, target)
+        except (asyncio.TimeoutError, Error) as e:
+            print(f"[STREAK] Gagal proses api: {e!r}")
+
+    async def process_api_message(self, message, target):
+        """Lanjutan on_message untuk `api @user` valid; DB lambat → raise ke on_message."""
+        guild = message.guild
+        guild_id = guild.id
+
+        pair = await run_db_func(get_streak_pair, guild_id, message.author.id, target.id)
 
         # ★ AUTO GAP PROCESSING
-        pair = auto_process_gap(pair)
+        pair = await run_db_func(auto_process_gap, pair)
 
         # REFRESH pair dari DB supaya status up to date
-        pair = get_streak_pair(guild_id, message.author.id, target.id)
+        pair = await run_db_func(get_streak_pair, guild_id, message.author.id, target.id)
 
         # Jika baru masuk mode restore (delta = 1)
         # === Warning logic masuk mode restore ===
@@ -554,12 +538,12 @@ class StreakCog(commands.Cog):
             # Jika delta >= 3 → ini bukan restore lagi, harus MATI
             if delta >= 3:
                 # ambil restore sebelum mati
-                pair_cycle = ensure_restore_cycle(pair)
+                pair_cycle = await run_db_func(ensure_restore_cycle, pair)
                 used_before = pair_cycle.get("restore_used_this_cycle", 0)
                 left_before = f"{max(0, 5 - used_before)} / 5"
 
-                kill_streak_due_to_deadline(pair["id"])
-                dead = get_streak_pair(guild_id, pair["user1_id"], pair["user2_id"])
+                await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                dead = await run_db_func(get_streak_pair, guild_id, pair["user1_id"], pair["user2_id"])
 
                 await self.send_streak_dead(message.guild, dead, restore_left_override=left_before)
 
@@ -574,12 +558,12 @@ class StreakCog(commands.Cog):
 
             if today > deadline:
                 # ambil restore sebelum mati
-                pair_cycle = ensure_restore_cycle(pair)
+                pair_cycle = await run_db_func(ensure_restore_cycle, pair)
                 used_before = pair_cycle.get("restore_used_this_cycle", 0)
                 left_before = f"{max(0, 5 - used_before)} / 5"
 
-                kill_streak_due_to_deadline(pair["id"])
-                dead = get_streak_pair(guild_id, pair["user1_id"], pair["user2_id"])
+                await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                dead = await run_db_func(get_streak_pair, guild_id, pair["user1_id"], pair["user2_id"])
 
                 await self.send_streak_dead(message.guild, dead, restore_left_override=left_before)
 
@@ -587,14 +571,14 @@ class StreakCog(commands.Cog):
                 return
             
             # 🔥 FIX: langsung mati jika kuota restore habis
-            pair_cycle = ensure_restore_cycle(pair)
+            pair_cycle = await run_db_func(ensure_restore_cycle, pair)
 
             if pair_cycle.get("restore_used_this_cycle", 0) >= 5:
                 # override MUST be 0/5 untuk kematian karena restore habis
                 restore_before = "0 / 5"
 
-                kill_streak_due_to_deadline(pair["id"])
-                dead = get_streak_pair(guild_id, pair["user1_id"], pair["user2_id"])
+                await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                dead = await run_db_func(get_streak_pair, guild_id, pair["user1_id"], pair["user2_id"])
 
                 await self.send_streak_dead(
                     message.guild,
@@ -640,7 +624,7 @@ class StreakCog(commands.Cog):
 
         # react emoji (custom atau fallback)
         try:
-            emoji_id = get_emoji_for_streak(guild_id, pair["current_streak"])
+            emoji_id = await run_db_func(get_emoji_for_streak, guild_id, pair["current_streak"])
             e = self.bot.get_emoji(emoji_id) if emoji_id else None
             await message.add_reaction(e or "🔥")
         except discord.Forbidden:
@@ -665,7 +649,7 @@ class StreakCog(commands.Cog):
         if not member or member.bot:
             return
 
-        settings = get_streak_settings(guild.id)
+        settings = self.bot.guild_settings.get_streak(guild.id)
         if not settings:
             return
 
@@ -702,8 +686,15 @@ class StreakCog(commands.Cog):
             return
         
 
+        try:
+            await self.process_api_reaction(payload, guild, member, channel, message, target, settings)
+        except (asyncio.TimeoutError, Error) as e:
+            print(f"[STREAK] Gagal proses reaction api: {e!r}")
+
+    async def process_api_reaction(self, payload, guild, member, channel, message, target, settings):
+        """Lanjutan on_raw_reaction_add setelah gate; semua akses DB lewat executor."""
         guild_id = guild.id
-        pair = get_streak_pair(guild_id, message.author.id, target.id)
+        pair = await run_db_func(get_streak_pair, guild_id, message.author.id, target.id)
         if not pair:
             return
         
@@ -715,12 +706,12 @@ class StreakCog(commands.Cog):
 
         if pair.get("needs_restore", 0) == 1:
             # 🔥 FIX: kuota restore habis = langsung mati
-            pair_cycle = ensure_restore_cycle(pair)
+            pair_cycle = await run_db_func(ensure_restore_cycle, pair)
             if pair_cycle.get("restore_used_this_cycle", 0) >= 5:
                 restore_before = "0 / 5"   # override for restore-death
 
-                kill_streak_due_to_deadline(pair["id"])
-                dead = get_streak_pair(guild.id, pair["user1_id"], pair["user2_id"])
+                await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                dead = await run_db_func(get_streak_pair, guild.id, pair["user1_id"], pair["user2_id"])
 
                 await channel.send("💀 Streak kalian mati karena kuota restore sudah habis (5x/bulan).")
 
@@ -752,14 +743,15 @@ class StreakCog(commands.Cog):
                         deadline = today
 
                 if today > deadline:
-                    kill_streak_due_to_deadline(pair["id"])
-                    dead_pair = get_streak_pair(guild.id, pair["user1_id"], pair["user2_id"])
+                    await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                    dead_pair = await run_db_func(get_streak_pair, guild.id, pair["user1_id"], pair["user2_id"])
                     await channel.send("💀 Terlambat restore → streak mati total.")
                     await self.send_streak_dead(guild, dead_pair)
                     return
 
                 # Jalankan restore
-                result = apply_streak_update(
+                result = await run_db_func(
+                    apply_streak_update,
                     guild_id=guild.id,
                     user1_id=pair["user1_id"],
                     user2_id=pair["user2_id"],
@@ -773,8 +765,8 @@ class StreakCog(commands.Cog):
                 if not result["ok"]:
                     # kalau kuota restore habis → langsung MATI
                     if result.get("reason") == "restore_quota_reached":
-                        kill_streak_due_to_deadline(pair["id"])
-                        dead = get_streak_pair(guild_id, pair["user1_id"], pair["user2_id"])
+                        await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                        dead = await run_db_func(get_streak_pair, guild_id, pair["user1_id"], pair["user2_id"])
                         await channel.send("💀 Streak kalian mati karena kuota restore sudah habis (5x/bulan).")
                         await self.send_streak_dead(guild, dead)
                         return
@@ -784,13 +776,13 @@ class StreakCog(commands.Cog):
                     return
 
 
-                clear_restore_flags(pair["id"])
-                new_pair = ensure_restore_cycle(result["pair"])
+                await run_db_func(clear_restore_flags, pair["id"])
+                new_pair = await run_db_func(ensure_restore_cycle, result["pair"])
 
                 used = new_pair.get("restore_used_this_cycle", 0)
                 left = max(0, 5 - used)
 
-                emoji = get_display_emoji(self.bot, guild.id, new_pair["current_streak"])
+                emoji = await self.display_emoji(guild.id, new_pair["current_streak"])
 
                 await channel.send(
                     f"{emoji} **RESTORE BERHASIL (via reaction)!**\n"
@@ -802,7 +794,7 @@ class StreakCog(commands.Cog):
 
         # --- Validate emoji
         allowed = ["🔥"]
-        custom_emoji_id = get_emoji_for_streak(guild.id, pair["current_streak"])
+        custom_emoji_id = await run_db_func(get_emoji_for_streak, guild.id, pair["current_streak"])
         if custom_emoji_id:
             allowed.append(str(custom_emoji_id))
 
@@ -822,17 +814,16 @@ class StreakCog(commands.Cog):
 
         if last == (today - timedelta(days=1)):
             try:
-                from database import force_new_day
-                force_new_day(pair["id"])
+                await run_db_func(force_new_day, pair["id"])
             except Exception as e:
                 print("[STREAK] force_new_day ERROR:", e)
 
-            pair = get_streak_pair(guild_id, message.author.id, target.id)
+            pair = await run_db_func(get_streak_pair, guild_id, message.author.id, target.id)
             if not pair:
                 return
 
         # AUTO GAP
-        gap_check = auto_process_gap(pair)
+        gap_check = await run_db_func(auto_process_gap, pair)
         if not gap_check:
             return
 
@@ -859,8 +850,8 @@ class StreakCog(commands.Cog):
 
             # Jika sudah LEWAT hari deadline → MATI OTOMATIS
             if today > deadline:
-                kill_streak_due_to_deadline(pair["id"])
-                dead_pair = get_streak_pair(guild_id, pair["user1_id"], pair["user2_id"])
+                await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                dead_pair = await run_db_func(get_streak_pair, guild_id, pair["user1_id"], pair["user2_id"])
 
                 await channel.send("💀 Terlambat restore, streak mati total.")
                 await self.send_streak_dead(guild, dead_pair)
@@ -870,11 +861,12 @@ class StreakCog(commands.Cog):
             if pair.get("restore_deadline"):
                 dead = datetime.strptime(pair["restore_deadline"], "%Y-%m-%d").date()
                 if today > dead:
-                    kill_streak_due_to_deadline(pair["id"])
+                    await run_db_func(kill_streak_due_to_deadline, pair["id"])
                     await channel.send("💀 Terlambat restore → streak mati total.")
                     return
 
-            result = apply_streak_update(
+            result = await run_db_func(
+                apply_streak_update,
                 guild_id=guild_id,
                 user1_id=pair["user1_id"],
                 user2_id=pair["user2_id"],
@@ -888,8 +880,8 @@ class StreakCog(commands.Cog):
             if not result["ok"]:
                 # kalau kuota restore habis → langsung MATI
                 if result.get("reason") == "restore_quota_reached":
-                    kill_streak_due_to_deadline(pair["id"])
-                    dead = get_streak_pair(guild_id, pair["user1_id"], pair["user2_id"])
+                    await run_db_func(kill_streak_due_to_deadline, pair["id"])
+                    dead = await run_db_func(get_streak_pair, guild_id, pair["user1_id"], pair["user2_id"])
                     await channel.send("💀 Streak kalian mati karena kuota restore sudah habis (5x/bulan).")
                     await self.send_streak_dead(guild, dead)
                     return
@@ -899,15 +891,15 @@ class StreakCog(commands.Cog):
                 return
 
 
-            clear_restore_flags(pair["id"])
+            await run_db_func(clear_restore_flags, pair["id"])
             new_pair = result["pair"]
 
             # Count restore
-            new_pair = ensure_restore_cycle(new_pair)
+            new_pair = await run_db_func(ensure_restore_cycle, new_pair)
             used = new_pair.get("restore_used_this_cycle", 0)
             left = max(0, 5 - used)
 
-            emoji = get_display_emoji(self.bot, guild_id, new_pair["current_streak"])
+            emoji = await self.display_emoji(guild_id, new_pair["current_streak"])
 
             await channel.send(
                 f"{emoji} **RESTORE BERHASIL!** Streak kembali menyala 🔥\n"
@@ -920,7 +912,8 @@ class StreakCog(commands.Cog):
         if pair["status"] != "ACTIVE":
             return
 
-        result = apply_streak_update(
+        result = await run_db_func(
+            apply_streak_update,
             guild_id=guild_id,
             user1_id=pair["user1_id"],
             user2_id=pair["user2_id"],
@@ -943,7 +936,7 @@ class StreakCog(commands.Cog):
         if streak_now == before:
             return
 
-        emoji = get_display_emoji(self.bot, guild_id, streak_now)
+        emoji = await self.display_emoji(guild_id, streak_now)
         _, tier = get_flame_tier(streak_now)
 
         # TEXT MESSAGE
@@ -976,7 +969,7 @@ class StreakCog(commands.Cog):
         pfp1 = message.author.display_avatar.with_size(512).with_format("png").url
         pfp2 = target.display_avatar.with_size(512).with_format("png").url
 
-        emoji_id = get_emoji_for_streak(guild_id, streak_now)
+        emoji_id = await run_db_func(get_emoji_for_streak, guild_id, streak_now)
         emoji_url = None
         if emoji_id:
             e = self.bot.get_emoji(emoji_id)
@@ -996,7 +989,7 @@ class StreakCog(commands.Cog):
         embed.add_field(name="Sesudah", value=str(streak_now))
         embed.add_field(name="Tier", value=tier, inline=False)
 
-        new_pair = ensure_restore_cycle(new_pair)
+        new_pair = await run_db_func(ensure_restore_cycle, new_pair)
         used = new_pair.get("restore_used_this_cycle", 0)
         left = max(0, 5 - used)
 
@@ -1472,7 +1465,7 @@ class StreakCog(commands.Cog):
 
         # === Kirim EMBED + CARD seperti reaction-update ===
         guild = ctx.guild
-        log_channel_id = get_streak_settings(guild.id).get("log_channel_id")
+        log_channel_id = (self.bot.guild_settings.get_streak(guild.id) or {}).get("log_channel_id")
         log_channel = guild.get_channel(log_channel_id) if log_channel_id else None
 
         if log_channel:
@@ -1565,7 +1558,7 @@ class StreakCog(commands.Cog):
 
         tipe = tipe.lower()
         guild_id = ctx.guild.id
-        settings = get_streak_settings(guild_id) or {}
+        settings = self.bot.guild_settings.get_streak(guild_id) or {}
 
         command_id = settings.get("command_channel_id")
         log_id = settings.get("log_channel_id")
@@ -1577,8 +1570,8 @@ class StreakCog(commands.Cog):
         else:
             return await ctx.send("Tipe harus `command` atau `log`.")
 
-        upsert_streak_settings(
-            guild_id=guild_id,
+        await self.bot.guild_settings.set_streak(
+            guild_id,
             command_channel_id=command_id,
             log_channel_id=log_id,
             auto_update=True,
@@ -45,11 +45,10 @@ class TimedWordsCog(commands.Cog):
             interval = 30
             title = left
 
-        db = connect_db()
-        add_timed_word(db, ctx.guild.id, title, content, interval)
-        messages = get_timed_words(db, ctx.guild.id)
-        channel_id = get_channel_settings(db, ctx.guild.id, "timedwords")
-        db.close()
+        with connect_db() as db:
+            add_timed_word(db, ctx.guild.id, title, content, interval)
+            messages = get_timed_words(db, ctx.guild.id)
+            channel_id = get_channel_settings(db, ctx.guild.id, "timedwords")
 
         if not channel_id:
             channel_id = ctx.channel.id
@@ -69,10 +68,9 @@ class TimedWordsCog(commands.Cog):
         if ctx.author.id != ctx.guild.owner_id and ctx.author.id != ALLOWED_USER_ID:
             return await ctx.send("❌ Hanya pemilik server atau user tertentu yang dapat mengatur channel ini.")
 
-        db = connect_db()
-        set_channel_settings(db, ctx.guild.id, "timedwords", channel.id)
-        messages = get_timed_words(db, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            set_channel_settings(db, ctx.guild.id, "timedwords", channel.id)
+            messages = get_timed_words(db, ctx.guild.id)
 
         if messages:
             self.guild_data[ctx.guild.id] = {
@@ -112,10 +110,9 @@ class TimedWordsCog(commands.Cog):
     async def before_send_timed_word(self):
         await self.bot.wait_until_ready()
         for guild in self.bot.guilds:
-            db = connect_db()
-            channel_id = get_channel_settings(db, guild.id, "timedwords")
-            messages = get_timed_words(db, guild.id)
-            db.close()
+            with connect_db() as db:
+                channel_id = get_channel_settings(db, guild.id, "timedwords")
+                messages = get_timed_words(db, guild.id)
             if channel_id and messages:
                 self.guild_data[guild.id] = {
                     "channel": int(channel_id),
@@ -126,9 +123,8 @@ class TimedWordsCog(commands.Cog):
 
     @commands.command(name="listtimedwords", help="Menampilkan semua pesan berkala yang telah ditambahkan.", extras={"category": "TimedWords"})
     async def list_timedwords(self, ctx):
-        db = connect_db()
-        messages = get_timed_words(db, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            messages = get_timed_words(db, ctx.guild.id)
 
         if not messages:
             return await ctx.send("🚫 Tidak ada pesan berkala yang tersimpan.")
@@ -186,17 +182,16 @@ class TimedWordsCog(commands.Cog):
         if not title:
             return await ctx.send("❗ Format salah. Contoh: `removetimedword Reminder`")
 
-        db = connect_db()
-        messages = get_timed_words(db, ctx.guild.id)
+        with connect_db() as db:
+            messages = get_timed_words(db, ctx.guild.id)
         matched = [msg for msg in messages if msg[0].lower() == title.lower()]
 
         if not matched:
-            db.close()
             return await ctx.send("⚠️ Tidak ditemukan pesan dengan judul tersebut.")
 
-        remove_timed_word(db, ctx.guild.id, matched[0][0])
-        updated = get_timed_words(db, ctx.guild.id)
-        db.close()
+        with connect_db() as db:
+            remove_timed_word(db, ctx.guild.id, matched[0][0])
+            updated = get_timed_words(db, ctx.guild.id)
 
         if ctx.guild.id in self.guild_data:
             self.guild_data[ctx.guild.id]["messages"] = updated
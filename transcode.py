@@ -0,0 +1,171 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from collections import deque
+
+TRANSCODE_WORKERS = int(os.getenv("TRANSCODE_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+TRANSCODE_TIMEOUT = 300    # detik per job
+TRANSCODE_HISTORY = 20     # job terakhir yang disimpan untuk stats
+
+
+class TranscodeError(Exception):
+    pass
+
+
+# ============================================================
+#  TRANSCODE MANAGER
+# ============================================================
+class TranscodeManager:
+    """
+    Jalankan ffmpeg sebagai asyncio subprocess (event loop tidak ikut ke-block).
+    Paling banyak `workers` proses jalan bersamaan — sisanya antri di semaphore
+    sesuai urutan datang. Task pemanggil yang di-cancel ikut membunuh ffmpeg-nya.
+    """
+
+    def __init__(self, workers=TRANSCODE_WORKERS, executable=None):
+        self.workers = workers
+        self.executable = executable or shutil.which("ffmpeg") or "ffmpeg"
+        self.probe_executable = shutil.which("ffprobe") or "ffprobe"
+        self.sem = asyncio.Semaphore(workers)
+        self.running = {}    # job id → Process
+        self.queued = 0
+
+        self.done = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.timed_out = 0
+        self.total_ms = 0.0
+        self.history = deque(maxlen=TRANSCODE_HISTORY)   # (label, wait_ms, run_ms, status)
+
+    async def run(self, args, label="ffmpeg", timeout=TRANSCODE_TIMEOUT):
+        """
+        `ffmpeg <args>`; return waktu encode (ms). Raise TranscodeError kalau
+        ffmpeg gagal / timeout.
+        """
+        job_id = uuid.uuid4().hex
+        queued_at = time.perf_counter()
+
+        self.queued += 1
+        try:
+            await self.sem.acquire()
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        wait_ms = (started - queued_at) * 1000
+        status = "error"
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.executable, "-hide_banner", "-nostdin", "-loglevel", "error", "-y", *args,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            self.running[job_id] = proc
+            try:
+                _, err = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await self._kill(proc)
+                status = "timeout"
+                raise TranscodeError(f"{label}: timeout {timeout}s")
+            except asyncio.CancelledError:
+                await self._kill(proc)
+                status = "cancelled"
+                raise
+            finally:
+                self.running.pop(job_id, None)
+
+            if proc.returncode != 0:
+                tail = (err or b"").decode(errors="ignore").strip()[-300:]
+                raise TranscodeError(f"{label}: exit {proc.returncode} {tail}")
+
+            status = "ok"
+            return (time.perf_counter() - started) * 1000
+        finally:
+            self.sem.release()
+            self.record(label, wait_ms, (time.perf_counter() - started) * 1000, status)
+
+    async def probe_duration(self, path, timeout=30):
+        """Durasi media (detik) via ffprobe, None kalau tidak terbaca. Tidak ikut antrian."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.probe_executable, "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1", path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError:
+            return None
+
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(proc)
+            return None
+        except asyncio.CancelledError:
+            await self._kill(proc)
+            raise
+
+        try:
+            duration = float(out.decode().strip())
+        except ValueError:
+            return None
+        return duration if duration > 0 else None
+
+    async def _kill(self, proc):
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+
+    def record(self, label, wait_ms, run_ms, status):
+        self.history.append((label, wait_ms, run_ms, status))
+        if status == "ok":
+            self.done += 1
+            self.total_ms += run_ms
+        elif status == "cancelled":
+            self.cancelled += 1
+        elif status == "timeout":
+            self.timed_out += 1
+        else:
+            self.failed += 1
+
+    def cancel_all(self):
+        for proc in list(self.running.values()):
+            if proc.returncode is None:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+
+    def snapshot(self):
+        return {
+            "workers": self.workers,
+            "running": len(self.running),
+            "queued": self.queued,
+            "done": self.done,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "timed_out": self.timed_out,
+            "avg_ms": self.total_ms / self.done if self.done else 0.0,
+            "recent": list(self.history),
+        }
+
+
+_manager = None
+
+
+def get_transcoder():
+    global _manager
+    if _manager is None:
+        _manager = TranscodeManager()
+    return _manager
+
+
+def shutdown_transcoder():
+    if _manager is not None:
+        _manager.cancel_all()
@@ -39,34 +39,30 @@ class MemberGreetingConfig(commands.Cog):
         if status not in ["on", "off"]:
             return await ctx.send("❌ Gunakan `on` atau `off`.")
 
-        db = connect_db()
-        set_feature_status(db, ctx.guild.id, "welcome_message", status == "on")
-        db.close()
+        with connect_db() as db:
+            set_feature_status(db, ctx.guild.id, "welcome_message", status == "on")
         await ctx.send(f"✅ Welcome message {'enabled' if status == 'on' else 'disabled'}.")
 
     @commands.command(name="setwelcomemsg", extras={"category": "Welcome"})
     @is_owner_or_dev()
     async def set_welcome_msg(self, ctx, *, message: str):
-        db = connect_db()
-        set_welcome_message(db, ctx.guild.id, "welcome", message)
-        db.close()
+        with connect_db() as db:
+            set_welcome_message(db, ctx.guild.id, "welcome", message)
         await ctx.send("✅ Pesan welcome disimpan.")
 
     @commands.command(name="setchwelcome", extras={"category": "Welcome"})
     @is_owner_or_dev()
     async def set_welcome_channel(self, ctx, channel: discord.TextChannel):
-        db = connect_db()
-        set_channel_settings(db, ctx.guild.id, "welcome", channel.id)
-        db.close()
+        with connect_db() as db:
+            set_channel_settings(db, ctx.guild.id, "welcome", channel.id)
         await ctx.send(f"✅ Welcome channel → {channel.mention}")
 
     @commands.command(name="testwelcome", extras={"category": "Welcome"})
     @is_owner_or_dev()
     async def test_welcome(self, ctx):
-        db = connect_db()
-        message = get_welcome_message(db, ctx.guild.id, "welcome")
-        ch_id = get_channel_settings(db, ctx.guild.id, "welcome")
-        db.close()
+        with connect_db() as db:
+            message = get_welcome_message(db, ctx.guild.id, "welcome")
+            ch_id = get_channel_settings(db, ctx.guild.id, "welcome")
 
         if not message:
             return await ctx.send("⚠ Belum ada pesan welcome.")
@@ -103,22 +99,19 @@ class MemberGreetingConfig(commands.Cog):
     @commands.command(name="setgreetsch", extras={"category": "Welcome"})
     @is_owner_or_dev()
     async def set_log_channel(self, ctx, channel: discord.TextChannel):
-        db = connect_db()
-        set_channel_settings(db, ctx.guild.id, "member_log", channel.id)
-        db.close()
+        with connect_db() as db:
+            set_channel_settings(db, ctx.guild.id, "member_log", channel.id)
         await ctx.send(f"📝 Log join/leave disetel ke {channel.mention}")
 
     # REAL MEMBER JOIN
     @commands.Cog.listener()
     async def on_member_join(self, member):
-        db = connect_db()
-        if not get_feature_status(db, member.guild.id, "welcome_message"):
-            db.close()
-            return
+        with connect_db() as db:
+            if not get_feature_status(db, member.guild.id, "welcome_message"):
+                return
 
-        message = get_welcome_message(db, member.guild.id, "welcome")
-        ch_id = get_channel_settings(db, member.guild.id, "welcome")
-        db.close()
+            message = get_welcome_message(db, member.guild.id, "welcome")
+            ch_id = get_channel_settings(db, member.guild.id, "welcome")
 
         if not message:
             return
@@ -160,34 +153,30 @@ class MemberGreetingConfig(commands.Cog):
         if status not in ["on", "off"]:
             return await ctx.send("❌ Gunakan `on` atau `off`.")
 
-        db = connect_db()
-        set_feature_status(db, ctx.guild.id, "goodbye_message", status == "on")
-        db.close()
+        with connect_db() as db:
+            set_feature_status(db, ctx.guild.id, "goodbye_message", status == "on")
         await ctx.send(f"👋 Goodbye message {'enabled' if status == 'on' else 'disabled'}.")
 
     @commands.command(name="setgoodbyemsg", extras={"category": "Welcome"})
     @is_owner_or_dev()
     async def set_goodbye_msg(self, ctx, *, message: str):
-        db = connect_db()
-        set_welcome_message(db, ctx.guild.id, "goodbye", message)
-        db.close()
+        with connect_db() as db:
+            set_welcome_message(db, ctx.guild.id, "goodbye", message)
         await ctx.send("✅ Pesan goodbye disimpan.")
 
     @commands.command(name="setchgoodbye", extras={"category": "Welcome"})
     @is_owner_or_dev()
     async def set_goodbye_channel(self, ctx, channel: discord.TextChannel):
-        db = connect_db()
-        set_channel_settings(db, ctx.guild.id, "goodbye", channel.id)
-        db.close()
+        with connect_db() as db:
+            set_channel_settings(db, ctx.guild.id, "goodbye", channel.id)
         await ctx.send(f"👋 Goodbye channel → {channel.mention}")
 
     @commands.command(name="testgoodbye", extras={"category": "Welcome"})
     @is_owner_or_dev()
     async def test_goodbye(self, ctx):
-        db = connect_db()
-        message = get_welcome_message(db, ctx.guild.id, "goodbye")
-        ch_id = get_channel_settings(db, ctx.guild.id, "goodbye")
-        db.close()
+        with connect_db() as db:
+            message = get_welcome_message(db, ctx.guild.id, "goodbye")
+            ch_id = get_channel_settings(db, ctx.guild.id, "goodbye")
 
         if not message:
             return await ctx.send("⚠ Belum ada pesan goodbye.")
@@ -219,14 +208,12 @@ class MemberGreetingConfig(commands.Cog):
     # REAL MEMBER LEAVE
     @commands.Cog.listener()
     async def on_member_remove(self, member):
-        db = connect_db()
-        if not get_feature_status(db, member.guild.id, "goodbye_message"):
-            db.close()
-            return
+        with connect_db() as db:
+            if not get_feature_status(db, member.guild.id, "goodbye_message"):
+                return
 
-        message = get_welcome_message(db, member.guild.id, "goodbye")
-        ch_id = get_channel_settings(db, member.guild.id, "goodbye")
-        db.close()
+            message = get_welcome_message(db, member.guild.id, "goodbye")
+            ch_id = get_channel_settings(db, member.guild.id, "goodbye")
 
         if not message:
             return
@@ -260,9 +247,8 @@ class MemberGreetingConfig(commands.Cog):
     #   LOGGING HELPERS
     # ====================================================
     async def send_join_log(self, member, is_test=False):
-        db = connect_db()
-        log_ch_id = get_channel_settings(db, member.guild.id, "member_log")
-        db.close()
+        with connect_db() as db:
+            log_ch_id = get_channel_settings(db, member.guild.id, "member_log")
 
         if not log_ch_id:
             return
@@ -285,9 +271,8 @@ class MemberGreetingConfig(commands.Cog):
         await log_channel.send(embed=embed)
 
     async def send_leave_log(self, member, is_test=False):
-        db = connect_db()
-        log_ch_id = get_channel_settings(db, member.guild.id, "member_log")
-        db.close()
+        with connect_db() as db:
+            log_ch_id = get_channel_settings(db, member.guild.id, "member_log")
 
         if not log_ch_id:
             return
@@ -0,0 +1,200 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from yt_dlp import YoutubeDL
+
+YTDL_POOL_SIZE = int(os.getenv("YTDL_POOL_SIZE", 4))
+DOWNLOAD_DIR = "temp_files"
+
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+# ============================================================
+#  PROFIL OPSI (dipakai bersama music_cog & link_cog)
+# ============================================================
+PROFILES = {
+    # search_yt / resolver Spotify
+    "audio-search": {
+        "format": "bestaudio/best",
+        "quiet": True,
+        "noplaylist": True,
+        "default_search": "auto",
+        "ignoreerrors": True,
+        "no_warnings": True,
+        "geo_bypass": True,
+        "nocheckcertificate": True,
+        "cachedir": False,
+    },
+    # autoplay (ytsearch10 lalu disaring)
+    "filtered-search": {
+        "format": "bestaudio/best",
+        "quiet": True,
+        "noplaylist": True,
+        "default_search": "ytsearch10",
+        "ignoreerrors": True,
+        "extractor_args": {"youtube": {"player_client": ["default"]}},
+    },
+    # link_cog: video IG/TikTok/Shorts
+    "download-video": {
+        "outtmpl": os.path.join(DOWNLOAD_DIR, "%(id)s.%(ext)s"),
+        "quiet": True,
+        "noplaylist": True,
+        "no_warnings": True,
+        "ignoreerrors": False,
+        "http_headers": {"User-Agent": _USER_AGENT},
+        "format": "bestvideo[ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[ext=mp4][vcodec^=avc1]/best",
+        "merge_output_format": "mp4",
+    },
+    # link_cog: mmp3
+    "download-audio": {
+        "outtmpl": os.path.join(DOWNLOAD_DIR, "%(id)s.%(ext)s"),
+        "quiet": True,
+        "noplaylist": True,
+        "no_warnings": True,
+        "ignoreerrors": False,
+        "http_headers": {"User-Agent": _USER_AGENT},
+        "format": "bestaudio/best",
+        "postprocessors": [{
+            "key": "FFmpegExtractAudio",
+            "preferredcodec": "mp3",
+            "preferredquality": "192",
+        }],
+    },
+}
+
+
+# ============================================================
+#  POOL PER PROFIL
+# ============================================================
+class YtdlPool:
+    """
+    Beberapa instance YoutubeDL dengan opsi yang sama. Satu instance hanya
+    dipakai satu thread sekaligus (YoutubeDL tidak thread-safe); instance
+    dikembalikan ke pool supaya extractor tidak di-init ulang tiap panggilan.
+    """
+
+    def __init__(self, name, opts, size=YTDL_POOL_SIZE):
+        self.name = name
+        self.opts = opts
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _new(self):
+        ydl = YoutubeDL(dict(self.opts))
+        self.created += 1
+        return ydl
+
+    def prewarm(self, count=None):
+        count = self.size if count is None else min(count, self.size)
+        with self.lock:
+            while self.created < count:
+                self.idle.put(self._new())
+
+    @contextmanager
+    def acquire(self):
+        try:
+            ydl = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                ydl = self._new() if self.created < self.size else None
+            if ydl is None:
+                ydl = self.idle.get()
+        try:
+            yield ydl
+        finally:
+            self.idle.put(ydl)
+
+    def record(self, ms, ok):
+        with self.lock:
+            self.calls += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            if not ok:
+                self.errors += 1
+
+    def extract_info(self, url, download=False, outtmpl=None):
+        start = time.perf_counter()
+        ok = False
+        try:
+            with self.acquire() as ydl:
+                if outtmpl is None:
+                    info = ydl.extract_info(url, download=download)
+                else:
+                    # instance sedang dipegang thread ini saja → aman ganti outtmpl sementara
+                    default = ydl.params.get("outtmpl")
+                    ydl.params["outtmpl"] = {"default": outtmpl}
+                    try:
+                        info = ydl.extract_info(url, download=download)
+                    finally:
+                        ydl.params["outtmpl"] = default
+            ok = info is not None
+            return info
+        finally:
+            self.record((time.perf_counter() - start) * 1000, ok)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "created": self.created,
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+                "max_ms": self.max_ms,
+            }
+
+    def close_all(self):
+        while True:
+            try:
+                ydl = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                ydl.close()
+            except Exception:
+                pass
+            self.created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_ytdl_pool(profile):
+    pool = _pools.get(profile)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(profile)
+            if pool is None:
+                pool = _pools[profile] = YtdlPool(profile, PROFILES[profile])
+    return pool
+
+
+def ytdl_extract(profile, url, download=False, outtmpl=None):
+    """
+    extract_info pakai instance dari pool `profile` (blocking — jalankan di executor).
+    `outtmpl` mengganti lokasi output untuk panggilan ini saja (workspace per job).
+    """
+    return get_ytdl_pool(profile).extract_info(url, download=download, outtmpl=outtmpl)
+
+
+def prewarm_ytdl(*profiles, count=1):
+    for profile in profiles:
+        get_ytdl_pool(profile).prewarm(count)
+
+
+def get_ytdl_stats():
+    return {name: pool.snapshot() for name, pool in list(_pools.items())}
+
+
+def close_ytdl_pools():
+    for pool in list(_pools.values()):
+        pool.close_all()